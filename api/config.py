@@ -14,6 +14,18 @@ class Settings(BaseSettings):
     # AI Settings
     GROQ_API_KEY: str = ""
     USE_OS_MODELS: bool = True
+    LLM_API_URL: str = "https://api.groq.com/openai/v1/chat/completions" # OpenAI-compatible chat endpoint
+    LLM_SMALL_MODEL: str = "llama-3.1-8b-instant" # Cheap route: expansion, insights, classification
+    LLM_LARGE_MODEL: str = "llama-3.3-70b-versatile" # Quality route: screenplays, strategy, copy
+    LLM_RPM_LIMIT: int = 30 # Per-model request bucket (requests per minute, per process)
+    LLM_TPM_LIMIT: int = 15000 # Per-model token bucket (tokens per minute, per process)
+    LLM_MAX_RETRIES: int = 4 # Retries on 429 / 5xx / transport errors
+    LLM_BACKOFF_BASE: float = 1.0 # Seconds; doubles per retry, with jitter
+    LLM_BACKOFF_MAX: float = 30.0
+    LLM_TIMEOUT: float = 60.0
+    LLM_CACHE_ENABLED: bool = True # Memoize deterministic LLM tasks (hooks, translations, packages, strategies)
+    LLM_CACHE_TTL: int = 7 * 24 * 3600
+    FUSED_ANALYSIS: bool = False # One LLM call for strategy + viral package (falls back to separate calls)
     
     # Neural Asset Keys
     ELEVENLABS_API_KEY: str = ""
@@ -25,12 +37,50 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: str = ""
     GOOGLE_SEARCH_CX: str = ""  # Custom Search Engine ID for Google Search
     DEFAULT_VLM_MODEL: str = "gemini-1.5-flash"
+    VLM_CONTACT_SHEET: bool = False # Tile sampled keyframes into one image -> one VLM call per job
+    VLM_CACHE_TTL: int = 7 * 24 * 3600 # Seconds a VLM analysis is reused for near-identical keyframes
+    VLM_HEDGE_PERCENTILE: float = 95.0 # Start the next VLM tier once a tier exceeds this latency percentile
+    VLM_HEDGE_DEFAULT_DELAY: float = 8.0 # Hedge delay (s) until a tier has enough latency samples
     
     # Video Generation
     FONT_PATH: str = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
     
+    # Render Parallelism (segment-parallel ffmpeg renders for long inputs)
+    RENDER_SEGMENT_MIN_DURATION: float = 60.0 # Inputs shorter than this render in one pass
+    RENDER_SEGMENT_SECONDS: float = 30.0
+    RENDER_WORKERS: int = 0 # 0 = one worker per CPU core
+    OPENCV_MAX_INFLIGHT_FRAMES: int = 64 # OpenCV fallback: decoded + transformed frames held at once, independent of core count
+    MEDIA_INDEX_DIR: str = "temp/media_index" # Persistent ffprobe metadata + keyframe tables
+    ASSET_STORE_DIR: str = "temp/assets" # Content-addressed downloads, B-roll, images, voiceovers
+    ASSET_STORE_MAX_BYTES: int = 20 * 1024**3 # LRU eviction beyond this budget
+    
+    # Shared Analysis Frames (decoded once per job for OCR/VLM/scene detection)
+    ANALYSIS_FRAMES_DIR: str = "temp/analysis_frames"
+    ANALYSIS_FPS: float = 1.0
+    ANALYSIS_MAX_SIDE: int = 640
+    OCR_BATCH_FRAMES: int = 4 # Sampled frames whose zone crops share one batched readtext call
+    OCR_STABLE_BATCHES: int = 2 # Stop OCR after this many batches without a zone occupancy change
+    
+    # Model Registry (models load on first use; optionally pre-loaded per worker process)
+    MODEL_WARMUP: str = "" # Comma-separated: easyocr, whisper, vlm
+    MODEL_WARMUP_QUEUES: str = "celery" # Only workers consuming these queues warm up
+    WHISPER_MODEL_SIZE: str = "base"
+    WHISPER_BEAM_SIZE: int = 5
+    TRANSCRIBE_CHUNK_SECONDS: float = 30.0 # Max length of a voice-activity chunk
+    TRANSCRIBE_WORKERS: int = 0 # Parallel chunk transcriptions; 0 = one per core (max 4)
+    TRANSCRIPT_CACHE_TTL: int = 30 * 24 * 3600
+    
+    # Discovery Trend Cache (in-process LRU in front of Redis)
+    DISCOVERY_CACHE_TTL: int = 15 * 60 # Seconds a scan result is fresh
+    DISCOVERY_CACHE_STALE_TTL: int = 6 * 3600 # Beyond fresh: served at once while a background scan refreshes it
+    DISCOVERY_SCAN_LOCK_TTL: int = 300 # Cross-process single-flight lock; upper bound of one full scan
+    DISCOVERY_SCAN_WAIT: float = 60.0 # Seconds to wait for another process's scan before scanning anyway
+    
     # Social API Keys
     YOUTUBE_API_KEY: str = ""
+    YOUTUBE_DAILY_QUOTA: int = 10000 # Data API units per project per Pacific day
+    YOUTUBE_QUOTA_PUBLISH_RESERVE: int = 3200 # Held back for uploads (1600 units each)
+    YOUTUBE_QUOTA_ANALYTICS_RESERVE: int = 200 # Held back for analytics on top of the publish reserve
     TIKTOK_API_KEY: str = ""
     
     # Payment Processing
@@ -53,6 +103,19 @@ class Settings(BaseSettings):
     # Scraper Cookies (Bypass Bot Detection)
     YOUTUBE_COOKIES_PATH: Optional[str] = "cookies/youtube_cookies.txt"
     TIKTOK_COOKIES_PATH: Optional[str] = "cookies/tiktok_cookies.txt"
+    YTDLP_CACHE_DIR: str = "temp/yt_dlp_cache" # Shared yt-dlp cache (player JS, signatures)
+    DOWNLOAD_INDEX_TTL: int = 24 * 3600 # Seconds a canonical URL keeps pointing at its stored download
+    STREAM_DOWNLOAD_MAX_BYTES: int = 4 * 1024**3 # Hard cap on any streamed HTTP download
+    STREAM_DOWNLOAD_RETRIES: int = 5 # Range-resume attempts after a dropped connection
+    STOCK_DOWNLOAD_MAX_BYTES: int = 500 * 1024**2 # Stock B-roll clips larger than this are rejected
+    HTTP_MAX_CONNECTIONS: int = 100 # Pooled outbound connections per process (aiohttp)
+    HTTP_MAX_CONNECTIONS_PER_HOST: int = 20 # Pooled outbound connections per host
+    HTTP_KEEPALIVE_SECONDS: float = 30.0 # Idle keep-alive connections are closed after this
+    HTTP_TIMEOUT: float = 30.0 # Default outbound request timeout (per-request overrides allowed)
+    HTTP_CONNECT_TIMEOUT: float = 10.0
+    HTTP_ENABLE_HTTP2: bool = True # Used when the h2 package is installed
+    DOWNLOAD_FINAL_MAX_HEIGHT: int = 1080 # Source height for final renders
+    DOWNLOAD_PREVIEW_MAX_HEIGHT: int = 480 # Source height for previews and analysis-only jobs
     
     # Infrastructure
     PRODUCTION_DOMAIN: str = "http://localhost:8000"
@@ -136,6 +199,8 @@ class Settings(BaseSettings):
     # Database & Redis
     DATABASE_URL: str = "sqlite:///./ettametta.db"
     REDIS_URL: str = "redis://localhost:6379/0"
+    SETTINGS_CACHE_TTL: float = 30.0 # Seconds SystemSettings / UserSetting values are reused in-process
+    SETTINGS_CACHE_CHANNEL: str = "settings:invalidate" # Redis pub/sub channel announcing settings writes
     
     # Validation Warning
     def validate_critical_config(self):
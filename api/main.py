@@ -91,6 +91,12 @@ async def seed_monitored_niches():
     finally:
         db.close()
 
+@app.on_event("shutdown")
+async def close_http_clients():
+    """Closes pooled outbound HTTP connections cleanly."""
+    from api.utils.http_client import http_clients
+    await http_clients.aclose()
+
 # Rate Limiter setup
 limiter = Limiter(key_func=get_remote_address)
 app.state.limiter = limiter
@@ -135,6 +141,7 @@ async def root():
 
 @app.get("/health")
 async def health_check():
+    # Liveness only: runtime metrics are served by the admin-only /settings/system/metrics
     return {
         "status": "healthy", 
         "debug": settings.DEBUG,
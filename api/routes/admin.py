@@ -3,8 +3,11 @@ Admin System Configuration API
 =============================
 Endpoints for admin-only system-wide configuration management.
 These settings affect all users and should only be accessible to admins.
+Internal runtime metrics (models, caches, pools) are served here as well,
+never from the public /health liveness probe.
 """
 
+import asyncio
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional, Dict, Any
@@ -126,6 +129,38 @@ async def get_system_settings(current_user: UserDB = Depends(require_admin)):
     }
 
 
+def collect_metrics() -> Dict[str, Any]:
+    """Runtime counters of the process-wide services (may touch disk/Redis)."""
+    from api.utils.model_registry import model_registry
+    from services.storage.asset_store import asset_store
+    from api.utils.http_client import http_clients
+    from api.utils.llm_gateway import llm_gateway
+    from api.utils.llm_cache import llm_memo
+    from api.utils.settings_cache import settings_cache
+    from services.discovery.trend_cache import trend_cache
+    from api.utils.youtube_api import youtube_api
+    from api.utils.youtube_quota import youtube_quota
+    return {
+        "models": model_registry.report(),
+        "assets": asset_store.stats(),
+        "http": http_clients.stats(),
+        "llm": {**llm_gateway.metrics(), "cache": llm_memo.stats()},
+        "settings_cache": settings_cache.stats(),
+        "discovery_cache": trend_cache.stats(),
+        # One Redis read per known account: per-account usage stays admin-only
+        "youtube": {**youtube_api.stats(), "quota": youtube_quota.stats()},
+    }
+
+
+@router.get("/metrics")
+async def get_system_metrics(current_user: UserDB = Depends(require_admin)):
+    """
+    Internal runtime metrics (admin only). Collected in a worker thread so
+    filesystem and Redis reads never block the event loop.
+    """
+    return await asyncio.to_thread(collect_metrics)
+
+
 @router.post("")
 async def update_system_settings(
     settings_update: SystemSettingsUpdate,
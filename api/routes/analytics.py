@@ -45,6 +45,26 @@ async def get_report(post_id: str, current_user: UserDB = Depends(get_current_us
     finally:
         db.close()
 
+@router.get("/reports", response_model=List[ContentPerformance])
+async def list_reports(limit: int = 50, current_user: UserDB = Depends(get_current_user)):
+    """Reports for the most recent published posts, fetched in one batch."""
+    from api.utils.database import SessionLocal
+    from api.utils.models import PublishedContentDB
+    db = SessionLocal()
+    try:
+        query = db.query(PublishedContentDB.id).filter(PublishedContentDB.status == "Published")
+        if current_user.role != "admin":
+            query = query.filter(PublishedContentDB.user_id == current_user.id)
+        post_ids = [str(row.id) for row in query.order_by(PublishedContentDB.published_at.desc()).limit(min(max(limit, 1), 200))]
+    finally:
+        db.close()
+
+    try:
+        reports = await base_analytics_service.get_performance_reports(post_ids)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return [reports[post_id] for post_id in post_ids]
+
 @router.get("/insights/{post_id}")
 async def get_insights(post_id: str, current_user: UserDB = Depends(get_current_user)):
     from api.utils.database import SessionLocal
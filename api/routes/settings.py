@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from api.utils.database import get_db
 from api.utils.models import SystemSettings
+from api.utils.settings_cache import settings_cache
 from api.routes.auth import get_current_user
 from api.utils.user_models import UserDB
 from pydantic import BaseModel
@@ -97,6 +98,7 @@ async def update_setting(request: SettingUpdateRequest, db: Session = Depends(ge
     
     db.commit()
     db.refresh(setting)
+    settings_cache.invalidate(user_id=current_user.id)
     return {"status": "success", "key": setting.key, "scope": "user"}
 
 @router.get("/monetization/strategies")
@@ -171,6 +173,7 @@ async def bulk_update_settings(settings_list: List[SettingUpdateRequest], db: Se
             db.add(setting)
     
     db.commit()
+    settings_cache.invalidate()
     return {"status": "success"}
 
 @router.post("/filters/{filter_id}/toggle")
@@ -0,0 +1,111 @@
+"""
+Tests for the Asset Store
+=========================
+Verifies content addressing, aliases, atomic commits and LRU eviction.
+"""
+
+import os
+import json
+import time
+import pytest
+from services.storage.asset_store import AssetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AssetStore(root=str(tmp_path / "assets"), max_bytes=10_000)
+
+
+@pytest.mark.unit
+class TestAssetStore:
+    """Content-addressed store shared by downloads, B-roll, images and voiceovers."""
+
+    def test_identical_content_is_stored_once(self, store):
+        a = store.put_bytes(b"x" * 100, aliases=["url:a"], ext=".mp4")
+        b = store.put_bytes(b"x" * 100, aliases=["url:b"], ext=".mp4")
+        assert a == b
+        assert store.lookup("url:a") == store.lookup("url:b") == a
+        assert len(os.listdir(store.objects_dir)) == 1
+
+    def test_hit_miss_metrics(self, store):
+        store.put_bytes(b"data", aliases=["known"])
+        assert store.lookup("unknown") is None
+        assert store.lookup("unknown", "known")
+        stats = store.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 1)
+        assert stats["hit_rate"] == 0.5
+
+    def test_expired_alias_misses(self, store):
+        store.put_bytes(b"data", aliases=["short"], alias_ttl=1)
+        entry = store._alias_path("short")
+        assert store.lookup("short")
+        with open(entry) as f:
+            data = json.load(f)
+        data["expires"] = time.time() - 1
+        with open(entry, "w") as f:
+            json.dump(data, f)
+        assert store.lookup("short") is None
+
+    def test_failed_write_leaves_nothing_behind(self, store):
+        with pytest.raises(RuntimeError):
+            with store.writer(".mp4", aliases=["partial"]) as handle:
+                with open(handle["tmp"], "wb") as f:
+                    f.write(b"half")
+                raise RuntimeError("connection dropped")
+        assert os.listdir(store.objects_dir) == []
+        assert os.listdir(store.tmp_dir) == []
+        assert store.lookup("partial") is None
+
+    def test_lru_eviction_respects_budget_and_checkouts(self, store, tmp_path):
+        old = store.put_bytes(b"a" * 4000, aliases=["old"])
+        in_use = store.put_bytes(b"b" * 4000, aliases=["in-use"])
+        job_copy = store.checkout(in_use, str(tmp_path / "job"))
+        os.utime(old, (time.time() - 100, time.time() - 100))
+        os.utime(in_use, (time.time() - 200, time.time() - 200))
+
+        store.put_bytes(b"c" * 4000, aliases=["new"])
+
+        # Least recently used object that no job holds is evicted first
+        assert store.lookup("old") is None
+        assert store.lookup("in-use") == in_use and os.path.exists(job_copy)
+        assert store.lookup("new")
+        assert store.stats()["evictions"] == 1
+
+    def test_adopt_keeps_original_path_without_pinning(self, store, tmp_path):
+        path = tmp_path / "voice.mp3"
+        path.write_bytes(b"speech")
+        store.adopt(str(path), aliases=["voice:x"])
+        assert path.read_bytes() == b"speech"
+        assert open(store.lookup("voice:x"), "rb").read() == b"speech"
+        assert os.stat(store.lookup("voice:x")).st_nlink == 1
+
+    def test_persistent_checkout_does_not_block_eviction(self, store, tmp_path):
+        kept = store.put_bytes(b"a" * 6000, aliases=["broll"])
+        copy = store.checkout(kept, str(tmp_path / "outputs"), persistent=True)
+        os.utime(kept, (time.time() - 100, time.time() - 100))
+
+        store.put_bytes(b"b" * 6000, aliases=["other"])
+
+        assert store.lookup("broll") is None
+        assert open(copy, "rb").read() == b"a" * 6000
+
+    def test_puts_under_budget_do_not_rescan(self, store, monkeypatch):
+        store.put_bytes(b"a" * 1000)
+        scans = []
+        real_listdir = os.listdir
+        monkeypatch.setattr(os, "listdir", lambda path: scans.append(path) or real_listdir(path))
+
+        store.put_bytes(b"b" * 1000)
+        store.put_bytes(b"c" * 1000)
+        assert store.objects_dir not in scans
+
+        store.put_bytes(b"d" * 8000)
+        assert store.objects_dir in scans
+
+    def test_stats_use_running_totals(self, store, monkeypatch):
+        store.put_bytes(b"a" * 1000)
+        store.put_bytes(b"b" * 500)
+        monkeypatch.setattr(os, "listdir", lambda path: pytest.fail("stats() must not scan the store"))
+
+        stats = store.stats()
+        assert (stats["objects"], stats["bytes"]) == (2, 1500)
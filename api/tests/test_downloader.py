@@ -0,0 +1,151 @@
+"""
+Tests for the Video Downloader
+==============================
+Verifies single extraction per URL and URL/content deduplication against a
+local HTTP server.
+"""
+
+import os
+import shutil
+import threading
+import pytest
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import yt_dlp
+from services.video_engine.downloader import VideoDownloader, canonical_url
+
+
+@pytest.fixture
+def media_server(tmp_path):
+    """Serves two byte-identical mp4 files; yields (base_url, request_log)."""
+    import cv2
+    import numpy as np
+
+    root = tmp_path / "www"
+    root.mkdir()
+    writer = cv2.VideoWriter(str(root / "clip.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), 10, (160, 120))
+    for i in range(20):
+        writer.write(np.full((120, 160, 3), i * 10, dtype=np.uint8))
+    writer.release()
+    shutil.copy(root / "clip.mp4", root / "mirror.mp4")
+    requests = []
+
+    class Handler(SimpleHTTPRequestHandler):
+        def do_GET(self):
+            requests.append(self.path)
+            super().do_GET()
+
+        def do_HEAD(self):
+            requests.append(self.path)
+            super().do_HEAD()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(Handler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", requests
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch):
+    from services.storage.asset_store import AssetStore
+    monkeypatch.setattr("services.video_engine.downloader.settings.YTDLP_CACHE_DIR", str(tmp_path / "ytcache"))
+    return VideoDownloader(download_dir=str(tmp_path / "downloads"), store=AssetStore(root=str(tmp_path / "assets")))
+
+
+@pytest.mark.unit
+class TestCanonicalUrl:
+    """URL variants of the same source collapse to one key."""
+
+    def test_youtube_variants(self):
+        assert canonical_url("https://youtu.be/abc123?si=xyz") == "youtube:abc123"
+        assert canonical_url("https://m.youtube.com/watch?v=abc123&feature=share") == "youtube:abc123"
+        assert canonical_url("https://www.youtube.com/shorts/abc123/") == "youtube:abc123"
+
+    def test_tracking_params_are_dropped(self):
+        assert canonical_url("http://www.tiktok.com/@a/video/1?utm_source=x&is_from_webapp=1") == \
+            canonical_url("https://tiktok.com/@a/video/1")
+
+
+@pytest.mark.unit
+class TestDownloadDedup:
+    """One extraction per URL, one stored copy per content."""
+
+    async def test_verify_info_is_reused_for_download(self, downloader, media_server):
+        base, _ = media_server
+        url = f"{base}/clip.mp4"
+        with patch.object(yt_dlp.YoutubeDL, "extract_info", autospec=True,
+                          side_effect=yt_dlp.YoutubeDL.extract_info) as extract:
+            assert await downloader.verify_video_asset(url)
+            path = await downloader.download_video(url)
+        assert extract.call_count == 1
+        assert os.path.getsize(path) > 0
+
+    async def test_verify_skips_extraction_only_for_stored_video(self, downloader, media_server, tmp_path):
+        base, _ = media_server
+        url = f"{base}/clip.mp4"
+        audio = tmp_path / "audio.m4a"
+        audio.write_bytes(b"not a video")
+        downloader.store.put_file(str(audio), aliases=[f"url:audio:{canonical_url(url)}"])
+
+        with patch.object(yt_dlp.YoutubeDL, "extract_info", autospec=True,
+                          side_effect=yt_dlp.YoutubeDL.extract_info) as extract:
+            assert await downloader.verify_video_asset(url)
+            assert extract.call_count == 1  # an audio-only download proves nothing
+
+            await downloader.download_video(url, purpose="preview")
+            extract.reset_mock()
+            assert await downloader.verify_video_asset(url)
+            assert extract.call_count == 0
+
+    async def test_repeat_url_and_mirror_reuse_stored_copy(self, downloader, media_server):
+        base, requests = media_server
+        first = await downloader.download_video(f"{base}/clip.mp4")
+        fetched = len(requests)
+
+        again = await downloader.download_video(f"{base}/clip.mp4?utm_source=feed")
+        assert len(requests) == fetched  # served from the index, no network
+        assert again != first and os.path.samefile(again, first)
+
+        mirror = await downloader.download_video(f"{base}/mirror.mp4")
+        assert os.path.samefile(mirror, first)
+        assert len(os.listdir(downloader.store.objects_dir)) == 1
+
+        # A job deleting its own copy never affects the others
+        os.remove(first)
+        assert os.path.exists(again)
+
+
+@pytest.mark.unit
+class TestFormatSelection:
+    """Source format follows the downstream need."""
+
+    def test_selectors_by_purpose(self):
+        from services.video_engine.downloader import format_selector
+
+        assert format_selector("audio").startswith("bestaudio")
+        assert "height<=480" in format_selector("preview") and "bestaudio" in format_selector("preview")
+        assert "bestaudio" not in format_selector("analysis")
+        assert "height<=1080" in format_selector("final")
+
+    async def test_final_download_serves_preview_but_not_vice_versa(self, downloader, media_server):
+        base, requests = media_server
+        await downloader.download_video(f"{base}/clip.mp4", purpose="preview")
+        fetched = len(requests)
+
+        await downloader.download_video(f"{base}/clip.mp4", purpose="final")
+        assert len(requests) > fetched  # preview quality cannot serve a final render
+        fetched = len(requests)
+
+        await downloader.download_video(f"{base}/clip.mp4", purpose="preview")
+        await downloader.download_video(f"{base}/clip.mp4", purpose="audio")
+        assert len(requests) == fetched
+
+    async def test_unknown_purpose_is_rejected(self, downloader):
+        with pytest.raises(ValueError):
+            await downloader.download_video("https://example.com/v.mp4", purpose="4k")
@@ -0,0 +1,94 @@
+"""
+Tests for Fused Analysis
+========================
+Verifies that one structured-output call yields both the visual strategy
+and the viral package, and that schema failures fall back (None) while
+handing the already picked CTA to the separate package call.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from api.utils import cache
+from services.decision_engine.service import VideoStrategy
+from services.optimization.models import PostMetadata
+from services.optimization.service import OptimizationService
+
+FUSED_ANSWER = {
+    "strategy": {
+        "speed_range": [1.02, 1.08],
+        "jitter_intensity": 2.0,
+        "recommended_filters": ["f6", "f8"],
+        "hook_points": [[0.0, 3.0]],
+        "b_roll_keywords": ["city", "night"],
+        "vibe": "Energetic",
+        "explanation": "Fast cuts",
+    },
+    "package": {
+        "title": "Nobody talks about this",
+        "description": "The truth about AI #ai",
+        "hashtags": ["#ai", "#tech", "#future", "#viral"],
+        "cta": "Follow now",
+    },
+}
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(cache, "get_redis", lambda: None)
+    monkeypatch.setattr("services.optimization.service.settings.GROQ_API_KEY", "test-key")
+    svc = OptimizationService()
+    svc._monetization_cta = AsyncMock(return_value="")
+    return svc
+
+
+@pytest.mark.unit
+class TestFusedPlan:
+    async def test_one_call_returns_strategy_and_package(self, service, monkeypatch):
+        complete = AsyncMock(return_value=FUSED_ANSWER)
+        monkeypatch.setattr("services.optimization.service.llm_gateway.complete_json", complete)
+
+        strategy, metadata, cta = await service.generate_fused_plan(
+            "job-1", "AI Technology", "TikTok", "Visual-only analysis conducted.", style="Glitch/High-Art"
+        )
+
+        complete.assert_awaited_once()
+        prompt = complete.await_args.args[0]
+        assert '"strategy"' in prompt and '"package"' in prompt
+        assert isinstance(strategy, VideoStrategy) and strategy.vibe == "Energetic"
+        assert isinstance(metadata, PostMetadata)
+        assert metadata.title == "Nobody talks about this"
+        assert metadata.platform == "TikTok"
+        assert cta == ""
+
+    async def test_schema_failure_falls_back(self, service, monkeypatch):
+        broken = {"strategy": FUSED_ANSWER["strategy"], "package": {"description": "no title"}}
+        complete = AsyncMock(return_value=broken)
+        monkeypatch.setattr("services.optimization.service.llm_gateway.complete_json", complete)
+
+        assert await service.generate_fused_plan("job-2", "AI", "TikTok", "t") == (None, None, "")
+        # Invalid answers are not memoized: the next attempt calls the model again
+        assert await service.generate_fused_plan("job-2", "AI", "TikTok", "t") == (None, None, "")
+        assert complete.await_count == 2
+
+    async def test_fallback_package_reuses_the_fused_cta(self, service, monkeypatch):
+        broken = {"strategy": FUSED_ANSWER["strategy"], "package": {"description": "no title"}}
+        monkeypatch.setattr("services.optimization.service.llm_gateway.complete_json",
+                            AsyncMock(return_value=broken))
+        service._monetization_cta = AsyncMock(return_value="\n- MONETIZATION CTA: Shop the drop")
+        analyze = AsyncMock(return_value='{"title": "t", "description": "d", "hashtags": [], "cta": "c"}')
+        monkeypatch.setattr("services.optimization.service.ai_worker.analyze_viral_pattern", analyze)
+
+        _, _, cta = await service.generate_fused_plan("job-4", "AI", "TikTok", "t")
+        await service.generate_viral_package("job-4", "AI", "TikTok", cta=cta)
+
+        service._monetization_cta.assert_awaited_once()
+        assert "Shop the drop" in analyze.await_args.args[0]
+
+    async def test_missing_key_skips_the_call(self, service, monkeypatch):
+        monkeypatch.setattr("services.optimization.service.settings.GROQ_API_KEY", "")
+        complete = AsyncMock(return_value=FUSED_ANSWER)
+        monkeypatch.setattr("services.optimization.service.llm_gateway.complete_json", complete)
+
+        assert await service.generate_fused_plan("job-3", "AI", "TikTok", "t") == (None, None, None)
+        complete.assert_not_awaited()
@@ -0,0 +1,89 @@
+"""
+Tests for Hedged Tier Execution
+===============================
+Verifies hedge timing, fallthrough on failures and loser cancellation.
+"""
+
+import time
+import asyncio
+import pytest
+from api.utils.hedging import LatencyTracker, hedged_call
+
+
+def tier(name, delay, result, log):
+    async def call():
+        log.append(f"start:{name}")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            log.append(f"cancel:{name}")
+            raise
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return name, call
+
+
+@pytest.mark.unit
+class TestLatencyTracker:
+    """Per-tier latency percentiles."""
+
+    def test_percentile_needs_min_samples(self):
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record("groq", 1.0)
+        assert tracker.percentile("groq", 95) is None
+        for seconds in (2.0, 3.0, 4.0):
+            tracker.record("groq", seconds)
+        assert tracker.percentile("groq", 50) == 3.0
+        assert tracker.percentile("groq", 95) == 4.0
+
+
+@pytest.mark.unit
+class TestHedgedCall:
+    """Hedged fallback across tiers."""
+
+    async def test_slow_tier_is_hedged_and_cancelled(self):
+        log = []
+        start = time.perf_counter()
+        name, result = await hedged_call(
+            [tier("slow", 5.0, {"a": 1}, log), tier("fast", 0.01, {"b": 2}, log)],
+            LatencyTracker(), default_delay=0.05,
+        )
+        assert (name, result) == ("fast", {"b": 2})
+        assert time.perf_counter() - start < 1.0
+        assert "cancel:slow" in log
+
+    async def test_fast_primary_never_starts_fallback(self):
+        log = []
+        name, _ = await hedged_call(
+            [tier("primary", 0.01, {"a": 1}, log), tier("backup", 0.01, {"b": 2}, log)],
+            LatencyTracker(), default_delay=1.0,
+        )
+        assert name == "primary"
+        assert log == ["start:primary"]
+
+    async def test_failure_and_empty_result_fall_through_immediately(self):
+        log = []
+        start = time.perf_counter()
+        name, result = await hedged_call(
+            [tier("broken", 0.0, RuntimeError("boom"), log),
+             tier("empty", 0.0, {}, log),
+             tier("ok", 0.0, {"c": 3}, log)],
+            LatencyTracker(), default_delay=10.0,
+        )
+        assert (name, result) == ("ok", {"c": 3})
+        assert time.perf_counter() - start < 1.0
+
+    async def test_tracked_percentile_sets_hedge_delay(self):
+        tracker = LatencyTracker(min_samples=1)
+        tracker.record("slow", 0.05)
+        log = []
+        name, _ = await hedged_call(
+            [tier("slow", 5.0, {"a": 1}, log), tier("fast", 0.0, {"b": 2}, log)],
+            tracker, default_delay=30.0,
+        )
+        assert name == "fast"
+
+    async def test_all_tiers_fail(self):
+        log = []
+        assert await hedged_call([tier("x", 0.0, None, log)], LatencyTracker()) == (None, None)
@@ -0,0 +1,109 @@
+"""
+Tests for the HTTP Client Registry
+==================================
+Verifies that outbound clients are pooled per origin and event loop, and
+that connections are kept alive across calls.
+"""
+
+import asyncio
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api.utils.http_client import HTTPClientRegistry
+
+
+@pytest.fixture
+def keepalive_server():
+    """Yields (base_url, peers): the client address of every request served."""
+    peers = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            peers.append(self.client_address)
+            body = b"ok"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", peers
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+class TestHTTPClientRegistry:
+    async def test_one_client_per_origin(self):
+        registry = HTTPClientRegistry()
+
+        first = registry.client("https://api.example.com/a")
+        assert registry.client("https://api.example.com/b?x=1") is first
+        assert registry.client("https://other.example.com/") is not first
+        await registry.aclose()
+
+    async def test_connections_are_reused(self, keepalive_server):
+        base_url, peers = keepalive_server
+        registry = HTTPClientRegistry()
+
+        for _ in range(3):
+            response = await registry.client(base_url).get(f"{base_url}/ping")
+            assert response.text == "ok"
+        session = registry.session()
+        for _ in range(3):
+            async with registry.session().get(f"{base_url}/ping") as response:
+                assert await response.text() == "ok"
+        assert registry.session() is session
+
+        # One connection for the httpx client, one for the aiohttp session
+        assert len(peers) == 6
+        assert len(set(peers)) == 2
+        await registry.aclose()
+
+    async def test_aclose_closes_and_forgets(self):
+        registry = HTTPClientRegistry()
+        client = registry.client("https://api.example.com")
+        session = registry.session()
+
+        await registry.aclose()
+
+        assert client.is_closed and session.closed
+        assert registry.stats()["httpx_clients"] == 0
+        assert registry.client("https://api.example.com") is not client
+        await registry.aclose()
+
+    def test_clients_are_per_event_loop(self):
+        registry = HTTPClientRegistry()
+
+        async def get():
+            return registry.client("https://api.example.com")
+
+        loop = asyncio.new_event_loop()
+        try:
+            first = loop.run_until_complete(get())
+            assert loop.run_until_complete(get()) is first
+        finally:
+            loop.close()
+
+        # The old loop is gone: its client is dropped, not reused
+        second = asyncio.run(get())
+        assert second is not first
+        assert registry.created == 2
+
+    async def test_reset_forgets_without_closing(self):
+        registry = HTTPClientRegistry()
+        client = registry.client("https://api.example.com")
+
+        registry.reset()
+
+        assert not client.is_closed
+        assert registry.client("https://api.example.com") is not client
+        await client.aclose()
+        await registry.aclose()
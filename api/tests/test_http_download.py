@@ -0,0 +1,134 @@
+"""
+Tests for Streaming Downloads
+=============================
+Verifies chunked streaming, Range resume after dropped connections, size
+limits and checksum verification against a local HTTP server.
+"""
+
+import os
+import hashlib
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api.utils.http_download import DownloadError, stream_download
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 123)
+PAYLOAD_SHA = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+@pytest.fixture
+def flaky_server():
+    """
+    Serves PAYLOAD at /file with Range support. `state["drops"]` responses are
+    cut off after `state["cut"]` bytes; /norange ignores Range headers and
+    /missing is a 404. Yields (base_url, state) where state["ranges"] logs
+    the Range header of each request.
+    """
+    state = {"drops": 0, "cut": 1024 * 1024, "ranges": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/missing":
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            range_header = self.headers.get("Range") if self.path == "/file" else None
+            state["ranges"].append(range_header)
+            start = int(range_header.split("=")[1].split("-")[0]) if range_header else 0
+            body = PAYLOAD[start:]
+            self.send_response(206 if range_header else 200)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", '"v1"')
+            if range_header:
+                self.send_header("Content-Range", f"bytes {start}-{len(PAYLOAD) - 1}/{len(PAYLOAD)}")
+            self.end_headers()
+
+            if state["drops"] > 0:
+                state["drops"] -= 1
+                self.wfile.write(body[:state["cut"]])
+                self.wfile.flush()
+                self.close_connection = True
+                return
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.unit
+class TestStreamDownload:
+    async def test_streams_large_file(self, flaky_server, tmp_path):
+        base_url, state = flaky_server
+        dest = tmp_path / "out.bin"
+
+        digest = await stream_download(f"{base_url}/file", str(dest), sha256=PAYLOAD_SHA, chunk_size=64 * 1024)
+
+        assert digest == PAYLOAD_SHA
+        assert dest.read_bytes() == PAYLOAD
+        assert state["ranges"] == [None]
+
+    async def test_resumes_after_dropped_connections(self, flaky_server, tmp_path):
+        base_url, state = flaky_server
+        state["drops"] = 2
+        dest = tmp_path / "out.bin"
+
+        digest = await stream_download(f"{base_url}/file", str(dest), sha256=PAYLOAD_SHA, retries=3)
+
+        assert digest == PAYLOAD_SHA
+        assert dest.read_bytes() == PAYLOAD
+        # Each retry continues from the bytes already on disk
+        cut = state["cut"]
+        assert state["ranges"] == [None, f"bytes={cut}-", f"bytes={2 * cut}-"]
+
+    async def test_restarts_when_server_ignores_range(self, flaky_server, tmp_path):
+        base_url, state = flaky_server
+        state["drops"] = 1
+        dest = tmp_path / "out.bin"
+
+        digest = await stream_download(f"{base_url}/norange", str(dest), sha256=PAYLOAD_SHA, retries=2)
+
+        assert digest == PAYLOAD_SHA
+        assert dest.read_bytes() == PAYLOAD
+
+    async def test_gives_up_after_retries(self, flaky_server, tmp_path):
+        base_url, state = flaky_server
+        state["drops"] = 10
+        dest = tmp_path / "out.bin"
+
+        with pytest.raises(DownloadError):
+            await stream_download(f"{base_url}/file", str(dest), retries=1)
+        assert not dest.exists()
+
+    async def test_rejects_oversized_body(self, flaky_server, tmp_path):
+        base_url, _ = flaky_server
+        dest = tmp_path / "out.bin"
+
+        with pytest.raises(DownloadError, match="limit"):
+            await stream_download(f"{base_url}/file", str(dest), max_bytes=1024 * 1024)
+        assert not dest.exists()
+
+    async def test_rejects_checksum_mismatch(self, flaky_server, tmp_path):
+        base_url, _ = flaky_server
+        dest = tmp_path / "out.bin"
+
+        with pytest.raises(DownloadError, match="checksum"):
+            await stream_download(f"{base_url}/file", str(dest), sha256="0" * 64)
+        assert not dest.exists()
+
+    async def test_http_error_carries_status(self, flaky_server, tmp_path):
+        base_url, _ = flaky_server
+
+        with pytest.raises(DownloadError) as excinfo:
+            await stream_download(f"{base_url}/missing", str(tmp_path / "out.bin"))
+        assert excinfo.value.status == 404
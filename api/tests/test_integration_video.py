@@ -48,6 +48,63 @@ class TestVideoIntegration:
         assert clip.duration == 10.0
         mock_clip_class.assert_called_with("test.mp4")
 
+    def test_opencv_batch_matches_per_frame_transform(self, processor):
+        """The vectorized OpenCV batch path should reproduce flip -> resize -> crop -> gray."""
+        import cv2
+        import numpy as np
+
+        rng = np.random.default_rng(0)
+        frames = rng.integers(0, 256, size=(4, 90, 160, 3), dtype=np.uint8)
+        batch = processor._transform_opencv_batch(frames, 0, ["f11"], None)
+
+        for frame, result in zip(frames, batch):
+            ref = cv2.flip(frame, 1)
+            ref = cv2.resize(ref, (int(160 * 1.05), int(90 * 1.05)), interpolation=cv2.INTER_LINEAR)
+            ref = ref[(94 - 90) // 2:(94 - 90) // 2 + 90, (168 - 160) // 2:(168 - 160) // 2 + 160]
+            ref = cv2.cvtColor(cv2.cvtColor(ref, cv2.COLOR_BGR2GRAY), cv2.COLOR_GRAY2BGR)
+            assert np.abs(result.astype(int) - ref.astype(int)).max() <= 2
+
+    def test_grain_bank_is_reused_deterministically(self, processor):
+        """Grain comes from a precomputed texture bank indexed by frame number."""
+        import numpy as np
+
+        bank = processor._grain_bank(8, 8, size=4)
+        frames = np.zeros((6, 8, 8, 3), dtype=np.uint8)
+        first = processor._transform_opencv_batch(frames, 0, ["f10"], bank)
+        second = processor._transform_opencv_batch(frames, 0, ["f10"], bank)
+        assert np.array_equal(first, second)
+        assert np.array_equal(first[0], first[4])
+
+    def test_opencv_pipeline_bounds_frames_in_flight(self, processor, tmp_path, monkeypatch):
+        """In-flight batches follow OPENCV_MAX_INFLIGHT_FRAMES, not the core count; short last batch is written."""
+        import cv2
+        import queue
+        import numpy as np
+
+        src = str(tmp_path / "src.avi")
+        writer = cv2.VideoWriter(src, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+        for i in range(21):
+            writer.write(np.full((48, 64, 3), i * 10, dtype=np.uint8))
+        writer.release()
+
+        sizes = []
+        real_queue = queue.Queue
+
+        def recording_queue(maxsize=0):
+            sizes.append(maxsize)
+            return real_queue(maxsize=maxsize)
+
+        monkeypatch.setattr("services.video_engine.processor.settings.OPENCV_MAX_INFLIGHT_FRAMES", 16)
+        monkeypatch.setattr("os.cpu_count", lambda: 64)
+        monkeypatch.setattr(queue, "Queue", recording_queue)
+        processor.output_dir = str(tmp_path)
+        out = processor._process_video_opencv(src, "out.avi", [], batch_size=8)
+
+        assert sizes == [2]
+        cap = cv2.VideoCapture(out)
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 21
+        cap.release()
+
     @pytest.mark.asyncio
     async def test_synthesis_task_routing(self, client):
         """Verify that different synthesis engines route to appropriate tasks."""
@@ -0,0 +1,87 @@
+"""
+Tests for LLM Memoization
+=========================
+Verifies keying by task, template version, normalized inputs and model,
+plus TTL, bypass and validity handling.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from api.utils import cache
+from api.utils.llm_cache import LLMMemo, normalize_inputs
+
+
+@pytest.fixture
+def memo(monkeypatch):
+    monkeypatch.setattr(cache, "get_redis", lambda: None)
+    return LLMMemo(ttl=60)
+
+
+@pytest.mark.unit
+class TestKeys:
+    def test_normalizes_whitespace_but_not_case(self):
+        assert normalize_inputs({"hook": "  Stop \n scrolling  ", "tags": ("a", " b ")}) == \
+            {"hook": "Stop scrolling", "tags": ["a", "b"]}
+        assert normalize_inputs("Hook") != normalize_inputs("hook")
+
+    def test_key_depends_on_every_component(self):
+        base = LLMMemo.key("hook.validate", "v1", {"hook": "x"}, "m1")
+
+        assert LLMMemo.key("hook.validate", "v1", {"hook": " x "}, "m1") == base
+        assert LLMMemo.key("hook.validate", "v2", {"hook": "x"}, "m1") != base
+        assert LLMMemo.key("hook.validate", "v1", {"hook": "x"}, "m2") != base
+        assert LLMMemo.key("translate.metadata", "v1", {"hook": "x"}, "m1") != base
+        assert LLMMemo.key("hook.validate", "v1", {"hook": "y"}, "m1") != base
+
+
+@pytest.mark.unit
+class TestGetOrCall:
+    async def test_second_call_is_served_from_cache(self, memo):
+        call = AsyncMock(return_value={"score": 90})
+
+        first = await memo.get_or_call("hook.validate", "v1", {"hook": "x"}, "m", call)
+        second = await memo.get_or_call("hook.validate", "v1", {"hook": "  x"}, "m", call)
+
+        assert first == second == {"score": 90}
+        call.assert_awaited_once()
+        assert memo.stats()["hits"] == 1
+
+    async def test_bypass_skips_lookup_and_refreshes(self, memo):
+        call = AsyncMock(side_effect=[{"v": 1}, {"v": 2}])
+
+        await memo.get_or_call("t", "v1", "in", "m", call)
+        fresh = await memo.get_or_call("t", "v1", "in", "m", call, bypass=True)
+
+        assert fresh == {"v": 2}
+        assert await memo.get_or_call("t", "v1", "in", "m", call) == {"v": 2}
+        assert call.await_count == 2
+
+    async def test_failures_and_invalid_results_are_not_cached(self, memo):
+        failing = AsyncMock(side_effect=ValueError("boom"))
+        with pytest.raises(ValueError):
+            await memo.get_or_call("t", "v1", "in", "m", failing)
+
+        invalid = AsyncMock(return_value={"partial": True})
+        await memo.get_or_call("t", "v1", "in", "m", invalid, is_valid=lambda d: "score" in d)
+        await memo.get_or_call("t", "v1", "in", "m", invalid, is_valid=lambda d: "score" in d)
+        assert invalid.await_count == 2
+
+    async def test_disabled_cache_always_calls(self, memo, monkeypatch):
+        monkeypatch.setattr("api.utils.llm_cache.settings.LLM_CACHE_ENABLED", False)
+        call = AsyncMock(return_value={"v": 1})
+
+        await memo.get_or_call("t", "v1", "in", "m", call)
+        await memo.get_or_call("t", "v1", "in", "m", call)
+
+        assert call.await_count == 2
+
+    async def test_entries_expire(self, memo, monkeypatch):
+        call = AsyncMock(return_value={"v": 1})
+        await memo.get_or_call("t", "v1", "in", "m", call, ttl=10)
+
+        clock = cache.time.time() + 11
+        monkeypatch.setattr(cache.time, "time", lambda: clock)
+        await memo.get_or_call("t", "v1", "in", "m", call)
+
+        assert call.await_count == 2
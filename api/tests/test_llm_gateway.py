@@ -0,0 +1,158 @@
+"""
+Tests for the LLM Gateway
+=========================
+Verifies routing, 429 backoff, coalescing of identical prompts, token
+buckets and metrics against a local OpenAI-compatible stub server.
+"""
+
+import json
+import time
+import asyncio
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from api.utils.llm_gateway import LLMError, LLMGateway, TokenBucket
+
+
+@pytest.fixture
+def chat_server():
+    """
+    Stub chat endpoint. `state["statuses"]` is a queue of status codes to
+    answer with before succeeding; `state["delay"]` slows every answer.
+    Yields (url, state) where state["requests"] logs each request payload.
+    """
+    state = {"statuses": [], "delay": 0.0, "requests": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            state["requests"].append(payload)
+            time.sleep(state["delay"])
+            status = state["statuses"].pop(0) if state["statuses"] else 200
+            if status == 200:
+                body = json.dumps({
+                    "choices": [{"message": {"content": json.dumps({"model": payload["model"]})}}],
+                    "usage": {"prompt_tokens": 11, "completion_tokens": 7},
+                }).encode()
+            else:
+                body = b'{"error": "rate limited"}'
+            self.send_response(status)
+            if status == 429:
+                self.send_header("Retry-After", "0.2")
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions", state
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def gateway(chat_server, monkeypatch):
+    monkeypatch.setattr("api.utils.llm_gateway.settings.LLM_BACKOFF_BASE", 0.05)
+    monkeypatch.setattr("api.utils.llm_gateway.settings.LLM_RPM_LIMIT", 6000)
+    gw = LLMGateway(url=chat_server[0])
+    gw._api_key = lambda: "test-key"
+    return gw
+
+
+@pytest.mark.unit
+class TestLLMGateway:
+    async def test_routes_to_model(self, gateway, chat_server):
+        _, state = chat_server
+
+        small = await gateway.complete_json("classify", route="small")
+        large = await gateway.complete_json("write", route="large")
+
+        assert small["model"] == gateway.routes["small"]
+        assert large["model"] == gateway.routes["large"]
+        assert state["requests"][0]["response_format"] == {"type": "json_object"}
+        with pytest.raises(ValueError):
+            await gateway.complete("x", route="huge")
+
+    async def test_retries_after_429(self, gateway, chat_server):
+        _, state = chat_server
+        state["statuses"] = [429, 503]
+
+        started = time.perf_counter()
+        result = await gateway.complete_json("hello", route="small")
+
+        assert result["model"] == gateway.routes["small"]
+        assert len(state["requests"]) == 3
+        # Retry-After (0.2s) was honoured
+        assert time.perf_counter() - started >= 0.2
+        stats = gateway.metrics()["models"][gateway.routes["small"]]
+        assert stats["rate_limited"] == 1
+        assert stats["errors"] == 2
+
+    async def test_non_retryable_error_raises(self, gateway, chat_server):
+        _, state = chat_server
+        state["statuses"] = [400]
+
+        with pytest.raises(LLMError):
+            await gateway.complete("bad request")
+        assert len(state["requests"]) == 1
+
+    async def test_identical_prompts_are_coalesced(self, gateway, chat_server):
+        _, state = chat_server
+        state["delay"] = 0.2
+
+        results = await asyncio.gather(*(gateway.complete("same prompt") for _ in range(5)),
+                                       gateway.complete("other prompt"))
+
+        assert len(state["requests"]) == 2
+        assert len(set(results[:5])) == 1
+        assert gateway.metrics()["models"][gateway.routes["large"]]["coalesced"] == 4
+
+    async def test_cancelled_first_caller_does_not_fail_followers(self, gateway, chat_server):
+        _, state = chat_server
+        state["delay"] = 0.2
+
+        first = asyncio.ensure_future(gateway.complete("same prompt"))
+        await asyncio.sleep(0.05)
+        followers = [asyncio.ensure_future(gateway.complete("same prompt")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        results = await asyncio.gather(*followers)
+        assert first.cancelled()
+        assert len(set(results)) == 1 and len(state["requests"]) == 1
+
+    async def test_metrics_track_tokens_and_latency(self, gateway):
+        for i in range(5):
+            await gateway.complete(f"prompt {i}", route="small")
+
+        stats = gateway.metrics()["models"][gateway.routes["small"]]
+        assert stats["calls"] == 5
+        assert stats["prompt_tokens"] == 55
+        assert stats["completion_tokens"] == 35
+        assert stats["latency"]["p50"] is not None
+
+
+@pytest.mark.unit
+class TestTokenBucket:
+    async def test_waits_for_refill(self):
+        bucket = TokenBucket(rate=10.0, capacity=2.0)
+
+        assert await bucket.acquire() == 0
+        assert await bucket.acquire() == 0
+        waited = await bucket.acquire()
+
+        assert 0.05 < waited <= 0.1
+
+    async def test_pause_blocks_until_elapsed(self):
+        bucket = TokenBucket(rate=100.0, capacity=10.0)
+
+        bucket.pause(0.2)
+
+        assert await bucket.acquire() >= 0.2
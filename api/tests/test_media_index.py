@@ -0,0 +1,160 @@
+"""
+Tests for the Media Index
+=========================
+Verifies ffprobe parsing, persistence and keyframe lookups.
+"""
+
+import os
+import pytest
+from unittest.mock import patch
+from services.video_engine.media_index import MediaIndex
+
+FFPROBE_OUTPUT = {
+    "streams": [
+        {"index": 0, "codec_type": "video", "codec_name": "h264", "width": 1920,
+         "height": 1080, "avg_frame_rate": "30000/1001", "nb_frames": "300"},
+        {"index": 1, "codec_type": "audio", "codec_name": "aac"},
+    ],
+    "format": {"duration": "10.010000"},
+    "packets": [
+        {"stream_index": 0, "pts_time": "0.000000", "flags": "K__"},
+        {"stream_index": 1, "pts_time": "0.000000", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "0.033367", "flags": "___"},
+        {"stream_index": 0, "pts_time": "4.004000", "flags": "K__"},
+        {"stream_index": 0, "pts_time": "8.008000", "flags": "K__"},
+    ],
+}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return MediaIndex(index_dir=str(tmp_path / "index"))
+
+
+@pytest.fixture
+def media_file(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"\x00" * 4096)
+    return str(path)
+
+
+@pytest.mark.unit
+class TestMediaIndex:
+    """Media metadata index behaviour."""
+
+    def test_parse_ffprobe_extracts_streams_and_keyframes(self):
+        info = MediaIndex.parse_ffprobe(FFPROBE_OUTPUT)
+        assert (info["width"], info["height"]) == (1920, 1080)
+        assert info["fps"] == pytest.approx(29.97, rel=1e-3)
+        assert info["frame_count"] == 300
+        assert info["has_audio"] is True
+        # Audio keyframes and non-key video packets are excluded
+        assert info["keyframes"] == [0.0, 4.004, 8.008]
+        assert info["gop_seconds"] == pytest.approx(4.004)
+
+    def test_probe_runs_once_and_persists(self, index, media_file):
+        """A second lookup (even from a fresh process) is served without ffprobe."""
+        parsed = MediaIndex.parse_ffprobe(FFPROBE_OUTPUT)
+        with patch.object(MediaIndex, "_probe", return_value=parsed) as probe:
+            index.get(media_file)
+            index.get(media_file)
+            assert probe.call_count == 1
+
+            fresh = MediaIndex(index_dir=index.index_dir)
+            assert fresh.get(media_file)["duration"] == pytest.approx(10.01)
+            assert probe.call_count == 1
+
+    def test_modified_file_is_reprobed(self, index, media_file):
+        parsed = MediaIndex.parse_ffprobe(FFPROBE_OUTPUT)
+        with patch.object(MediaIndex, "_probe", return_value=parsed) as probe:
+            index.get(media_file)
+            stat = os.stat(media_file)
+            os.utime(media_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            index.get(media_file)
+            assert probe.call_count == 2
+
+    def test_sample_times_snap_to_keyframes(self, index, media_file):
+        parsed = MediaIndex.parse_ffprobe(FFPROBE_OUTPUT)
+        with patch.object(MediaIndex, "_probe", return_value=parsed):
+            assert index.keyframe_at_or_before(media_file, 5.0) == pytest.approx(4.004)
+            assert index.sample_times(media_file, 3) == [0.0, 4.004, 8.008]
+
+    def test_sample_times_fill_gaps_between_sparse_keyframes(self, index, media_file):
+        parsed = MediaIndex.parse_ffprobe(FFPROBE_OUTPUT)
+        with patch.object(MediaIndex, "_probe", return_value=parsed):
+            times = index.sample_times(media_file, 6)
+        # Only three keyframes: the other three targets keep their exact times
+        assert len(times) == 6 and times == sorted(times)
+        assert {0.0, 4.004, 8.008} <= set(times)
+
+
+@pytest.mark.unit
+class TestAnalysisFrames:
+    """Decode-once analysis frame stack shared by OCR/VLM/readability."""
+
+    @pytest.fixture
+    def video(self, tmp_path):
+        import cv2
+        import numpy as np
+
+        path = str(tmp_path / "clip.avi")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (1280, 720))
+        for i in range(40):
+            # Hard cut from dark to bright half-way through
+            writer.write(np.full((720, 1280, 3), 20 if i < 20 else 230, dtype=np.uint8))
+        writer.release()
+        return path
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        from services.video_engine.analysis_frames import AnalysisFrameCache
+        return AnalysisFrameCache(cache_dir=str(tmp_path / "frames"))
+
+    def test_decodes_downscaled_stack_once(self, cache, video):
+        first = cache.get(video)
+        assert len(first) == 4  # 4s at 1 analysis fps
+        assert max(first.width, first.height) <= 640
+        assert first.scale == pytest.approx(first.width / 1280)
+
+        with patch.object(type(cache), "_decode") as decode:
+            second = cache.get(video)
+            decode.assert_not_called()
+        assert len(second) == len(first)
+
+    def test_scene_changes_and_sampling(self, cache, video):
+        frames = cache.get(video)
+        assert frames.scene_changes() == [2.0]
+        assert frames.evenly_spaced(2) == [0, 3]
+        assert frames.source_frame(2) == 20
+
+    def test_release_removes_cached_stack(self, cache, video):
+        key = cache.acquire(video)
+        cache.get(video)
+        cache.release(key)
+        assert os.listdir(cache.cache_dir) == []
+
+    def test_stack_is_kept_until_the_last_job_releases(self, cache, video):
+        key = cache.acquire(video)
+        assert cache.acquire(video) == key
+        cache.get(video)
+
+        cache.release(key)
+        assert len(os.listdir(cache.cache_dir)) == 2
+        os.remove(video)  # the job deleted its download before releasing
+        cache.release(key)
+        assert os.listdir(cache.cache_dir) == []
+
+    def test_get_decodes_again_when_the_stack_vanishes(self, cache, video):
+        cache.get(video)
+        real_open = open
+
+        def vanish_then_open(path, *args, **kwargs):
+            if path.endswith(".json") and not vanish_then_open.done:
+                vanish_then_open.done = True
+                for name in os.listdir(cache.cache_dir):
+                    os.remove(os.path.join(cache.cache_dir, name))
+            return real_open(path, *args, **kwargs)
+        vanish_then_open.done = False
+
+        with patch("builtins.open", vanish_then_open):
+            assert len(cache.get(video)) == 4
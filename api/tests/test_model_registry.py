@@ -0,0 +1,84 @@
+"""
+Tests for the Model Registry
+============================
+Verifies lazy loading, warm-up selection and memory reporting.
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from api.utils.model_registry import ModelRegistry, warmup_models_for_queues
+
+
+@pytest.fixture
+def registry():
+    return ModelRegistry()
+
+
+@pytest.mark.unit
+class TestModelRegistry:
+    """Process-wide lazy model loading."""
+
+    def test_loads_once_on_first_use(self, registry):
+        loader = MagicMock(return_value="model")
+        registry.register("ocr", loader)
+        assert not registry.is_loaded("ocr")
+        loader.assert_not_called()
+
+        assert registry.get("ocr") == "model"
+        assert registry.get("ocr") == "model"
+        assert loader.call_count == 1
+
+    def test_failed_loads_are_retried(self, registry):
+        loader = MagicMock(side_effect=[RuntimeError("download failed"), None, "model"])
+        registry.register("ocr", loader)
+
+        with pytest.raises(RuntimeError):
+            registry.get("ocr")
+        with pytest.raises(RuntimeError):
+            registry.get("ocr")
+        assert not registry.is_loaded("ocr")
+
+        assert registry.get("ocr") == "model"
+        assert loader.call_count == 3
+
+    def test_dotted_loader_is_imported_on_get(self, registry):
+        registry.register("cwd", "os:getcwd")
+        assert registry.get("cwd")
+
+    def test_report_includes_load_stats(self, registry):
+        registry.register("a", lambda: bytearray(8 * 2**20))
+        registry.register("b", lambda: None)
+        registry.get("a")
+        report = registry.report()
+        assert report["process_rss_mb"] > 0
+        assert report["models"]["a"]["loaded"] is True
+        assert report["models"]["a"]["load_seconds"] >= 0
+        assert "rss_mb" in report["models"]["a"]
+        assert report["models"]["b"] == {"loaded": False}
+
+    def test_warm_logs_failures(self, registry):
+        registry.register("broken", MagicMock(side_effect=RuntimeError("no weights")))
+        registry.warm(["broken"])
+        assert not registry.is_loaded("broken")
+
+    def test_warmup_only_for_designated_queues(self, monkeypatch):
+        from api.utils import model_registry as module
+
+        warm = MagicMock()
+        monkeypatch.setattr(module.model_registry, "warm", warm)
+        monkeypatch.setattr(module.settings, "MODEL_WARMUP", "easyocr, whisper")
+        monkeypatch.setattr(module.settings, "MODEL_WARMUP_QUEUES", "video")
+
+        warmup_models_for_queues(["celery"])
+        warm.assert_not_called()
+        warmup_models_for_queues(["celery", "video"])
+        warm.assert_called_once_with(["easyocr", "whisper"])
+
+    def test_importing_services_loads_no_models(self):
+        from api.utils.model_registry import model_registry
+        import services.video_engine.ocr_service  # noqa: F401
+        import api.utils.os_worker  # noqa: F401
+
+        assert not model_registry.is_loaded("easyocr")
+        assert not model_registry.is_loaded("whisper")
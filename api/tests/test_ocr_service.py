@@ -0,0 +1,115 @@
+"""
+Tests for the OCR Service
+=========================
+Verifies the zone pre-filter, batched crop OCR and early exit.
+"""
+
+import pytest
+import cv2
+import numpy as np
+from unittest.mock import MagicMock, patch
+
+from services.video_engine.analysis_frames import AnalysisFrames
+from services.video_engine.ocr_service import OCRService, spread_order, text_likely_zones
+
+
+def frame_with_caption(zone_row: float):
+    """Smooth gradient frame (360x640) with a caption centred at zone_row (0-1)."""
+    gradient = np.tile(np.linspace(40, 120, 640, dtype=np.uint8), (360, 1))
+    frame = cv2.cvtColor(gradient, cv2.COLOR_GRAY2BGR)
+    y = int(zone_row * 360)
+    cv2.putText(frame, "FOLLOW FOR MORE TIPS", (60, y + 10), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+    return frame
+
+
+def stack(frames):
+    return AnalysisFrames(np.stack(frames), [float(i) for i in range(len(frames))], 1.0, 30.0)
+
+
+@pytest.fixture
+def ocr():
+    service = OCRService()
+    service.reader = MagicMock()
+    return service
+
+
+def fake_batched(crops, **kwargs):
+    """Reports one high-confidence word centred in every crop."""
+    results = []
+    for crop in crops:
+        mid = crop.shape[0] / 2
+        box = [[60, mid - 10], [400, mid - 10], [400, mid + 10], [60, mid + 10]]
+        results.append([(box, "TIPS", 0.9)])
+    return results
+
+
+@pytest.mark.unit
+class TestTextPrefilter:
+    """NumPy text-presence test per zone."""
+
+    def test_flags_only_the_caption_zone(self):
+        frames = np.stack([frame_with_caption(0.9)])
+        assert text_likely_zones(frames)[0].tolist() == [False, False, False, False, True]
+
+    def test_plain_gradient_has_no_text(self):
+        frame = cv2.cvtColor(np.tile(np.linspace(0, 255, 640, dtype=np.uint8), (360, 1)), cv2.COLOR_GRAY2BGR)
+        assert not text_likely_zones(frame[None]).any()
+
+    def test_spread_order_covers_timeline_early(self):
+        order = spread_order(8)
+        assert sorted(order) == list(range(8))
+        assert order[:2] == [0, 4]
+
+
+@pytest.mark.unit
+class TestBatchedOCR:
+    """Batched, ROI-limited OCR with early exit."""
+
+    def test_only_likely_crops_are_ocrd_in_batches(self, ocr, monkeypatch):
+        monkeypatch.setattr("services.video_engine.ocr_service.settings.OCR_STABLE_BATCHES", 99)
+        ocr.reader.readtext_batched.side_effect = fake_batched
+        frames = stack([frame_with_caption(0.9) for _ in range(8)])
+
+        with patch("services.video_engine.ocr_service.analysis_frames.get", return_value=frames):
+            detections = ocr.detect_text_regions("clip.mp4", sample_rate=30)
+
+        ocr.reader.readtext.assert_not_called()
+        # 8 frames / 4 per batch, one bottom-zone crop per frame
+        assert ocr.reader.readtext_batched.call_count == 2
+        crops = ocr.reader.readtext_batched.call_args.args[0]
+        assert len(crops) == 4 and crops[0].shape == (144, 640, 3)
+        assert len(detections) == 8
+        assert all(d["normalized_y"] >= 0.8 for d in detections)
+
+    def test_stops_once_zone_occupancy_is_stable(self, ocr):
+        ocr.reader.readtext_batched.side_effect = fake_batched
+        frames = stack([frame_with_caption(0.1) for _ in range(40)])
+
+        with patch("services.video_engine.ocr_service.analysis_frames.get", return_value=frames):
+            detections = ocr.detect_text_regions("clip.mp4", sample_rate=30)
+
+        # Occupancy unchanged for 2 batches after the first -> 3 of 10 batches
+        assert ocr.reader.readtext_batched.call_count == 3
+        with patch.object(ocr, "detect_text_regions", return_value=detections):
+            assert ocr.get_caption_strategy("clip.mp4") == "bottom"
+
+    def test_caption_in_bottom_band_moves_captions_top(self, ocr):
+        ocr.reader.readtext_batched.side_effect = fake_batched
+        frames = stack([frame_with_caption(0.9) for _ in range(4)])
+
+        with patch("services.video_engine.ocr_service.analysis_frames.get", return_value=frames):
+            assert ocr.get_caption_strategy("clip.mp4") == "top"
+
+
+@pytest.mark.unit
+class TestReaderLoading:
+    def test_failed_load_is_retried_on_next_call(self, monkeypatch):
+        from api.utils import model_registry as module
+        registry = module.ModelRegistry()
+        reader = MagicMock()
+        registry.register("easyocr", MagicMock(side_effect=[RuntimeError("network down"), reader]))
+        monkeypatch.setattr("services.video_engine.ocr_service.model_registry", registry)
+        service = OCRService()
+
+        assert service.detect_text_regions("clip.mp4") == []
+        assert service.reader is reader
@@ -59,6 +59,39 @@ class TestHealthEndpoints:
         assert "langchain" in services
         assert "crewai" in services
 
+    def test_health_does_not_expose_internal_metrics(self, client: TestClient):
+        """Runtime counters live behind the admin metrics endpoint, not on /health."""
+        data = client.get("/health").json()
+
+        for internal in ("models", "assets", "http", "llm", "settings_cache", "discovery_cache", "youtube"):
+            assert internal not in data
+
+    def test_metrics_require_authentication(self, client: TestClient):
+        """The admin metrics endpoint rejects anonymous callers."""
+        response = client.get("/settings/system/metrics")
+
+        assert response.status_code in (401, 403)
+
+
+    def test_admin_metrics(self, client: TestClient, monkeypatch):
+        """Admins get the runtime counters, including per-account YouTube quota."""
+        from api.main import app
+        from api.routes.admin import require_admin
+        from api.utils import cache
+
+        monkeypatch.setattr(cache, "get_redis", lambda: None)
+        monkeypatch.setattr("api.utils.youtube_quota.get_redis", lambda: None)
+        app.dependency_overrides[require_admin] = lambda: None
+        try:
+            response = client.get("/settings/system/metrics")
+        finally:
+            app.dependency_overrides.pop(require_admin, None)
+
+        assert response.status_code == 200
+        data = response.json()
+        assert {"models", "assets", "http", "llm", "settings_cache", "discovery_cache", "youtube"} <= set(data)
+        assert "quota" in data["youtube"]
+
 
 class TestCORSHeaders:
     """Test CORS configuration."""
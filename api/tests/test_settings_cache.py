@@ -0,0 +1,119 @@
+"""
+Tests for the Settings Cache
+============================
+Verifies scope-wide loading, user overrides, TTL expiry, typed getters,
+pub/sub invalidation and the vault fallback to api.config.
+"""
+
+import os
+import json
+import pytest
+
+from api.utils import cache, vault
+from api.utils.settings_cache import SettingsCache
+
+SYSTEM = {"monetization_mode": "all", "auto_pilot": "True", "monetization_aggression": "70",
+          "groq_api_key": "sys-key", "broken_int": "lots", "empty": ""}
+USERS = {7: {"groq_api_key": "user-key"}}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    """Settings cache over in-memory tables; `loads` counts DB round-trips."""
+    loads = []
+
+    def load(user_id):
+        loads.append(user_id)
+        return dict(SYSTEM if user_id is None else USERS.get(user_id, {}))
+
+    redis = FakeRedis()
+    monkeypatch.setattr("api.utils.settings_cache.get_redis", lambda: redis)
+    sc = SettingsCache(ttl=30, channel="test:settings")
+    sc._listener_pid = os.getpid()  # no subscriber thread in tests
+    monkeypatch.setattr(sc, "_load", load)
+    return sc, loads, redis
+
+
+@pytest.mark.unit
+class TestReads:
+    def test_one_load_serves_every_key(self, store):
+        sc, loads, _ = store
+
+        assert sc.get("monetization_mode") == "all"
+        assert sc.get("AUTO_PILOT") == "True"
+        assert sc.get("missing", "fallback") == "fallback"
+        assert sc.get("empty", "fallback") == "fallback"
+
+        assert loads == [None]
+        assert sc.stats()["hits"] == 3 and sc.stats()["misses"] == 1
+
+    def test_user_override_wins(self, store):
+        sc, loads, _ = store
+
+        assert sc.get("groq_api_key", user_id=7) == "user-key"
+        assert sc.get("groq_api_key", user_id=8) == "sys-key"
+        assert sc.get("groq_api_key") == "sys-key"
+        assert loads == [7, 8, None]
+
+    def test_typed_getters(self, store):
+        sc, _, _ = store
+
+        assert sc.get_bool("auto_pilot") is True
+        assert sc.get_bool("missing", default=True) is True
+        assert sc.get_int("monetization_aggression", 100) == 70
+        assert sc.get_int("broken_int", 100) == 100
+
+    def test_entries_expire(self, store, monkeypatch):
+        sc, loads, _ = store
+        sc.get("auto_pilot")
+
+        clock = cache.time.monotonic() + 31
+        monkeypatch.setattr("api.utils.settings_cache.time.monotonic", lambda: clock)
+        sc.get("auto_pilot")
+
+        assert loads == [None, None]
+
+
+@pytest.mark.unit
+class TestInvalidation:
+    def test_invalidate_drops_scope_and_publishes(self, store):
+        sc, loads, redis = store
+        sc.get("auto_pilot")
+        sc.get("groq_api_key", user_id=7)
+
+        sc.invalidate(user_id=7)
+        sc.get("groq_api_key", user_id=7)
+        sc.get("auto_pilot")
+
+        assert loads == [None, 7, 7]
+        assert redis.published == [("test:settings", json.dumps({"user_id": 7}))]
+
+    def test_message_from_another_process_drops_scope(self, store):
+        sc, loads, _ = store
+        sc.get("auto_pilot")
+
+        sc._on_message(json.dumps({"user_id": None}).encode())
+        sc.get("auto_pilot")
+
+        assert loads == [None, None]
+        assert sc.stats()["invalidations"] == 1
+
+
+@pytest.mark.unit
+class TestVault:
+    def test_falls_back_to_config(self, store, monkeypatch):
+        sc, _, _ = store
+        monkeypatch.setattr(vault, "settings_cache", sc)
+        monkeypatch.setattr("api.utils.vault.settings.PEXELS_API_KEY", "env-key")
+
+        assert vault.get_secret("groq_api_key", user_id=7) == "user-key"
+        assert vault.get_secret("pexels_api_key") == "env-key"
+        assert vault.get_secret("unknown_key", "default") == "default"
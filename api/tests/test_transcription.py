@@ -0,0 +1,74 @@
+"""
+Tests for Chunked Transcription
+===============================
+Verifies PCM extraction, VAD chunk packing, timestamp merging and caching.
+"""
+
+import shutil
+import subprocess
+import pytest
+import numpy as np
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+from api.utils import os_worker
+from api.utils.os_worker import SAMPLE_RATE, AIWorker, extract_pcm, speech_chunks
+
+
+def segment(text, start, end):
+    return SimpleNamespace(text=text, start=start, end=end,
+                           words=[SimpleNamespace(word=text, start=start, end=end)])
+
+
+@pytest.mark.unit
+class TestChunking:
+    """PCM extraction and voice-activity chunking."""
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_extract_pcm_is_16k_mono(self, tmp_path):
+        path = str(tmp_path / "tone.wav")
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", "sine=frequency=440:duration=2",
+                        "-ac", "2", "-ar", "44100", path], check=True)
+        audio = extract_pcm(path)
+        assert audio.dtype == np.float32
+        assert abs(len(audio) - 2 * SAMPLE_RATE) < SAMPLE_RATE // 10
+        assert 0.05 < np.abs(audio).max() <= 1.0
+
+    def test_regions_are_packed_up_to_chunk_length(self, monkeypatch):
+        def seconds(a, b):
+            return {"start": a * SAMPLE_RATE, "end": b * SAMPLE_RATE}
+
+        regions = [seconds(0, 10), seconds(12, 25), seconds(27, 40), seconds(45, 50)]
+        monkeypatch.setattr("faster_whisper.vad.get_speech_timestamps", lambda audio, opts: regions)
+
+        chunks = speech_chunks(np.zeros(50 * SAMPLE_RATE, np.float32), max_seconds=30)
+        assert [(a // SAMPLE_RATE, b // SAMPLE_RATE) for a, b in chunks] == [(0, 25), (27, 50)]
+
+
+@pytest.mark.unit
+class TestParallelTranscription:
+    """Chunks transcribed in parallel, merged on one timeline, cached by audio hash."""
+
+    async def test_chunks_merge_with_offsets_and_cache(self, monkeypatch):
+        from api.utils import cache
+
+        monkeypatch.setattr(cache, "get_redis", lambda: None)
+        monkeypatch.setattr(os_worker, "transcript_cache", cache.TwoTierCache("transcript-test", ttl=60))
+        audio = np.random.default_rng(0).uniform(-0.5, 0.5, 20 * SAMPLE_RATE).astype(np.float32)
+        monkeypatch.setattr(os_worker, "extract_pcm", lambda path: audio)
+        monkeypatch.setattr(os_worker, "speech_chunks",
+                            lambda a, s: [(0, 8 * SAMPLE_RATE), (10 * SAMPLE_RATE, 20 * SAMPLE_RATE)])
+
+        model = MagicMock()
+        model.transcribe.side_effect = lambda chunk, **kw: (
+            iter([segment("hello" if len(chunk) == 8 * SAMPLE_RATE else "world", 1.0, 2.0)]), None
+        )
+        monkeypatch.setattr(os_worker.model_registry, "get", lambda name: model)
+
+        worker = AIWorker()
+        transcript = await worker.transcribe("clip.mp4")
+        assert [(s["text"], s["start"], s["end"]) for s in transcript] == [("hello", 1.0, 2.0), ("world", 11.0, 12.0)]
+        assert transcript[1]["words"][0]["start"] == 11.0
+
+        assert await worker.transcribe("reupload.mp4") == transcript
+        assert model.transcribe.call_count == 2
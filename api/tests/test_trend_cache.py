@@ -0,0 +1,162 @@
+"""
+Tests for the Discovery Trend Cache
+===================================
+Verifies write-through, tier-aware keys, stale-while-revalidate and
+single-flight scanning, in-process and across processes (shared Redis).
+"""
+
+import time
+import asyncio
+import pytest
+
+from api.utils import cache
+from services.discovery.trend_cache import TrendCache
+
+
+class FakeRedis:
+    """The handful of Redis commands the trend cache uses, in memory."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def ttl(self, key):
+        return 60
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value.encode()
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    def exists(self, key):
+        return int(key in self.data)
+
+    def eval(self, script, numkeys, key, token):
+        if self.data.get(key) == token:
+            del self.data[key]
+            return 1
+        return 0
+
+
+def use_redis(monkeypatch, client):
+    monkeypatch.setattr(cache, "get_redis", lambda: client)
+    monkeypatch.setattr("services.discovery.trend_cache.get_redis", lambda: client)
+
+
+def scanner(items, delay=0.0):
+    calls = []
+
+    async def scan():
+        calls.append(time.time())
+        await asyncio.sleep(delay)
+        return items
+    return scan, calls
+
+
+@pytest.fixture
+def trends(monkeypatch):
+    use_redis(monkeypatch, None)
+    return TrendCache(fresh_ttl=60, stale_ttl=600)
+
+
+@pytest.mark.unit
+class TestTrendCache:
+    async def test_scan_result_is_written_through(self, trends):
+        scan, calls = scanner([{"id": "a"}])
+
+        first = await trends.get_or_scan("AI", "30d", "free", scan)
+        second = await trends.get_or_scan(" ai ", "30d", "free", scan)
+
+        assert first == second == [{"id": "a"}]
+        assert len(calls) == 1
+        assert trends.stats()["fresh"] == 1
+
+    async def test_tier_is_part_of_the_key(self, trends):
+        scan, calls = scanner([{"id": "a"}])
+
+        await trends.get_or_scan("AI", "30d", "free", scan)
+        await trends.get_or_scan("AI", "30d", "premium", scan)
+
+        assert len(calls) == 2
+
+    async def test_concurrent_requests_share_one_scan(self, trends):
+        scan, calls = scanner([{"id": "a"}], delay=0.1)
+
+        results = await asyncio.gather(*(trends.get_or_scan("AI", "7d", "free", scan) for _ in range(5)))
+
+        assert len(calls) == 1
+        assert all(r == [{"id": "a"}] for r in results)
+        assert trends.stats()["coalesced"] == 4
+
+    async def test_cancelled_leader_does_not_fail_followers(self, trends):
+        scan, calls = scanner([{"id": "a"}], delay=0.1)
+
+        leader = asyncio.ensure_future(trends.get_or_scan("AI", "7d", "free", scan))
+        await asyncio.sleep(0)
+        followers = [asyncio.ensure_future(trends.get_or_scan("AI", "7d", "free", scan)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+
+        assert await asyncio.gather(*followers) == [[{"id": "a"}]] * 2
+        assert leader.cancelled() and len(calls) == 1
+        # The shared scan still wrote its result through
+        assert await trends.get_or_scan("AI", "7d", "free", scan) == [{"id": "a"}]
+        assert len(calls) == 1
+
+    async def test_stale_entry_is_served_while_refreshing(self, trends, monkeypatch):
+        old, _ = scanner([{"id": "old"}])
+        await trends.get_or_scan("AI", "30d", "free", old)
+
+        clock = time.time() + 120
+        monkeypatch.setattr("services.discovery.trend_cache.time.time", lambda: clock)
+        monkeypatch.setattr(cache.time, "time", lambda: clock)
+        new, calls = scanner([{"id": "new"}], delay=0.05)
+
+        served = await asyncio.gather(*(trends.get_or_scan("AI", "30d", "free", new) for _ in range(3)))
+        assert all(s == [{"id": "old"}] for s in served)
+
+        await asyncio.sleep(0.1)
+        assert len(calls) == 1
+        assert await trends.get_or_scan("AI", "30d", "free", new) == [{"id": "new"}]
+
+    async def test_refresh_forces_a_scan(self, trends):
+        scan, calls = scanner([{"id": "a"}])
+
+        await trends.get_or_scan("AI", "30d", "free", scan)
+        await trends.get_or_scan("AI", "30d", "free", scan, refresh=True)
+
+        assert len(calls) == 2
+
+    async def test_empty_results_are_not_cached(self, trends):
+        scan, calls = scanner([])
+
+        await trends.get_or_scan("AI", "30d", "free", scan)
+        await trends.get_or_scan("AI", "30d", "free", scan)
+
+        assert len(calls) == 2
+
+
+@pytest.mark.unit
+class TestCrossProcess:
+    async def test_second_process_waits_for_the_first_scan(self, monkeypatch):
+        use_redis(monkeypatch, FakeRedis())
+        # Two processes: separate local tiers and in-flight maps, one Redis
+        worker, api = TrendCache(fresh_ttl=60, stale_ttl=600), TrendCache(fresh_ttl=60, stale_ttl=600)
+        slow, worker_calls = scanner([{"id": "a"}], delay=0.3)
+        fast, api_calls = scanner([{"id": "b"}])
+
+        async def api_request():
+            await asyncio.sleep(0.05)
+            return await api.get_or_scan("AI", "30d", "free", fast)
+
+        from_worker, from_api = await asyncio.gather(worker.get_or_scan("AI", "30d", "free", slow), api_request())
+
+        assert from_worker == from_api == [{"id": "a"}]
+        assert len(worker_calls) == 1 and api_calls == []
+        assert api.stats()["peer_waits"] == 1
@@ -0,0 +1,77 @@
+"""
+Tests for Bulk Upsert
+=====================
+Verifies that scan batches insert new candidates, refresh only the metric
+columns of known ones, and survive duplicates and chunking, on SQLite and
+via the generic SELECT + executemany fallback.
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from api.utils.models import ContentCandidateDB
+from api.utils.upsert import _select_then_write, bulk_upsert
+from services.discovery.service import CANDIDATE_METRIC_COLUMNS, DiscoveryService
+from services.discovery.models import ContentCandidate
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    ContentCandidateDB.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def candidate(i: int, views: int = 100, title: str = "First title") -> dict:
+    c = ContentCandidate(id=f"yt_{i}", platform="youtube", url=f"https://youtu.be/{i}",
+                         title=title, views=views, engagement_score=0.1, viral_score=50,
+                         metadata={"rank": i})
+    return DiscoveryService.candidate_row("AI", c)
+
+
+@pytest.mark.unit
+class TestBulkUpsert:
+    def test_inserts_then_refreshes_metrics_only(self, db):
+        bulk_upsert(db, ContentCandidateDB, [candidate(1), candidate(2)], CANDIDATE_METRIC_COLUMNS)
+        db.commit()
+
+        bulk_upsert(db, ContentCandidateDB, [candidate(1, views=900, title="Renamed"), candidate(3)],
+                    CANDIDATE_METRIC_COLUMNS)
+        db.commit()
+
+        rows = {r.id: r for r in db.query(ContentCandidateDB).all()}
+        assert set(rows) == {"yt_1", "yt_2", "yt_3"}
+        assert rows["yt_1"].views == rows["yt_1"].view_count == 900
+        assert rows["yt_1"].title == "First title"
+        assert rows["yt_1"].metadata_json == {"rank": 1}
+        assert rows["yt_3"].discovery_date is not None
+
+    def test_duplicates_in_one_batch_keep_the_last(self, db):
+        written = bulk_upsert(db, ContentCandidateDB, [candidate(1, views=1), candidate(1, views=2)],
+                              CANDIDATE_METRIC_COLUMNS)
+        db.commit()
+
+        assert written == 1
+        assert db.query(ContentCandidateDB).one().views == 2
+
+    def test_large_batches_are_chunked(self, db):
+        rows = [candidate(i) for i in range(500)]
+
+        assert bulk_upsert(db, ContentCandidateDB, rows, CANDIDATE_METRIC_COLUMNS, chunk_size=64) == 500
+        db.commit()
+        assert db.query(ContentCandidateDB).count() == 500
+
+    def test_generic_fallback(self, db):
+        _select_then_write(db, ContentCandidateDB, "id", [candidate(1)], CANDIDATE_METRIC_COLUMNS)
+        db.commit()
+        _select_then_write(db, ContentCandidateDB, "id", [candidate(1, views=7, title="x"), candidate(2)],
+                           CANDIDATE_METRIC_COLUMNS)
+        db.commit()
+
+        rows = {r.id: r for r in db.query(ContentCandidateDB).all()}
+        assert rows["yt_1"].views == 7 and rows["yt_1"].title == "First title"
+        assert "yt_2" in rows
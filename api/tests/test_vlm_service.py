@@ -0,0 +1,206 @@
+"""
+Tests for the VLM Service
+=========================
+Verifies job-scoped keyframe extraction and tier orchestration.
+"""
+
+import shutil
+import pytest
+import cv2
+import numpy as np
+
+JPEG_MAGIC = b"\xff\xd8"
+
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (320, 240))
+    for i in range(50):
+        writer.write(np.full((240, 320, 3), i * 5, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+@pytest.fixture
+def vlm():
+    from services.video_engine.vlm_service import VLMService
+    return VLMService()
+
+
+@pytest.mark.unit
+class TestKeyframeSampling:
+    """Keyframes are returned as in-memory JPEG buffers, never shared temp files."""
+
+    def test_frames_are_in_memory_jpegs(self, vlm, video, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        frames = vlm._sample_keyframes(video, num_frames=5)
+        assert len(frames) == 5
+        assert all(f.startswith(JPEG_MAGIC) for f in frames)
+        assert not (tmp_path / "temp_frames").exists()
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+    def test_ffmpeg_select_pass_spans_timeline(self, vlm, video):
+        frames = vlm._extract_keyframes_ffmpeg(video, 3)
+        assert len(frames) == 3
+        brightness = [cv2.imdecode(np.frombuffer(f, np.uint8), cv2.IMREAD_GRAYSCALE).mean() for f in frames]
+        assert brightness == sorted(brightness)
+        assert brightness[-1] - brightness[0] > 150
+
+
+@pytest.mark.unit
+class TestResultCache:
+    """Analyses are reused for perceptually identical keyframes."""
+
+    def test_perceptual_hash_survives_reencode(self, vlm):
+        frame = np.tile(np.linspace(0, 255, 320, dtype=np.uint8), (240, 1))
+        frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        original = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 95])[1].tobytes()
+        reencoded = cv2.imencode(".jpg", cv2.resize(frame, (160, 120)), [cv2.IMWRITE_JPEG_QUALITY, 40])[1].tobytes()
+        assert vlm._perceptual_hash([original]) == vlm._perceptual_hash([reencoded])
+
+    @pytest.mark.asyncio
+    async def test_second_analysis_skips_model_calls(self, vlm, video, monkeypatch):
+        from unittest.mock import AsyncMock
+        from api.utils import cache
+
+        # Redis unreachable: the local tier must still serve the hit
+        monkeypatch.setattr(cache, "get_redis", lambda: None)
+        tiers = AsyncMock(return_value={"visual_mood": "calm"})
+        monkeypatch.setattr(vlm, "_analyze_tiers", tiers)
+
+        assert await vlm.analyze_video_content(video) == {"visual_mood": "calm"}
+        assert await vlm.analyze_video_content(video) == {"visual_mood": "calm"}
+        assert tiers.await_count == 1
+
+
+@pytest.mark.unit
+class TestContactSheet:
+    """Keyframes tiled into one labeled image for a single VLM call."""
+
+    def test_sheet_tiles_frames_in_timeline_order(self, vlm, video):
+        frames = vlm._sample_keyframes(video, num_frames=5)
+        sheet = cv2.imdecode(np.frombuffer(vlm._build_contact_sheet(frames), np.uint8), cv2.IMREAD_GRAYSCALE)
+
+        # 5 frames -> 3x2 grid, brightness increasing left-to-right, top-to-bottom
+        tile_h, tile_w = sheet.shape[0] // 2, sheet.shape[1] // 3
+        tiles = [sheet[r * tile_h:(r + 1) * tile_h, c * tile_w:(c + 1) * tile_w] for r in range(2) for c in range(3)]
+        brightness = [t[tile_h // 2:, :].mean() for t in tiles[:5]]
+        assert brightness == sorted(brightness)
+        assert tiles[5].max() < 10  # unused cell stays blank
+
+    async def test_contact_sheet_mode_makes_one_call(self, vlm, video, monkeypatch):
+        from unittest.mock import AsyncMock
+        from api.utils import cache
+
+        monkeypatch.setattr(cache, "get_redis", lambda: None)
+        monkeypatch.setattr("services.video_engine.vlm_service.settings.VLM_CONTACT_SHEET", True)
+        tiers = AsyncMock(return_value={"visual_mood": "energetic"})
+        monkeypatch.setattr(vlm, "_analyze_tiers", tiers)
+
+        await vlm.analyze_video_content(video)
+        images, = tiers.await_args.args
+        assert len(images) == 1
+        assert tiers.await_args.kwargs["sheet_frames"] == 5
+
+    def test_eval_harness_compares_fields(self):
+        from scripts.eval_vlm_contact_sheet import compare_analyses
+
+        report = compare_analyses(
+            {"visual_mood": "Calm", "detected_subjects": ["dog", "beach"], "aesthetic_rating": 7},
+            {"visual_mood": "calm", "detected_subjects": ["dog"], "aesthetic_rating": "8/10"},
+        )
+        assert report["key_coverage"] == 1.0
+        assert report["visual_mood_match"] is True
+        assert report["detected_subjects_jaccard"] == 0.5
+        assert report["aesthetic_rating_delta"] == 1.0
+
+
+class _StubHandler:
+    """Builds an HTTP handler answering /vlm/analyze after an injected delay."""
+
+    @staticmethod
+    def make(delay, hits):
+        import time
+        import json
+        from http.server import BaseHTTPRequestHandler
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                hits.append(self.path)
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(delay)
+                body = json.dumps({"analysis": "stub"}).encode()
+                try:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def stub_render_node():
+    """Local render-node stub on a random port; yields (start(delay) -> url, hits)."""
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    servers, hits = [], []
+
+    def start(delay):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler.make(delay, hits))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start, hits
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.unit
+class TestHedgedTiers:
+    """VLM tiers hedge past a slow tier instead of waiting out its timeout."""
+
+    async def test_slow_render_node_is_hedged_to_gemini(self, vlm, stub_render_node, monkeypatch):
+        import time
+        from unittest.mock import MagicMock, AsyncMock
+
+        start_stub, hits = stub_render_node
+        monkeypatch.setenv("RENDER_NODE_URL", start_stub(delay=3.0))
+        monkeypatch.setattr("services.video_engine.vlm_service.settings.VLM_HEDGE_DEFAULT_DELAY", 0.2)
+        vlm.groq_client = None
+        vlm.gemini_model = MagicMock()
+        vlm.gemini_model.generate_content_async = AsyncMock(
+            return_value=MagicMock(text='{"visual_mood": "bright"}')
+        )
+        frame = cv2.imencode(".jpg", np.zeros((8, 8, 3), np.uint8))[1].tobytes()
+
+        started = time.perf_counter()
+        analysis = await vlm._analyze_tiers([frame])
+        assert analysis == {"visual_mood": "bright"}
+        assert time.perf_counter() - started < 2.0
+        assert hits == ["/vlm/analyze"]
+
+    async def test_fast_render_node_wins_without_paid_tier(self, vlm, stub_render_node, monkeypatch):
+        from unittest.mock import MagicMock, AsyncMock
+
+        start_stub, _ = stub_render_node
+        monkeypatch.setenv("RENDER_NODE_URL", start_stub(delay=0.0))
+        vlm.groq_client = None
+        vlm.gemini_model = MagicMock()
+        vlm.gemini_model.generate_content_async = AsyncMock()
+        frame = cv2.imencode(".jpg", np.zeros((8, 8, 3), np.uint8))[1].tobytes()
+
+        analysis = await vlm._analyze_tiers([frame])
+        assert analysis["local_vlm_output"] == "stub"
+        vlm.gemini_model.generate_content_async.assert_not_called()
+        assert vlm.latency.snapshot()["local"]["samples"] == 1
@@ -0,0 +1,156 @@
+"""
+Tests for the YouTube API Helper
+================================
+Verifies client reuse, 50-ID batching of video lookups, and that the
+Shorts scanner makes one search plus one batched lookup per scan, and
+that analytics insights for a batch are generated concurrently and only
+uncached reports are fetched.
+"""
+
+import pytest
+from unittest.mock import AsyncMock
+
+from api.utils import cache
+from api.utils.youtube_api import YouTubeAPI, chunked
+from api.utils.youtube_quota import YouTubeQuota
+
+
+@pytest.fixture(autouse=True)
+def local_quota(monkeypatch):
+    """A fresh, Redis-less quota ledger per test."""
+    monkeypatch.setattr(cache, "get_redis", lambda: None)
+    monkeypatch.setattr("api.utils.youtube_quota.get_redis", lambda: None)
+    monkeypatch.setattr("api.utils.youtube_api.youtube_quota", YouTubeQuota())
+
+
+class FakeRequest:
+    def __init__(self, response):
+        self.response = response
+
+    def execute(self):
+        return self.response
+
+
+class FakeYouTube:
+    """Answers videos().list for any IDs; records each call's IDs."""
+
+    def __init__(self):
+        self.calls = []
+
+    def videos(self):
+        return self
+
+    def list(self, id, part, maxResults):
+        ids = id.split(",")
+        self.calls.append(ids)
+        return FakeRequest({"items": [{"id": v, "statistics": {"viewCount": "10"}} for v in ids]})
+
+
+@pytest.mark.unit
+class TestYouTubeAPI:
+    def test_chunked_dedupes_and_splits(self):
+        chunks = chunked([f"v{i}" for i in range(120)] + ["v0", "", None])
+
+        assert [len(c) for c in chunks] == [50, 50, 20]
+        assert chunks[0][0] == "v0"
+
+    async def test_videos_are_fetched_fifty_per_call(self, monkeypatch):
+        api = YouTubeAPI()
+        fake = FakeYouTube()
+        monkeypatch.setattr(api, "service", lambda *args, **kwargs: fake)
+
+        videos = await api.videos([f"v{i}" for i in range(120)], api_key="k")
+
+        assert len(videos) == 120
+        assert sorted(len(ids) for ids in fake.calls) == [20, 50, 50]
+        assert api.stats()["requests"] == 3
+
+    def test_clients_are_built_once_per_key(self, monkeypatch):
+        builds = []
+        monkeypatch.setattr("googleapiclient.discovery.build",
+                            lambda api, version, **kwargs: builds.append(kwargs["developerKey"]) or object())
+        api = YouTubeAPI()
+
+        first = api.service(api_key="a")
+        assert api.service(api_key="a") is first
+        api.service(api_key="b")
+
+        assert builds == ["a", "b"]
+
+
+@pytest.mark.unit
+class TestShortsScanner:
+    async def test_one_lookup_for_all_results(self, monkeypatch):
+        from services.discovery import youtube_scanner
+
+        ids = [f"vid{i}" for i in range(10)]
+        search = AsyncMock(return_value={"items": [{"id": {"videoId": v}} for v in ids]})
+        videos = AsyncMock(return_value={
+            v: {
+                "id": v,
+                "snippet": {"title": f"Title {v}", "channelTitle": "chan", "publishedAt": "2024-01-01T00:00:00Z"},
+                "statistics": {"viewCount": "1000", "likeCount": "50", "commentCount": "5"},
+                "contentDetails": {"duration": "PT45S"},
+            }
+            for v in ids if v != "vid3"  # vid3 was deleted between search and lookup
+        })
+        monkeypatch.setattr(youtube_scanner, "get_secret", lambda key: "test-key")
+        monkeypatch.setattr(youtube_scanner.youtube_api, "search", search)
+        monkeypatch.setattr(youtube_scanner.youtube_api, "videos", videos)
+
+        candidates = await youtube_scanner.YouTubeShortsScanner().scan_trends("AI")
+
+        videos.assert_awaited_once()
+        assert videos.await_args.args[0] == ids
+        assert [c.id for c in candidates] == [f"yt_{v}" for v in ids if v != "vid3"]
+        assert candidates[0].title == "Title vid0" and candidates[0].duration_seconds == 45.0
+
+
+@pytest.mark.unit
+class TestAnalyticsReports:
+    async def test_insights_are_generated_concurrently(self, monkeypatch):
+        import asyncio
+        from services.analytics.service import AnalyticsService
+        from services.optimization.auth import token_manager
+
+        ids = [f"v{i}" for i in range(5)]
+        monkeypatch.setattr(token_manager, "get_token_data", lambda platform: {"access_token": "t"})
+        monkeypatch.setattr("api.config.settings.GOOGLE_CLIENT_ID", "client")
+        monkeypatch.setattr("services.analytics.service.youtube_api.videos", AsyncMock(return_value={
+            v: {"id": v, "statistics": {"viewCount": "100", "likeCount": "10"}} for v in ids
+        }))
+        monkeypatch.setattr("services.analytics.service.youtube_api.execute", AsyncMock(return_value={
+            "rows": [[v, 100, 10, 3, 2, 120.0, 30.0] for v in ids]
+        }))
+
+        running, peak = 0, 0
+
+        async def insight(views, likes, shares, comments):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0)
+            running -= 1
+            return f"{views}/{comments}"
+
+        service = AnalyticsService()
+        monkeypatch.setattr(service, "_generate_ai_insight", insight)
+        reports = await service._fetch_reports(ids)
+
+        assert peak == len(ids)
+        assert [reports[v].optimization_insight for v in ids] == ["100/3"] * len(ids)
+        assert reports["v0"].comments == 3
+
+    async def test_only_uncached_reports_are_fetched_and_cached(self, monkeypatch):
+        from services.analytics.service import AnalyticsService
+
+        service = AnalyticsService()
+        service.report_cache.set("v0", service._empty_report("v0").model_dump(mode="json"))
+        fetch = AsyncMock(side_effect=lambda ids: {v: service._empty_report(v) for v in ids})
+        monkeypatch.setattr(service, "_fetch_reports", fetch)
+
+        reports = await service.get_performance_reports(["v0", "v1", "v1", "v2"])
+
+        fetch.assert_awaited_once_with(["v1", "v2"])
+        assert set(reports) == {"v0", "v1", "v2"}
+        assert service.report_cache.get("v2") is not None
@@ -0,0 +1,87 @@
+"""
+Tests for the YouTube Quota Ledger
+==================================
+Verifies per-priority ceilings, fast failure once the budget is spent,
+exhaustion on Google's quotaExceeded, and headroom reporting.
+"""
+
+import pytest
+
+from api.utils import cache
+from api.utils.youtube_api import YouTubeAPI
+from api.utils.youtube_quota import QuotaExceeded, YouTubeQuota
+
+
+@pytest.fixture
+def quota(monkeypatch):
+    monkeypatch.setattr(cache, "get_redis", lambda: None)
+    monkeypatch.setattr("api.utils.youtube_quota.get_redis", lambda: None)
+    monkeypatch.setattr("api.utils.youtube_quota.settings.YOUTUBE_QUOTA_PUBLISH_RESERVE", 1600)
+    monkeypatch.setattr("api.utils.youtube_quota.settings.YOUTUBE_QUOTA_ANALYTICS_RESERVE", 100)
+    ledger = YouTubeQuota(daily_limit=2000)
+    monkeypatch.setattr("api.utils.youtube_api.youtube_quota", ledger)
+    return ledger
+
+
+class QuotaError(Exception):
+    content = b'{"error": {"errors": [{"reason": "quotaExceeded"}]}}'
+
+
+class ExhaustedYouTube:
+    """search().list(...).execute() fails the way Google does when the quota is gone."""
+
+    def search(self):
+        return self
+
+    def list(self, **params):
+        return self
+
+    def execute(self):
+        raise QuotaError("403 quotaExceeded")
+
+
+@pytest.mark.unit
+class TestYouTubeQuota:
+    def test_publishing_keeps_its_reserve(self, quota):
+        # discovery may use 2000 - 1600 - 100 = 300 units: three searches
+        assert [quota.reserve(100, "discovery", "k") for _ in range(4)] == [True, True, True, False]
+        assert quota.reserve(100, "analytics", "k") is True
+        assert quota.reserve(1600, "publish", "k") is True
+        assert quota.reserve(1, "publish", "k") is False
+
+        headroom = quota.headroom("k")
+        assert headroom["used"] == 2000
+        assert headroom["by_priority"] == {"publish": 1600, "analytics": 100, "discovery": 300}
+        assert headroom["remaining"]["discovery"] == 0
+        assert quota.stats()["denied"]["discovery"] == 1
+
+    def test_accounts_are_tracked_separately(self, quota):
+        a, b = YouTubeQuota.account(api_key="key-a"), YouTubeQuota.account(api_key="key-b")
+        assert a != b and "key-a" not in a
+
+        for _ in range(3):
+            quota.reserve(100, "discovery", a)
+
+        assert quota.reserve(100, "discovery", b) is True
+
+    async def test_calls_past_the_budget_fail_fast(self, quota, monkeypatch):
+        api = YouTubeAPI()
+        monkeypatch.setattr(api, "service", lambda *args, **kwargs: pytest.fail("must not reach the API"))
+        account = YouTubeQuota.account(api_key="k")
+        for _ in range(3):
+            quota.reserve(100, "discovery", account)
+
+        with pytest.raises(QuotaExceeded):
+            await api.search(api_key="k", q="AI", part="id")
+        assert api.stats()["requests"] == 0
+
+    async def test_google_quota_error_exhausts_the_day(self, quota, monkeypatch):
+        api = YouTubeAPI()
+        monkeypatch.setattr(api, "service", lambda *args, **kwargs: ExhaustedYouTube())
+
+        with pytest.raises(QuotaError):
+            await api.search(api_key="k", q="AI", part="id")
+
+        account = YouTubeQuota.account(api_key="k")
+        assert quota.headroom(account)["remaining"] == {"publish": 0, "analytics": 0, "discovery": 0}
+        assert quota.reserve(1600, "publish", account) is False
@@ -0,0 +1,137 @@
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+# After a Redis failure, skip Redis for this many seconds instead of paying a
+# connection timeout on every cache call.
+REDIS_RETRY_AFTER = 30.0
+
+_redis_client = None
+_redis_down_until = 0.0
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    """
+    Returns a process-wide Redis client, or None while Redis is unreachable.
+    """
+    global _redis_client
+    if time.monotonic() < _redis_down_until:
+        return None
+    with _redis_lock:
+        if _redis_client is None:
+            import redis
+            redis_url = settings.REDIS_URL
+            # Inside docker 'localhost' is the container itself; the broker is 'redis'
+            if "//localhost" in redis_url:
+                redis_url = redis_url.replace("//localhost", "//redis")
+            _redis_client = redis.from_url(redis_url, socket_connect_timeout=1, socket_timeout=2)
+    return _redis_client
+
+
+def mark_redis_down(error: Exception):
+    """Backs off from Redis after a connection error."""
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+    logger.warning(f"[Cache] Redis unavailable, using local cache for {REDIS_RETRY_AFTER:.0f}s: {error}")
+
+
+class TwoTierCache:
+    """
+    JSON value cache: a bounded in-process LRU in front of Redis.
+
+    The local tier answers repeated lookups without a network hop and keeps
+    working as the fallback store when Redis is down.
+    """
+
+    def __init__(self, namespace: str, ttl: int, max_local: int = 512):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_local = max_local
+        self._local: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str, local: bool = True) -> Optional[Any]:
+        """
+        Cached value or None. `local=False` skips the in-process tier, e.g.
+        to see a value another process has just written to Redis.
+        """
+        full_key = self._key(key)
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(full_key)
+            if local and entry and entry[0] > now:
+                self._local.move_to_end(full_key)
+                self.hits += 1
+                return entry[1]
+            if entry and entry[0] <= now:
+                del self._local[full_key]
+
+        client = get_redis()
+        if client is not None:
+            try:
+                raw = client.get(full_key)
+                if raw is not None:
+                    value = json.loads(raw)
+                    ttl = client.ttl(full_key)
+                    self._remember(full_key, value, ttl if ttl and ttl > 0 else self.ttl)
+                    with self._lock:
+                        self.hits += 1
+                    return value
+            except Exception as e:
+                mark_redis_down(e)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        full_key = self._key(key)
+        ttl = ttl or self.ttl
+        self._remember(full_key, value, ttl)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.setex(full_key, ttl, json.dumps(value, default=str))
+            except Exception as e:
+                mark_redis_down(e)
+
+    def delete(self, key: str):
+        full_key = self._key(key)
+        with self._lock:
+            self._local.pop(full_key, None)
+        client = get_redis()
+        if client is not None:
+            try:
+                client.delete(full_key)
+            except Exception as e:
+                mark_redis_down(e)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "local_entries": len(self._local),
+        }
+
+    def _remember(self, full_key: str, value: Any, ttl: int):
+        with self._lock:
+            self._local[full_key] = (time.time() + ttl, value)
+            self._local.move_to_end(full_key)
+            while len(self._local) > self.max_local:
+                self._local.popitem(last=False)
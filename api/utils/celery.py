@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import celeryd_after_setup, worker_process_init, worker_process_shutdown
 import os
 
 from api.config import settings
@@ -38,3 +39,39 @@ celery_app.conf.update(
         },
     }
 )
+
+
+# Queues this worker consumes, captured in the parent before the pool forks
+_consumed_queues = []
+
+
+@celeryd_after_setup.connect
+def capture_worker_queues(sender, instance, **kwargs):
+    _consumed_queues[:] = list(instance.app.amqp.queues.consume_from.keys())
+
+
+@worker_process_init.connect
+def warm_models(**kwargs):
+    """Pre-loads MODEL_WARMUP models in each pool process of designated queues."""
+    from api.utils.model_registry import warmup_models_for_queues
+    warmup_models_for_queues(_consumed_queues or [celery_app.conf.task_default_queue])
+
+
+@worker_process_init.connect
+def reset_http_clients(**kwargs):
+    """Forked pool processes must not reuse the parent's pooled connections."""
+    from api.utils.http_client import http_clients
+    http_clients.reset()
+
+
+@worker_process_shutdown.connect
+def close_http_clients(**kwargs):
+    """Closes the pooled clients living on this process's task loop."""
+    import asyncio
+    from api.utils.http_client import http_clients
+    try:
+        loop = asyncio.get_event_loop()
+        if not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(http_clients.aclose())
+    except Exception:
+        pass
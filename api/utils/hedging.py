@@ -0,0 +1,107 @@
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """
+    Rolling window of successful call latencies per tier, used to decide how
+    long to wait on a tier before hedging to the next one.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 5):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(tier, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, tier: str, q: float) -> Optional[float]:
+        """q-th percentile (0-100) of recent latencies, None until min_samples are seen."""
+        with self._lock:
+            samples = sorted(self._samples.get(tier, ()))
+        if len(samples) < self.min_samples:
+            return None
+        rank = min(len(samples) - 1, max(0, int(round(q / 100.0 * (len(samples) - 1)))))
+        return samples[rank]
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            tiers = {name: list(values) for name, values in self._samples.items()}
+        return {
+            name: {"samples": len(values), "p50": self.percentile(name, 50), "p95": self.percentile(name, 95)}
+            for name, values in tiers.items()
+        }
+
+
+Tier = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+async def hedged_call(
+    tiers: List[Tier],
+    tracker: LatencyTracker,
+    percentile: float = 95.0,
+    default_delay: float = 5.0,
+    is_valid: Callable[[Any], bool] = bool,
+) -> Tuple[Optional[str], Any]:
+    """
+    Runs fallback tiers in priority order with hedging.
+
+    Each tier gets a head start equal to its tracked latency percentile (or
+    `default_delay` while it has too few samples). If it has not produced a
+    valid result by then, the next tier starts alongside it; a tier that
+    fails or returns an invalid result releases the next one immediately.
+    The first valid result wins and every other in-flight tier is cancelled.
+
+    Returns (tier_name, result), or (None, None) when every tier fails.
+    """
+    pending: Dict[asyncio.Task, Tuple[str, float]] = {}
+    remaining = list(tiers)
+
+    def launch_next() -> Optional[float]:
+        name, factory = remaining.pop(0)
+        task = asyncio.ensure_future(factory())
+        pending[task] = (name, time.perf_counter())
+        delay = tracker.percentile(name, percentile)
+        return default_delay if delay is None else delay
+
+    hedge_delay = launch_next() if remaining else None
+    try:
+        while pending:
+            timeout = hedge_delay if remaining else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                name = remaining[0][0]
+                logger.info(f"[Hedge] No answer after {hedge_delay:.2f}s, hedging to '{name}'")
+                hedge_delay = launch_next()
+                continue
+
+            for task in done:
+                name, started = pending.pop(task)
+                try:
+                    result = task.result()
+                except Exception as e:
+                    logger.warning(f"[Hedge] Tier '{name}' failed: {e}")
+                    continue
+                if is_valid(result):
+                    tracker.record(name, time.perf_counter() - started)
+                    return name, result
+
+            # Every finished tier came back empty: release the next one now
+            if remaining:
+                hedge_delay = launch_next()
+        return None, None
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import threading
+import weakref
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  (enables httpx's HTTP/2 support)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower() if parts.netloc else ""
+
+
+class HTTPClientRegistry:
+    """
+    Process-wide pooled HTTP clients, so outbound calls keep TLS sessions and
+    keep-alive connections instead of handshaking on every request.
+
+    `client(url)` returns an httpx.AsyncClient per origin (its pool size is
+    the per-host connection limit; HTTP/2 when `h2` is installed) and
+    `session()` one shared aiohttp.ClientSession with a per-host connector
+    limit. Both are tied to the event loop that created them: Celery tasks
+    run on the worker's persistent loop and share one set, while a client
+    whose loop has closed is dropped and rebuilt on the next call.
+
+    Callers must not close the clients they get; lifecycle is handled by
+    `aclose()` (FastAPI shutdown) and `reset()` (Celery worker_process_init).
+    """
+
+    def __init__(self):
+        self._clients: Dict[Tuple[int, str], Tuple[weakref.ref, httpx.AsyncClient]] = {}
+        self._sessions: Dict[int, Tuple[weakref.ref, object]] = {}
+        self._lock = threading.Lock()
+        self.created = 0
+
+    def _prune(self):
+        """Forgets clients of closed or collected loops (their sockets go with them)."""
+        for registry in (self._clients, self._sessions):
+            for key, (loop_ref, _) in list(registry.items()):
+                loop = loop_ref()
+                if loop is None or loop.is_closed():
+                    del registry[key]
+
+    def client(self, url: str = "") -> httpx.AsyncClient:
+        """Pooled httpx client for the origin of `url` on the running loop."""
+        loop = asyncio.get_running_loop()
+        key = (id(loop), _origin(url))
+        with self._lock:
+            self._prune()
+            entry = self._clients.get(key)
+            if entry and entry[0]() is loop and not entry[1].is_closed:
+                return entry[1]
+            client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE and settings.HTTP_ENABLE_HTTP2,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                    max_keepalive_connections=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                    keepalive_expiry=settings.HTTP_KEEPALIVE_SECONDS,
+                ),
+                timeout=httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT),
+            )
+            self._clients[key] = (weakref.ref(loop), client)
+            self.created += 1
+            return client
+
+    def session(self):
+        """Shared aiohttp session on the running loop."""
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._prune()
+            entry = self._sessions.get(id(loop))
+            if entry and entry[0]() is loop and not entry[1].closed:
+                return entry[1]
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=settings.HTTP_MAX_CONNECTIONS,
+                    limit_per_host=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+                    keepalive_timeout=settings.HTTP_KEEPALIVE_SECONDS,
+                    ttl_dns_cache=300,
+                ),
+                timeout=aiohttp.ClientTimeout(
+                    total=settings.HTTP_TIMEOUT, sock_connect=settings.HTTP_CONNECT_TIMEOUT
+                ),
+            )
+            self._sessions[id(loop)] = (weakref.ref(loop), session)
+            self.created += 1
+            return session
+
+    async def aclose(self):
+        """Closes every client created on the running loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = [(k, c) for k, (ref, c) in self._clients.items() if ref() is loop]
+            sessions = [(k, s) for k, (ref, s) in self._sessions.items() if ref() is loop]
+            for key, _ in clients:
+                del self._clients[key]
+            for key, _ in sessions:
+                del self._sessions[key]
+        for _, client in clients:
+            await client.aclose()
+        for _, session in sessions:
+            await session.close()
+        if clients or sessions:
+            logger.info(f"[HTTPClients] Closed {len(clients)} httpx client(s) and {len(sessions)} aiohttp session(s)")
+
+    def reset(self):
+        """
+        Forgets all clients without closing them. For forked pool processes:
+        inherited connections belong to the parent and must not be reused.
+        """
+        with self._lock:
+            self._clients.clear()
+            self._sessions.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._prune()
+            return {
+                "httpx_clients": len(self._clients),
+                "aiohttp_sessions": len(self._sessions),
+                "created": self.created,
+                "http2": HTTP2_AVAILABLE and settings.HTTP_ENABLE_HTTP2,
+            }
+
+
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,123 @@
+import os
+import asyncio
+import hashlib
+import logging
+from typing import Dict, Optional
+
+import httpx
+
+from api.config import settings
+from api.utils.http_client import http_clients
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+# Bounds each read, not the whole transfer: large files may take minutes
+STREAM_TIMEOUT = httpx.Timeout(30.0, read=60.0)
+
+
+class DownloadError(Exception):
+    """A streamed download failed for good (HTTP error, limit, checksum, retries)."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def _range_start_and_total(content_range: Optional[str]):
+    """Parses `bytes <start>-<end>/<total>` (total may be `*`)."""
+    try:
+        unit, _, spec = content_range.partition(" ")
+        span, _, total = spec.partition("/")
+        start = int(span.split("-")[0])
+        return start, (int(total) if total and total != "*" else None)
+    except (AttributeError, ValueError):
+        return None, None
+
+
+async def stream_download(
+    url: str,
+    dest_path: str,
+    *,
+    max_bytes: Optional[int] = None,
+    sha256: Optional[str] = None,
+    retries: Optional[int] = None,
+    headers: Optional[Dict[str, str]] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> str:
+    """
+    Streams `url` to `dest_path` in chunks, never holding the body in memory.
+
+    A dropped connection is resumed with an HTTP Range request (guarded by
+    If-Range on the ETag/Last-Modified, so a changed resource restarts from
+    zero instead of being spliced). The body is bounded by `max_bytes`, its
+    length is checked against Content-Length, and, when given, its SHA-256
+    against `sha256`. Returns the SHA-256 hex digest of the file. On failure
+    the partial file is removed and DownloadError is raised.
+    """
+    max_bytes = settings.STREAM_DOWNLOAD_MAX_BYTES if max_bytes is None else max_bytes
+    retries = settings.STREAM_DOWNLOAD_RETRIES if retries is None else retries
+    client = client or http_clients.client(url)
+
+    digest = hashlib.sha256()
+    written, total, validator, failures = 0, None, None, 0
+    try:
+        with open(dest_path, "wb") as f:
+            while True:
+                # Identity encoding: Range offsets and Content-Length then count file bytes
+                request_headers = {"Accept-Encoding": "identity", **(headers or {})}
+                if written:
+                    request_headers["Range"] = f"bytes={written}-"
+                    if validator:
+                        request_headers["If-Range"] = validator
+                try:
+                    async with client.stream("GET", url, headers=request_headers, follow_redirects=True,
+                                             timeout=STREAM_TIMEOUT) as resp:
+                        if resp.status_code == 206 and written:
+                            start, range_total = _range_start_and_total(resp.headers.get("content-range"))
+                            if start != written:
+                                raise DownloadError(f"Server resumed {url} at byte {start}, expected {written}")
+                            total = range_total or total
+                        elif resp.status_code == 200:
+                            if written:
+                                # Range ignored or resource changed: start over
+                                logger.info(f"[Download] {url} restarted from byte 0")
+                                f.seek(0)
+                                f.truncate()
+                                written, digest = 0, hashlib.sha256()
+                            length = resp.headers.get("content-length")
+                            total = int(length) if length else None
+                            validator = resp.headers.get("etag") or resp.headers.get("last-modified")
+                        else:
+                            raise DownloadError(f"HTTP {resp.status_code} for {url}", status=resp.status_code)
+
+                        if total is not None and total > max_bytes:
+                            raise DownloadError(f"{url} is {total} bytes, limit is {max_bytes}")
+
+                        async for chunk in resp.aiter_raw(chunk_size):
+                            written += len(chunk)
+                            if written > max_bytes:
+                                raise DownloadError(f"{url} exceeded the {max_bytes} byte limit")
+                            f.write(chunk)
+                            digest.update(chunk)
+
+                    if total is not None and written < total:
+                        raise httpx.RemoteProtocolError(f"stream ended at {written}/{total} bytes")
+                    break
+                except httpx.TransportError as e:
+                    failures += 1
+                    if failures > retries:
+                        raise DownloadError(f"{url} failed after {retries} retries at byte {written}: {e}")
+                    logger.warning(f"[Download] {url} interrupted at byte {written} ({e}), resuming")
+                    await asyncio.sleep(min(2 ** (failures - 1) * 0.5, 8.0))
+
+        if total is not None and written != total:
+            raise DownloadError(f"{url} size mismatch: got {written}, expected {total}")
+        if sha256 and digest.hexdigest() != sha256.lower():
+            raise DownloadError(f"{url} checksum mismatch")
+        return digest.hexdigest()
+    except BaseException:
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
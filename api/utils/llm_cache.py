@@ -0,0 +1,88 @@
+import re
+import json
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from api.config import settings
+from api.utils.cache import TwoTierCache
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_inputs(value: Any) -> Any:
+    """
+    Canonical form of task inputs for keying: strings are stripped with runs
+    of whitespace collapsed, dicts are key-sorted (by json.dumps), and
+    tuples become lists. Case is kept: it changes what the model writes.
+    """
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip()
+    if isinstance(value, dict):
+        return {str(k): normalize_inputs(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize_inputs(v) for v in value]
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+
+class LLMMemo:
+    """
+    Memoizes deterministic LLM tasks (hook scoring, translations, metadata
+    packages, strategies, product matching) across jobs and retries.
+
+    Entries are keyed by task name, prompt template version, normalized
+    inputs and model, so editing a prompt (bump its version) or switching
+    models never serves stale answers. Only successful, valid results are
+    stored; a failed call raises through and is retried next time.
+    """
+
+    def __init__(self, ttl: Optional[int] = None):
+        self.cache = TwoTierCache("llm", ttl=ttl or settings.LLM_CACHE_TTL)
+
+    @staticmethod
+    def key(task: str, version: str, inputs: Any, model: str) -> str:
+        canonical = json.dumps(
+            {"task": task, "version": version, "model": model, "inputs": normalize_inputs(inputs)},
+            sort_keys=True, default=str,
+        )
+        return f"{task}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+    async def get_or_call(
+        self,
+        task: str,
+        version: str,
+        inputs: Any,
+        model: str,
+        call: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        bypass: bool = False,
+        is_valid: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """
+        Cached result of `call()` for this task/version/inputs/model.
+        `bypass` skips the lookup (the fresh result still refreshes the cache).
+        """
+        if not settings.LLM_CACHE_ENABLED:
+            return await call()
+
+        key = self.key(task, version, inputs, model)
+        if not bypass:
+            cached = self.cache.get(key)
+            if cached is not None:
+                logger.debug(f"[LLMMemo] Hit for {task}")
+                return cached
+
+        result = await call()
+        if is_valid(result):
+            self.cache.set(key, result, ttl=ttl)
+        return result
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+llm_memo = LLMMemo()
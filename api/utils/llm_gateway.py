@@ -0,0 +1,255 @@
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+from api.config import settings
+from api.utils.hedging import LatencyTracker
+from api.utils.http_client import http_clients
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """An LLM call failed for good (no key, non-retryable error, retries exhausted)."""
+
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens per second up to `capacity`.
+
+    `acquire` reserves its tokens immediately (the balance may go negative)
+    and sleeps for the deficit, so concurrent callers queue fairly without a
+    loop-bound asyncio.Lock. `pause` empties the bucket for a while, e.g.
+    when the provider answers 429 with Retry-After.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Waits until `amount` tokens are available; returns seconds waited."""
+        wait = self._reserve(amount)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float):
+        with self._lock:
+            self._tokens = min(self._tokens, -seconds * self.rate)
+            self._updated = time.monotonic()
+
+
+class LLMGateway:
+    """
+    Single async entry point for chat completions (Groq, OpenAI-compatible).
+
+    - Routing: callers name a route ("small" for cheap classification and
+      expansion work, "large" for screenplays, strategy and copy) rather
+      than a model, so models are swapped in one place.
+    - Rate limiting: per-model request and token buckets (RPM / TPM), shared
+      by every caller in the process.
+    - Backoff: 429 and 5xx responses are retried with exponential backoff
+      and jitter; a 429's Retry-After also pauses the model's bucket so
+      other callers back off too.
+    - Coalescing: identical prompts already in flight share one request.
+    - Metrics: per-model calls, errors, 429s, coalesced calls, token usage
+      and latency percentiles (see `metrics()`, exposed on /health).
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url or settings.LLM_API_URL
+        self.routes = {"small": settings.LLM_SMALL_MODEL, "large": settings.LLM_LARGE_MODEL}
+        self._request_buckets: Dict[str, TokenBucket] = {}
+        self._token_buckets: Dict[str, TokenBucket] = {}
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.latency = LatencyTracker(window=500)
+
+    # --- configuration ----------------------------------------------------
+
+    def _api_key(self) -> str:
+        from api.utils.vault import get_secret
+        key = get_secret("groq_api_key") or settings.GROQ_API_KEY
+        if not key or key == "your_key_here":
+            raise LLMError("GROQ_API_KEY is not configured")
+        return key
+
+    def model_for(self, route: str) -> str:
+        if route not in self.routes:
+            raise ValueError(f"Unknown LLM route '{route}', expected one of {sorted(self.routes)}")
+        return self.routes[route]
+
+    def _buckets(self, model: str):
+        with self._lock:
+            if model not in self._request_buckets:
+                rpm, tpm = settings.LLM_RPM_LIMIT, settings.LLM_TPM_LIMIT
+                self._request_buckets[model] = TokenBucket(rpm / 60.0, max(1.0, rpm / 10.0))
+                self._token_buckets[model] = TokenBucket(tpm / 60.0, tpm / 4.0)
+            return self._request_buckets[model], self._token_buckets[model]
+
+    def _stat(self, model: str, field: str, amount: float = 1):
+        with self._lock:
+            stats = self._stats.setdefault(model, {
+                "calls": 0, "errors": 0, "rate_limited": 0, "coalesced": 0,
+                "prompt_tokens": 0, "completion_tokens": 0, "wait_seconds": 0.0,
+            })
+            stats[field] += amount
+
+    # --- calls ------------------------------------------------------------
+
+    async def complete(
+        self,
+        prompt: Optional[str] = None,
+        *,
+        messages: Optional[List[Dict[str, str]]] = None,
+        system: Optional[str] = None,
+        route: str = "large",
+        model: Optional[str] = None,
+        json_mode: bool = False,
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """Returns the completion text. Raises LLMError on failure."""
+        model = model or self.model_for(route)
+        if messages is None:
+            messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        payload: Dict[str, Any] = {"model": model, "messages": messages}
+        if json_mode:
+            payload["response_format"] = {"type": "json_object"}
+        if temperature is not None:
+            payload["temperature"] = temperature
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+
+        body = json.dumps(payload, sort_keys=True)
+        loop = asyncio.get_running_loop()
+        key = (id(loop), hashlib.sha256(body.encode()).hexdigest())
+        with self._lock:
+            task = self._inflight.get(key)
+            owner = task is None
+            if owner:
+                # Its own task: a cancelled caller (client disconnect, timeout)
+                # neither aborts the call nor fails the callers coalesced onto it
+                task = loop.create_task(self._send(model, payload, len(body), timeout or settings.LLM_TIMEOUT))
+                self._inflight[key] = task
+        if owner:
+            task.add_done_callback(lambda done: self._request_done(key, done))
+        else:
+            self._stat(model, "coalesced")
+        return await asyncio.shield(task)
+
+    def _request_done(self, key: tuple, task: asyncio.Task):
+        with self._lock:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+        # Mark retrieved so a request whose callers all went away does not warn
+        if not task.cancelled():
+            task.exception()
+
+    async def complete_json(self, prompt: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        """Completion in JSON mode, parsed. Raises LLMError on invalid JSON."""
+        content = await self.complete(prompt, json_mode=True, **kwargs)
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError as e:
+            raise LLMError(f"Model returned invalid JSON: {e}")
+
+    async def _send(self, model: str, payload: Dict, body_chars: int, timeout: float) -> str:
+        requests, tokens = self._buckets(model)
+        # ~4 characters per token, plus the completion budget
+        estimate = body_chars / 4 + (payload.get("max_tokens") or 512)
+        headers = {"Authorization": f"Bearer {self._api_key()}"}
+        client = http_clients.client(self.url)
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            waited = await requests.acquire() + await tokens.acquire(estimate)
+            self._stat(model, "wait_seconds", waited)
+            self._stat(model, "calls")
+            started = time.perf_counter()
+            try:
+                resp = await client.post(self.url, json=payload, headers=headers, timeout=timeout)
+            except httpx.TransportError as e:
+                self._stat(model, "errors")
+                delay = self._backoff(attempt)
+                logger.warning(f"[LLMGateway] {model} transport error ({e}), retrying in {delay:.1f}s")
+                if attempt < settings.LLM_MAX_RETRIES:
+                    await asyncio.sleep(delay)
+                continue
+
+            if resp.status_code == 200:
+                self.latency.record(model, time.perf_counter() - started)
+                data = resp.json()
+                usage = data.get("usage") or {}
+                self._stat(model, "prompt_tokens", usage.get("prompt_tokens", 0))
+                self._stat(model, "completion_tokens", usage.get("completion_tokens", 0))
+                return data["choices"][0]["message"]["content"]
+
+            self._stat(model, "errors")
+            if resp.status_code not in RETRYABLE_STATUS:
+                raise LLMError(f"{model} returned HTTP {resp.status_code}: {resp.text[:200]}")
+
+            delay = self._backoff(attempt)
+            if resp.status_code == 429:
+                self._stat(model, "rate_limited")
+                retry_after = self._retry_after(resp)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                # Everyone else waiting on this model backs off too
+                requests.pause(delay)
+            logger.warning(f"[LLMGateway] {model} returned {resp.status_code}, retrying in {delay:.1f}s")
+            if attempt < settings.LLM_MAX_RETRIES and resp.status_code != 429:
+                await asyncio.sleep(delay)
+
+        raise LLMError(f"{model} failed after {settings.LLM_MAX_RETRIES} retries")
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(settings.LLM_BACKOFF_MAX, settings.LLM_BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    @staticmethod
+    def _retry_after(resp: httpx.Response) -> Optional[float]:
+        for header in ("retry-after", "x-ratelimit-reset-requests"):
+            value = resp.headers.get(header)
+            if value:
+                try:
+                    return float(value.rstrip("s"))
+                except ValueError:
+                    continue
+        return None
+
+    # --- metrics ----------------------------------------------------------
+
+    def metrics(self) -> Dict[str, Dict]:
+        with self._lock:
+            stats = {model: dict(values) for model, values in self._stats.items()}
+        latency = self.latency.snapshot()
+        for model, values in stats.items():
+            values["wait_seconds"] = round(values["wait_seconds"], 3)
+            values["latency"] = latency.get(model, {})
+        return {"routes": dict(self.routes), "models": stats}
+
+
+llm_gateway = LLMGateway()
@@ -0,0 +1,126 @@
+import os
+import time
+import logging
+import importlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Union
+
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def process_rss_bytes() -> int:
+    """Current resident set size of this process (0 where it cannot be read)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak rather than current RSS, but still a usable upper bound (KB on Linux)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except Exception:
+        return 0
+
+
+class ModelRegistry:
+    """
+    Process-wide registry of heavy models and clients, loaded on first use.
+
+    Importing a service no longer pays the model load: the API process and
+    workers that never run OCR or transcription never load EasyOCR or
+    Whisper. Each load records its duration and the RSS it added.
+
+    Loaders may be callables or "module:attribute" paths; paths are imported
+    only when the model is first requested.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Union[str, Callable[[], Any]]] = {}
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def register(self, name: str, loader: Union[str, Callable[[], Any]]):
+        with self._guard:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def get(self, name: str) -> Any:
+        """
+        Returns the model, loading it (once per process) on first use. Failed
+        loads raise and are not cached, so a later call retries.
+        """
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model '{name}'")
+
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+            rss_before = process_rss_bytes()
+            started = time.perf_counter()
+            loader = self._loaders[name]
+            if isinstance(loader, str):
+                module_name, _, attr = loader.partition(":")
+                loader = getattr(importlib.import_module(module_name), attr)
+            model = loader()
+            if model is None:
+                # Not cached: the next get() tries the load again
+                raise RuntimeError(f"Loader for '{name}' returned no model")
+            self._stats[name] = {
+                "load_seconds": round(time.perf_counter() - started, 3),
+                "rss_mb": round(max(0, process_rss_bytes() - rss_before) / 2**20, 1),
+            }
+            self._models[name] = model
+            logger.info(
+                f"[ModelRegistry] Loaded '{name}' in {self._stats[name]['load_seconds']}s "
+                f"(+{self._stats[name]['rss_mb']} MB RSS)"
+            )
+            return model
+
+    def warm(self, names: Iterable[str]):
+        """Loads the named models now; failures are logged, never raised."""
+        for name in names:
+            try:
+                self.get(name)
+            except Exception as e:
+                logger.error(f"[ModelRegistry] Warm-up of '{name}' failed: {e}")
+
+    def unload(self, name: str):
+        with self._guard:
+            self._models.pop(name, None)
+            self._stats.pop(name, None)
+
+    def report(self) -> Dict:
+        """Per-model load state, load time and resident memory, plus process RSS."""
+        models = {}
+        for name in sorted(self._loaders):
+            models[name] = {"loaded": name in self._models, **self._stats.get(name, {})}
+        return {"process_rss_mb": round(process_rss_bytes() / 2**20, 1), "models": models}
+
+
+def warmup_models_for_queues(queues: Iterable[str]):
+    """
+    Warms MODEL_WARMUP models when this worker consumes one of
+    MODEL_WARMUP_QUEUES (called from Celery's worker_process_init).
+    """
+    wanted = {q.strip() for q in settings.MODEL_WARMUP_QUEUES.split(",") if q.strip()}
+    models = [m.strip() for m in settings.MODEL_WARMUP.split(",") if m.strip()]
+    if not models or not wanted.intersection(queues):
+        return
+    logger.info(f"[ModelRegistry] Warming {models} for queues {sorted(wanted.intersection(queues))}")
+    model_registry.warm(models)
+
+
+model_registry = ModelRegistry()
+model_registry.register("easyocr", "services.video_engine.ocr_service:load_easyocr_reader")
+model_registry.register("whisper", "api.utils.os_worker:load_whisper_model")
+model_registry.register("vlm", "services.video_engine.vlm_service:VLMService")
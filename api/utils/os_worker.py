@@ -1,47 +1,139 @@
 import os
-import httpx
-from faster_whisper import WhisperModel
 import asyncio
+import hashlib
+import subprocess
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+from api.config import settings
+from api.utils.cache import TwoTierCache
+from api.utils.llm_gateway import llm_gateway
+from api.utils.model_registry import model_registry
+
+SAMPLE_RATE = 16000
+
+transcript_cache = TwoTierCache("transcript", ttl=settings.TRANSCRIPT_CACHE_TTL)
+
+
+def transcribe_workers() -> int:
+    """Parallel chunk transcriptions per process (capped: each one holds decoder state)."""
+    return settings.TRANSCRIBE_WORKERS or max(1, min(4, os.cpu_count() or 1))
+
+
+def load_whisper_model():
+    """
+    Registry loader for the local faster-whisper model. CTranslate2 gets one
+    worker per parallel chunk and splits the cores between them, so the
+    workers do not oversubscribe the CPU.
+    """
+    from faster_whisper import WhisperModel
+    workers = transcribe_workers()
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"[OS-Worker] Loading Whisper ({settings.WHISPER_MODEL_SIZE}, {workers} workers x {threads} threads)...")
+    return WhisperModel(
+        settings.WHISPER_MODEL_SIZE, device="cpu", compute_type="int8",
+        cpu_threads=threads, num_workers=workers
+    )
+
+
+def extract_pcm(media_path: str) -> np.ndarray:
+    """Decodes the audio track to 16 kHz mono float32 through an ffmpeg pipe."""
+    ffmpeg = os.getenv("FFMPEG_BINARY", "ffmpeg")
+    result = subprocess.run(
+        [ffmpeg, "-v", "error", "-nostdin", "-i", media_path, "-vn",
+         "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"],
+        capture_output=True, timeout=600
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Audio extraction failed: {result.stderr.decode(errors='ignore')[-300:]}")
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def speech_chunks(audio: np.ndarray, max_seconds: float) -> List[Tuple[int, int]]:
+    """
+    (start, end) sample ranges to transcribe independently. Voice-activity
+    regions are packed into chunks of up to max_seconds, so every cut falls
+    in silence and no word is split between two chunks.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    regions = get_speech_timestamps(
+        audio, VadOptions(max_speech_duration_s=max_seconds, min_silence_duration_ms=500)
+    )
+    limit = int(max_seconds * SAMPLE_RATE)
+    chunks: List[Tuple[int, int]] = []
+    for region in regions:
+        if chunks and region["end"] - chunks[-1][0] <= limit:
+            chunks[-1] = (chunks[-1][0], region["end"])
+        else:
+            chunks.append((region["start"], region["end"]))
+    return chunks
+
 
 class AIWorker:
     def __init__(self):
         # Groq API Configuration
-        self.groq_url = "https://api.groq.com/openai/v1/chat/completions"
         self.groq_api_key = os.getenv("GROQ_API_KEY")
-        # Local Whisper Configuration
-        self.whisper_model_size = "base"
-        self.whisper_model = None 
+
+    @property
+    def whisper_model(self):
+        # Shared per process via the model registry; loaded on first transcription
+        return model_registry.get("whisper")
 
     async def transcribe(self, audio_path: str):
-        """Transcribes audio using fast-whisper locally."""
-        if not self.whisper_model:
-            print(f"[OS-Worker] Loading Whisper ({self.whisper_model_size})...")
-            self.whisper_model = WhisperModel(self.whisper_model_size, device="cpu", compute_type="int8")
-            
-        segments, info = self.whisper_model.transcribe(audio_path, beam_size=5)
-        
-        words = []
-        for segment in segments:
-            words.append({"text": segment.text, "start": segment.start, "end": segment.end})
+        """
+        Transcribes audio using fast-whisper locally: voice-activity chunks
+        are transcribed in parallel and merged back onto one timeline.
+        Transcripts are cached by a hash of the decoded audio.
+        """
+        audio = await asyncio.to_thread(extract_pcm, audio_path)
+        cache_key = f"{settings.WHISPER_MODEL_SIZE}:{settings.WHISPER_BEAM_SIZE}:{hashlib.sha256(audio.tobytes()).hexdigest()}"
+        cached = transcript_cache.get(cache_key)
+        if cached is not None:
+            print(f"[OS-Worker] Transcript cache hit for {audio_path}")
+            return cached
+
+        words = await asyncio.to_thread(self._transcribe_chunks, audio)
+        transcript_cache.set(cache_key, words)
         return words
 
+    def _transcribe_chunks(self, audio: np.ndarray) -> List[dict]:
+        chunks = speech_chunks(audio, settings.TRANSCRIBE_CHUNK_SECONDS)
+        if not chunks:
+            return []
+        model = self.whisper_model
+
+        def run(chunk):
+            start, end = chunk
+            offset = start / SAMPLE_RATE
+            segments, info = model.transcribe(
+                audio[start:end], beam_size=settings.WHISPER_BEAM_SIZE,
+                word_timestamps=True, condition_on_previous_text=False
+            )
+            return [
+                {
+                    "text": segment.text,
+                    "start": segment.start + offset,
+                    "end": segment.end + offset,
+                    "words": [
+                        {"text": w.word, "start": w.start + offset, "end": w.end + offset}
+                        for w in (segment.words or [])
+                    ],
+                }
+                for segment in segments
+            ]
+
+        # Chunks come back in submission order, so the merged timeline stays sorted
+        with ThreadPoolExecutor(max_workers=min(transcribe_workers(), len(chunks))) as pool:
+            return [segment for result in pool.map(run, chunks) for segment in result]
+
     async def analyze_viral_pattern(self, prompt: str):
         """Analyze content using Groq's high-speed Llama-3."""
         if not self.groq_api_key:
             return "Groq Error: Missing GROQ_API_KEY"
 
-        async with httpx.AsyncClient() as client:
-            payload = {
-                "model": "llama-3.3-70b-versatile",
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.5
-            }
-            try:
-                headers = {"Authorization": f"Bearer {self.groq_api_key}"}
-                resp = await client.post(self.groq_url, json=payload, headers=headers, timeout=20.0)
-                json_data = resp.json()
-                return json_data["choices"][0]["message"]["content"]
-            except Exception as e:
-                return f"Groq API Error: {str(e)}"
+        try:
+            return await llm_gateway.complete(prompt, route="large", temperature=0.5, timeout=20.0)
+        except Exception as e:
+            return f"Groq API Error: {str(e)}"
 
 ai_worker = AIWorker()
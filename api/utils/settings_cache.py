@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from api.config import settings
+from api.utils.cache import REDIS_RETRY_AFTER, get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+_TRUE = {"1", "true", "yes", "on"}
+
+
+class SettingsCache:
+    """
+    Short-TTL, in-process cache of the SystemSettings table and per-user
+    UserSetting overrides, read by `vault.get_secret` and the hot-path
+    settings lookups (monetization mode, auto-pilot, strategy, wallets,
+    Shopify credentials...).
+
+    A miss loads the whole scope (all system keys, or all of one user's
+    overrides) in a single query, so a job touching a dozen keys pays at most
+    one round-trip per TTL instead of one per key. Writers call
+    `invalidate()`, which drops the local copy and publishes on a Redis
+    channel; every process listens on that channel and drops its copy too.
+    The TTL bounds staleness if a message is missed (e.g. Redis down).
+    """
+
+    SYSTEM = None  # scope key of the system-wide settings
+    MAX_USER_SCOPES = 1024
+
+    def __init__(self, ttl: Optional[float] = None, channel: Optional[str] = None):
+        self.ttl = settings.SETTINGS_CACHE_TTL if ttl is None else ttl
+        self.channel = channel or settings.SETTINGS_CACHE_CHANNEL
+        self._scopes: "OrderedDict[Optional[int], tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._listener_pid: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    # --- reads ------------------------------------------------------------
+
+    def get(self, key: str, default=None, user_id: Optional[int] = None) -> Optional[str]:
+        """
+        Value of a setting: the user's override first (when `user_id` is
+        given), then the system-wide value. Empty values count as unset.
+        """
+        key = key.lower()
+        if user_id:
+            value = self._scope(user_id).get(key)
+            if value:
+                return value
+        value = self._scope(self.SYSTEM).get(key)
+        return value if value else default
+
+    def get_bool(self, key: str, default: bool = False, user_id: Optional[int] = None) -> bool:
+        value = self.get(key, user_id=user_id)
+        return default if value is None else value.strip().lower() in _TRUE
+
+    def get_int(self, key: str, default: int = 0, user_id: Optional[int] = None) -> int:
+        value = self.get(key, user_id=user_id)
+        try:
+            return int(value) if value is not None else default
+        except ValueError:
+            logger.warning(f"[SettingsCache] '{key}' is not an integer: {value!r}")
+            return default
+
+    def _scope(self, user_id: Optional[int]) -> Dict[str, str]:
+        self._ensure_listener()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._scopes.get(user_id)
+            if entry and entry[0] > now:
+                self._scopes.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        values = self._load(user_id)
+        with self._lock:
+            self._scopes[user_id] = (now + self.ttl, values)
+            self._scopes.move_to_end(user_id)
+            while len(self._scopes) > self.MAX_USER_SCOPES + 1:
+                oldest = next(k for k in self._scopes if k is not self.SYSTEM)
+                del self._scopes[oldest]
+        return values
+
+    @staticmethod
+    def _load(user_id: Optional[int]) -> Dict[str, str]:
+        from api.utils.database import SessionLocal
+        from api.utils.models import SystemSettings, UserSetting
+
+        db = SessionLocal()
+        try:
+            if user_id is None:
+                rows = db.query(SystemSettings.key, SystemSettings.value).all()
+            else:
+                rows = db.query(UserSetting.key, UserSetting.value).filter(UserSetting.user_id == user_id).all()
+            return {key: value for key, value in rows}
+        finally:
+            db.close()
+
+    # --- invalidation -----------------------------------------------------
+
+    def invalidate(self, user_id: Optional[int] = None, publish: bool = True):
+        """
+        Drops the cached system settings (or one user's overrides) here and,
+        with `publish`, in every other API/worker process.
+        """
+        self._drop(user_id)
+        if not publish:
+            return
+        client = get_redis()
+        if client is not None:
+            try:
+                client.publish(self.channel, json.dumps({"user_id": user_id}))
+            except Exception as e:
+                mark_redis_down(e)
+
+    def _drop(self, user_id: Optional[int]):
+        with self._lock:
+            self._scopes.pop(user_id, None)
+            self.invalidations += 1
+
+    def _on_message(self, data):
+        try:
+            user_id = json.loads(data).get("user_id")
+        except (TypeError, ValueError, AttributeError):
+            user_id = self.SYSTEM
+        self._drop(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+
+    def _ensure_listener(self):
+        # One subscriber thread per process; threads do not survive a fork
+        # (Celery prefork), so a child starts its own on first use.
+        pid = os.getpid()
+        if self._listener_pid == pid:
+            return
+        with self._lock:
+            if self._listener_pid == pid:
+                return
+            self._listener_pid = pid
+            # Anything inherited from the parent may predate a missed message
+            self._scopes.clear()
+        threading.Thread(target=self._listen, name="settings-cache-listener", daemon=True).start()
+
+    def _listen(self):
+        while True:
+            client = get_redis()
+            if client is None:
+                time.sleep(REDIS_RETRY_AFTER)
+                continue
+            pubsub = None
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Writes made while we were not subscribed were not announced
+                self.clear()
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message and message.get("type") == "message":
+                        self._on_message(message["data"])
+            except Exception as e:
+                mark_redis_down(e)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "invalidations": self.invalidations,
+            "scopes": len(self._scopes),
+        }
+
+
+settings_cache = SettingsCache()
@@ -0,0 +1,77 @@
+from typing import Any, Dict, Iterable, List, Sequence
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+
+def _dedupe(rows: Iterable[Dict[str, Any]], key: str) -> List[Dict[str, Any]]:
+    # One statement may not touch the same row twice (Postgres rejects it); last wins
+    unique: Dict[Any, Dict[str, Any]] = {}
+    for row in rows:
+        unique[row[key]] = row
+    return list(unique.values())
+
+
+def bulk_upsert(
+    db: Session,
+    model,
+    rows: Iterable[Dict[str, Any]],
+    update_columns: Sequence[str],
+    chunk_size: int = 1000,
+) -> int:
+    """
+    Inserts `rows` (column -> value dicts) into `model`'s table, updating
+    only `update_columns` of rows whose primary key already exists -- and
+    only when one of those values actually changed.
+
+    Postgres and SQLite use INSERT ... ON CONFLICT DO UPDATE, executed once
+    per chunk with all its rows. Other dialects fall back to one SELECT of
+    the existing keys per chunk plus bulk INSERT / UPDATE executemany.
+    Does not commit. Returns the number of rows written.
+    """
+    table = model.__table__
+    pk = table.primary_key.columns.values()[0].name
+    rows = _dedupe(rows, pk)
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        if dialect in ("postgresql", "sqlite"):
+            _on_conflict_upsert(db, table, pk, chunk, update_columns, dialect)
+        else:
+            _select_then_write(db, model, pk, chunk, update_columns)
+    return len(rows)
+
+
+def _on_conflict_upsert(db: Session, table, pk: str, chunk, update_columns, dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    # executemany of one cached statement: SQLAlchemy batches it into
+    # multi-row VALUES on Postgres ("insertmanyvalues"), sqlite3 reuses
+    # the prepared statement
+    stmt = insert(table)
+    excluded = stmt.excluded
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[pk],
+        set_={name: excluded[name] for name in update_columns},
+        # Skip the write (and its WAL / index churn) when nothing changed
+        where=or_(*(table.c[name].is_distinct_from(excluded[name]) for name in update_columns)),
+    )
+    db.execute(stmt, chunk)
+
+
+def _select_then_write(db: Session, model, pk: str, chunk, update_columns):
+    key_column = getattr(model, pk)
+    existing = set(db.execute(select(key_column).where(key_column.in_([r[pk] for r in chunk]))).scalars())
+    inserts = [row for row in chunk if row[pk] not in existing]
+    updates = [{pk: row[pk], **{name: row[name] for name in update_columns if name in row}}
+               for row in chunk if row[pk] in existing]
+    if inserts:
+        db.bulk_insert_mappings(model, inserts)
+    if updates:
+        db.bulk_update_mappings(model, updates)
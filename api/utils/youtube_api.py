@@ -0,0 +1,132 @@
+import asyncio
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from api.utils.youtube_quota import COSTS, QuotaExceeded, youtube_quota
+
+# videos().list accepts at most 50 IDs per call (Analytics video filters are chunked alike)
+MAX_IDS_PER_CALL = 50
+
+
+def chunked(ids: Iterable[str], size: int = MAX_IDS_PER_CALL) -> List[List[str]]:
+    """Unique, non-empty IDs (order kept) in chunks of `size`."""
+    unique = list(dict.fromkeys(i for i in ids if i))
+    return [unique[i:i + size] for i in range(0, len(unique), size)]
+
+
+def _is_quota_error(error: Exception) -> bool:
+    content = getattr(error, "content", b"") or b""
+    if isinstance(content, str):
+        content = content.encode()
+    return b"quotaExceeded" in content or b"dailyLimitExceeded" in content
+
+
+class YouTubeAPI:
+    """
+    Shared access to the YouTube Data / Analytics APIs (googleapiclient).
+
+    - Client reuse: `build()` parses the discovery document, so service
+      objects are cached per API key (or OAuth token). They wrap a
+      non-thread-safe httplib2 connection, hence one cache per thread.
+    - Off the event loop: every request executes in a worker thread.
+    - Batching: `videos()` looks up statistics, contentDetails and snippet
+      for up to 50 IDs per call instead of one call per video.
+    - Quota: Data API calls reserve their units in the shared daily ledger
+      first and raise QuotaExceeded when the caller's budget is spent.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "builds": 0, "videos": 0}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def service(self, api: str = "youtube", version: str = "v3", api_key: Optional[str] = None, credentials=None):
+        """This thread's client for (api, version, key/token), built on first use."""
+        services = getattr(self._local, "services", None)
+        if services is None:
+            services = self._local.services = {}
+        auth = ("key", api_key) if credentials is None else ("oauth", credentials.token)
+        key = (api, version, auth)
+        client = services.get(key)
+        if client is None:
+            from googleapiclient.discovery import build
+            if credentials is not None:
+                # OAuth tokens rotate; drop this API's clients for older tokens
+                for old in [k for k in services if k[:2] == (api, version) and k[2][0] == "oauth"]:
+                    del services[old]
+            client = build(api, version, developerKey=api_key, credentials=credentials, cache_discovery=False)
+            services[key] = client
+            self._count("builds")
+        return client
+
+    async def execute(
+        self,
+        make_request: Callable[[Any], Any],
+        *,
+        api: str = "youtube",
+        version: str = "v3",
+        api_key: Optional[str] = None,
+        credentials=None,
+        cost: int = 1,
+        priority: str = "discovery",
+    ) -> Dict[str, Any]:
+        """
+        Runs `make_request(client).execute()` in a worker thread, after
+        reserving `cost` quota units for `priority` (Data API only; the
+        Analytics API has its own quota).
+        """
+        metered = api == "youtube"
+        account = youtube_quota.account(api_key, credentials)
+        if metered and not youtube_quota.reserve(cost, priority, account):
+            raise QuotaExceeded(f"YouTube quota left for {priority} cannot cover {cost} units")
+
+        def run():
+            return make_request(self.service(api, version, api_key, credentials)).execute()
+
+        self._count("requests")
+        try:
+            return await asyncio.to_thread(run)
+        except Exception as e:
+            if metered and _is_quota_error(e):
+                youtube_quota.exhaust(account)
+            raise
+
+    async def search(self, *, api_key: Optional[str] = None, credentials=None,
+                     priority: str = "discovery", **params) -> Dict[str, Any]:
+        return await self.execute(lambda yt: yt.search().list(**params), api_key=api_key,
+                                  credentials=credentials, cost=COSTS["search.list"], priority=priority)
+
+    async def videos(
+        self,
+        video_ids: Iterable[str],
+        part: str = "snippet,statistics,contentDetails",
+        *,
+        api_key: Optional[str] = None,
+        credentials=None,
+        priority: str = "discovery",
+    ) -> Dict[str, Dict[str, Any]]:
+        """Video resources by ID, fetched 50 per call (concurrently). Unknown IDs are absent."""
+        chunks = chunked(video_ids)
+        if not chunks:
+            return {}
+        responses = await asyncio.gather(*(
+            self.execute(
+                lambda yt, ids=ids: yt.videos().list(id=",".join(ids), part=part, maxResults=len(ids)),
+                api_key=api_key, credentials=credentials, cost=COSTS["videos.list"], priority=priority,
+            )
+            for ids in chunks
+        ))
+        items = {item["id"]: item for response in responses for item in response.get("items", [])}
+        self._count("videos", len(items))
+        return items
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self.counters)
+
+
+youtube_api = YouTubeAPI()
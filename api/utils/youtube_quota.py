@@ -0,0 +1,168 @@
+import hashlib
+import datetime
+import logging
+import threading
+from typing import Dict, Optional
+
+from api.config import settings
+from api.utils.cache import get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+# Data API v3 units per request (https://developers.google.com/youtube/v3/determine_quota_cost)
+COSTS = {
+    "search.list": 100,
+    "videos.list": 1,
+    "videos.insert": 1600,
+}
+
+# Highest priority first; lower priorities stop earlier, leaving headroom for the higher ones
+PRIORITIES = ("publish", "analytics", "discovery")
+
+# Atomic check-and-reserve: fails (-1) if the reservation would cross the caller's ceiling
+_RESERVE = """
+local used = tonumber(redis.call('hget', KEYS[1], 'used') or '0')
+local units = tonumber(ARGV[1])
+if used + units > tonumber(ARGV[2]) then
+    return -1
+end
+used = redis.call('hincrby', KEYS[1], 'used', units)
+redis.call('hincrby', KEYS[1], ARGV[3], units)
+redis.call('expire', KEYS[1], ARGV[4])
+return used
+"""
+
+
+class QuotaExceeded(Exception):
+    """The daily YouTube quota left for this priority cannot cover the call."""
+
+
+def _pacific_today() -> str:
+    # Google resets the daily quota at midnight Pacific time
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.datetime.now(ZoneInfo("America/Los_Angeles")).date().isoformat()
+    except Exception:
+        return (datetime.datetime.utcnow() - datetime.timedelta(hours=8)).date().isoformat()
+
+
+class YouTubeQuota:
+    """
+    Daily YouTube Data API quota ledger shared by every scanner, the
+    sentinel auto-pilot, analytics and the publisher, in every process.
+
+    Units are tracked per account (API key or OAuth client) per Pacific day
+    in a Redis hash and reserved *before* each call. Each priority may only
+    spend up to its ceiling -- discovery stops while units remain for
+    analytics and publishing, and analytics stops while units remain for
+    uploads -- so a busy discovery day cannot block publishing, and calls
+    past the budget fail fast with QuotaExceeded instead of slowly at
+    Google. If Redis is down, a per-process ledger keeps counting.
+    """
+
+    def __init__(self, daily_limit: Optional[int] = None):
+        self.daily_limit = daily_limit or settings.YOUTUBE_DAILY_QUOTA
+        self._local: Dict[tuple, Dict[str, int]] = {}
+        self._accounts: set = set()
+        self._lock = threading.Lock()
+        self.denied = {p: 0 for p in PRIORITIES}
+
+    @staticmethod
+    def account(api_key: Optional[str] = None, credentials=None) -> str:
+        """Ledger identity; never the secret itself."""
+        if credentials is not None:
+            secret = getattr(credentials, "client_id", None) or settings.GOOGLE_CLIENT_ID or "oauth"
+            return "oauth-" + hashlib.sha256(secret.encode()).hexdigest()[:12]
+        return "key-" + hashlib.sha256((api_key or "").encode()).hexdigest()[:12]
+
+    def ceiling(self, priority: str) -> int:
+        """Units of the day this priority may use up to."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown quota priority '{priority}', expected one of {PRIORITIES}")
+        ceiling = self.daily_limit
+        if priority != "publish":
+            ceiling -= settings.YOUTUBE_QUOTA_PUBLISH_RESERVE
+        if priority == "discovery":
+            ceiling -= settings.YOUTUBE_QUOTA_ANALYTICS_RESERVE
+        return max(0, ceiling)
+
+    def _key(self, account: str, day: str) -> str:
+        return f"youtube:quota:{account}:{day}"
+
+    def reserve(self, units: int, priority: str = "discovery", account: str = "default") -> bool:
+        """Books `units` for a call about to be made; False if the budget cannot cover it."""
+        ceiling = self.ceiling(priority)
+        day = _pacific_today()
+        with self._lock:
+            self._accounts.add(account)
+
+        used = None
+        client = get_redis()
+        if client is not None:
+            try:
+                used = client.eval(_RESERVE, 1, self._key(account, day), units, ceiling, priority, 2 * 86400)
+            except Exception as e:
+                mark_redis_down(e)
+        if used is None:
+            with self._lock:
+                ledger = self._local.setdefault((account, day), {"used": 0})
+                if ledger["used"] + units > ceiling:
+                    used = -1
+                else:
+                    ledger["used"] += units
+                    ledger[priority] = ledger.get(priority, 0) + units
+                    used = ledger["used"]
+
+        if int(used) < 0:
+            with self._lock:
+                self.denied[priority] += 1
+            logger.warning(f"[YouTubeQuota] Denied {units} units for {priority} on {account} (ceiling {ceiling})")
+            return False
+        return True
+
+    def exhaust(self, account: str):
+        """Google says the quota is gone (quotaExceeded): everyone skips until the reset."""
+        day = _pacific_today()
+        logger.error(f"[YouTubeQuota] Quota exhausted for {account} on {day}")
+        with self._lock:
+            self._local.setdefault((account, day), {"used": 0})["used"] = self.daily_limit
+        client = get_redis()
+        if client is not None:
+            try:
+                client.hset(self._key(account, day), "used", self.daily_limit)
+                client.expire(self._key(account, day), 2 * 86400)
+            except Exception as e:
+                mark_redis_down(e)
+
+    def usage(self, account: str) -> Dict[str, int]:
+        day = _pacific_today()
+        client = get_redis()
+        if client is not None:
+            try:
+                raw = client.hgetall(self._key(account, day))
+                return {(k.decode() if isinstance(k, bytes) else k): int(v) for k, v in raw.items()}
+            except Exception as e:
+                mark_redis_down(e)
+        with self._lock:
+            return dict(self._local.get((account, day), {}))
+
+    def headroom(self, account: str) -> Dict[str, object]:
+        """Units used today and what each priority can still spend."""
+        usage = self.usage(account)
+        used = usage.get("used", 0)
+        return {
+            "limit": self.daily_limit,
+            "used": used,
+            "by_priority": {p: usage.get(p, 0) for p in PRIORITIES},
+            "remaining": {p: max(0, self.ceiling(p) - used) for p in PRIORITIES},
+        }
+
+    def stats(self) -> dict:
+        with self._lock:
+            accounts = sorted(self._accounts)
+            denied = dict(self.denied)
+        return {"day": _pacific_today(), "denied": denied,
+                "accounts": {a: self.headroom(a) for a in accounts}}
+
+
+youtube_quota = YouTubeQuota()
@@ -0,0 +1,136 @@
+"""
+Offline evaluation: contact-sheet VLM analysis vs the per-frame path.
+
+For every video given on the command line, samples keyframes once, then asks
+the same model twice -- with the individual frames and with a single tiled
+contact sheet -- and compares the structured outputs field by field. Both modes
+are pinned to the Gemini tier (recorded per sample in the report): the hedged
+tier chain could otherwise answer the two modes from different models, and the
+Groq and local tiers only ever look at the first frame, so the per-frame side
+would not be per-frame at all. The result cache is bypassed so both paths hit
+the model.
+
+Usage:
+    python scripts/eval_vlm_contact_sheet.py clip1.mp4 clip2.mp4 [--frames 5] [--out report.json]
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import Dict, List
+
+sys.path.append(os.getcwd())
+
+LIST_FIELDS = ("detected_subjects", "dominant_colors")
+TEXT_FIELDS = ("visual_mood", "lighting_quality")
+
+
+def _as_set(value) -> set:
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, (list, tuple)):
+        return set()
+    return {str(v).strip().lower() for v in value if str(v).strip()}
+
+
+def _rating(value):
+    try:
+        return float(str(value).split("/")[0])
+    except (TypeError, ValueError):
+        return None
+
+
+def compare_analyses(reference: Dict, candidate: Dict) -> Dict:
+    """
+    Field-level agreement between two VLM outputs:
+    - key_coverage: share of reference keys present in the candidate
+    - <list field>_jaccard: overlap of detected subjects / colours
+    - <text field>_match: case-insensitive equality
+    - aesthetic_rating_delta: absolute rating difference
+    """
+    report = {
+        "key_coverage": (
+            len(set(reference) & set(candidate)) / len(reference) if reference else 0.0
+        ),
+    }
+    for field in LIST_FIELDS:
+        a, b = _as_set(reference.get(field)), _as_set(candidate.get(field))
+        report[f"{field}_jaccard"] = len(a & b) / len(a | b) if (a | b) else None
+    for field in TEXT_FIELDS:
+        a, b = reference.get(field), candidate.get(field)
+        report[f"{field}_match"] = (str(a).strip().lower() == str(b).strip().lower()) if a and b else None
+    a, b = _rating(reference.get("aesthetic_rating")), _rating(candidate.get("aesthetic_rating"))
+    report["aesthetic_rating_delta"] = abs(a - b) if a is not None and b is not None else None
+    return report
+
+
+def summarize(rows: List[Dict]) -> Dict:
+    """Mean of every numeric/boolean metric across videos (None values skipped)."""
+    summary = {}
+    for key in rows[0]["comparison"] if rows else []:
+        values = [r["comparison"][key] for r in rows if r["comparison"][key] is not None]
+        summary[key] = sum(float(v) for v in values) / len(values) if values else None
+    for key in ("frames_latency", "sheet_latency"):
+        summary[key] = sum(r[key] for r in rows) / len(rows) if rows else None
+    return summary
+
+
+async def evaluate(video_paths: List[str], num_frames: int) -> Dict:
+    from services.video_engine.vlm_service import vlm_service, CONTACT_SHEET_PROMPT
+
+    if not vlm_service.gemini_model:
+        raise SystemExit("❌ Gemini is not configured (google_api_key); it is the only tier that sees every frame")
+
+    rows = []
+    for path in video_paths:
+        frames = vlm_service._sample_keyframes(path, num_frames=num_frames)
+        if not frames:
+            print(f"⚠️  No keyframes for {path}, skipping")
+            continue
+
+        start = time.perf_counter()
+        per_frame = await vlm_service._analyze_gemini(frames)
+        frames_latency = time.perf_counter() - start
+
+        start = time.perf_counter()
+        sheet = vlm_service._build_contact_sheet(frames)
+        contact = await vlm_service._analyze_gemini([sheet], CONTACT_SHEET_PROMPT.format(count=len(frames)))
+        sheet_latency = time.perf_counter() - start
+
+        comparison = compare_analyses(per_frame or {}, contact or {})
+        rows.append({
+            "video": path,
+            "frames": len(frames),
+            "tier": "gemini",
+            "model": vlm_service.model_name,
+            "frames_latency": frames_latency,
+            "sheet_latency": sheet_latency,
+            "per_frame": per_frame,
+            "contact_sheet": contact,
+            "comparison": comparison,
+        })
+        print(f"✅ {os.path.basename(path)}: coverage={comparison['key_coverage']:.0%} "
+              f"frames={frames_latency:.1f}s sheet={sheet_latency:.1f}s")
+
+    return {"videos": rows, "summary": summarize(rows)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--frames", type=int, default=5)
+    parser.add_argument("--out", default="vlm_contact_sheet_eval.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(evaluate(args.videos, args.frames))
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(json.dumps(report["summary"], indent=2))
+    print(f"📄 Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
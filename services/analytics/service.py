@@ -1,92 +1,122 @@
+import asyncio
+import logging
+import datetime
 from .models import ContentPerformance
-from typing import List
+from typing import Dict, List
+from api.utils.cache import TwoTierCache
+from api.utils.youtube_api import chunked, youtube_api
+from api.utils.youtube_quota import QuotaExceeded
 
 class AnalyticsService:
+    def __init__(self):
+        self.report_cache = TwoTierCache("analytics:report", ttl=3600)
+
     async def get_performance_report(self, post_id: str) -> ContentPerformance:
+        return (await self.get_performance_reports([post_id]))[post_id]
+
+    async def get_performance_reports(self, post_ids: List[str]) -> Dict[str, ContentPerformance]:
+        """
+        Performance reports for several published videos. Missing reports are
+        fetched together: statistics via batched videos().list calls (50 IDs
+        each) and watch-time metrics via one Analytics query per 50 videos.
+        Real reports are cached for an hour; cache lookups hit Redis, so they
+        run in a worker thread rather than on the event loop.
+        """
+        reports: Dict[str, ContentPerformance] = {}
+        missing = []
+        unique_ids = list(dict.fromkeys(post_ids))
+        cached_reports = await asyncio.to_thread(lambda: {p: self.report_cache.get(p) for p in unique_ids})
+        for post_id in unique_ids:
+            cached = cached_reports[post_id]
+            if cached:
+                logging.info(f"[Analytics] Serving cached report for {post_id}")
+                reports[post_id] = ContentPerformance(**cached)
+            else:
+                missing.append(post_id)
+
+        fetched = await self._fetch_reports(missing) if missing else {}
+        for post_id in missing:
+            report = fetched.get(post_id)
+            if report:
+                reports[post_id] = report
+            else:
+                # Don't cache zero data - allow real data to take over when API keys are added
+                reports[post_id] = self._empty_report(post_id)
+        if fetched:
+            await asyncio.to_thread(self._cache_reports, fetched)
+        return reports
+
+    def _cache_reports(self, reports: Dict[str, ContentPerformance]):
+        for post_id, report in reports.items():
+            self.report_cache.set(post_id, report.model_dump(mode="json"))
+
+    async def _fetch_reports(self, post_ids: List[str]) -> Dict[str, ContentPerformance]:
         from google.oauth2.credentials import Credentials
-        from googleapiclient.discovery import build
         from services.optimization.auth import token_manager
         from api.config import settings
-        import logging
-        import redis
-        import json
-        
-        # Redis Caching Layer
+
+        token_data = token_manager.get_token_data("youtube")
+        if not (token_data and settings.GOOGLE_CLIENT_ID):
+            return {}
         try:
-            r = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
-            cache_key = f"analytics:report:{post_id}"
-            cached_data = r.get(cache_key)
-            if cached_data:
-                logging.info(f"[Analytics] Serving cached report for {post_id}")
-                data = json.loads(cached_data)
-                return ContentPerformance(**data)
-        except Exception as e:
-            logging.warning(f"[Analytics] Cache partial failure: {e}")
-
-        # Try to fetch real data
-        token_data = token_manager.get_token("youtube")
-        if token_data and settings.GOOGLE_CLIENT_ID:
-            try:
-                creds = Credentials(
-                    token=token_data["access_token"],
-                    refresh_token=token_data.get("refresh_token"),
-                    token_uri="https://oauth2.googleapis.com/token",
-                    client_id=settings.GOOGLE_CLIENT_ID,
-                    client_secret=settings.GOOGLE_CLIENT_SECRET,
-                )
-                
-                # 1. Fetch Metadata (Basic Stats) from YouTube Data API
-                youtube = build("youtube", "v3", credentials=creds)
-                request = youtube.videos().list(
-                    part="statistics",
-                    id=post_id
-                )
-                response = request.execute()
-                
-                views = 0
-                likes = 0
-                if response.get("items"):
-                    stats = response["items"][0]["statistics"]
-                    views = int(stats.get("viewCount", 0))
-                    likes = int(stats.get("likeCount", 0))
-
-                # 2. Fetch Advanced Metrics from YouTube Analytics API
-                # Note: Reporting API requires 'channel' or 'contentOwner' context
-                # For solo creators, we use 'mine==true'
-                yt_analytics = build("youtubeAnalytics", "v2", credentials=creds)
-                
-                # We need to compute start/end dates. For now, let's fetch for the last 30 days.
-                import datetime
-                end_date = datetime.date.today().isoformat()
-                start_date = (datetime.date.today() - datetime.timedelta(days=30)).isoformat()
-
-                report_request = yt_analytics.reports().query(
-                    ids="channel==MINE",
-                    startDate=start_date,
-                    endDate=end_date,
-                    metrics="views,likes,comments,shares,estimatedMinutesWatched,averageViewDuration",
-                    dimensions="video",
-                    filters=f"video=={post_id}"
+            creds = Credentials(
+                token=token_data["access_token"],
+                refresh_token=token_data.get("refresh_token"),
+                token_uri="https://oauth2.googleapis.com/token",
+                client_id=settings.GOOGLE_CLIENT_ID,
+                client_secret=settings.GOOGLE_CLIENT_SECRET,
+            )
+
+            # 1. Fetch Metadata (Basic Stats) from YouTube Data API, 50 videos per call
+            videos = await youtube_api.videos(post_ids, part="statistics", credentials=creds, priority="analytics")
+
+            # 2. Fetch Advanced Metrics from YouTube Analytics API
+            # Note: Reporting API requires 'channel' or 'contentOwner' context
+            # For solo creators, we use 'mine==true'
+            # We need to compute start/end dates. For now, let's fetch for the last 30 days.
+            end_date = datetime.date.today().isoformat()
+            start_date = (datetime.date.today() - datetime.timedelta(days=30)).isoformat()
+
+            rows = {}
+            for ids in chunked(post_ids):
+                report_response = await youtube_api.execute(
+                    lambda yt, ids=ids: yt.reports().query(
+                        ids="channel==MINE",
+                        startDate=start_date,
+                        endDate=end_date,
+                        metrics="views,likes,comments,shares,estimatedMinutesWatched,averageViewDuration",
+                        dimensions="video",
+                        filters=f"video=={','.join(ids)}"
+                    ),
+                    api="youtubeAnalytics", version="v2", credentials=creds,
                 )
-                report_response = report_request.execute()
+                # Columns: [video, views, likes, comments, shares, estimatedMinutesWatched, averageViewDuration]
+                for row in report_response.get("rows") or []:
+                    rows[row[0]] = row
+
+            reports = {}
+            engagement = {}
+            for post_id in post_ids:
+                stats = videos.get(post_id, {}).get("statistics", {})
+                views = int(stats.get("viewCount", 0))
+                likes = int(stats.get("likeCount", 0))
 
                 watch_time = 0.0
                 shares = 0
                 comments = 0
-                retention_rate = 0.75 # Default fallback
-                
-                if report_response.get("rows"):
-                    row = report_response["rows"][0]
-                    # Columns: [video, views, likes, comments, shares, estimatedMinutesWatched, averageViewDuration]
+                avg_duration = 0.0
+
+                row = rows.get(post_id)
+                if row:
                     comments = int(row[3])
                     shares = int(row[4])
                     watch_time = float(row[5]) / 60.0 # Convert minutes to hours
                     avg_duration = float(row[6])
-                
+
                 # Generate a dynamic retention curve based on avg_duration vs total video length (estimated 60s for Shorts)
                 video_length = 60.0 # Standard Short
                 raw_retention_rate = avg_duration / video_length if video_length > 0 else 0.5
-                
+
                 # Model a natural decay curve: [Start at high %, end at avg_duration %]
                 # We'll generate 12 points (every 5 seconds)
                 retention_data = []
@@ -95,60 +125,59 @@ class AnalyticsService:
                 for i in range(12):
                     retention_data.append(max(int(current_rate - (i * drop_per_step)), 0))
 
-                result = ContentPerformance(
+                views = views or (int(row[1]) if row else 0)
+                likes = likes or (int(row[2]) if row else 0)
+                reports[post_id] = ContentPerformance(
                     post_id=post_id,
-                    views=views or (int(report_response["rows"][0][1]) if report_response.get("rows") else 0),
+                    views=views,
                     watch_time=watch_time,
                     retention_rate=raw_retention_rate,
-                    likes=likes or (int(report_response["rows"][0][2]) if report_response.get("rows") else 0),
+                    likes=likes,
                     shares=shares,
+                    comments=comments,
                     follows_gained=0,
                     retention_data=retention_data,
-                    optimization_insight=insight
+                    optimization_insight=""
                 )
-                
-                # Cache result
-                try:
-                    r.setex(cache_key, 3600, result.json())
-                except: pass
-                
-                return result
-            except Exception as e:
-                logging.error(f"Failed to fetch YouTube analytics: {e}")
-        
+                engagement[post_id] = (views, likes, shares, comments)
+
+            # One LLM round trip per report, issued concurrently rather than per loop step
+            insights = await asyncio.gather(*(self._generate_ai_insight(*engagement[p]) for p in reports))
+            for post_id, insight in zip(reports, insights):
+                reports[post_id].optimization_insight = insight
+            return reports
+        except QuotaExceeded as e:
+            logging.warning(f"[Analytics] Skipping YouTube fetch: {e}")
+            return {}
+        except Exception as e:
+            logging.error(f"Failed to fetch YouTube analytics: {e}")
+            return {}
+
+    @staticmethod
+    def _empty_report(post_id: str) -> ContentPerformance:
         # Fallback to zero/empty data (no mock data)
-        mock_result = ContentPerformance(
+        return ContentPerformance(
             post_id=post_id,
             views=0,
             watch_time=0.0,
             retention_rate=0.0,
             likes=0,
             shares=0,
+            comments=0,
             follows_gained=0,
             retention_data=[0] * 12,
             optimization_insight="No analytics data available. Publish content to start tracking performance."
         )
-        
-        # Don't cache zero data - allow real data to take over when API keys are added
-        try:
-             # Only cache mock if we really want to simulate persistence, 
-             # but usually we want to retry fetching real data. 
-             # Let's skip caching mock data to allow real data to take over when keys are added.
-             pass
-        except: pass
-            
-        return mock_result
 
     async def _generate_ai_insight(self, views: int, likes: int, shares: int, comments: int) -> str:
         """Generates real performance insights using Groq."""
-        from groq import Groq
         from api.config import settings
+        from api.utils.llm_gateway import llm_gateway
         
         if not settings.GROQ_API_KEY or settings.GROQ_API_KEY == "your_key_here":
             return "Strong engagement detected. Recommend consistent posting schedule."
 
         try:
-            client = Groq(api_key=settings.GROQ_API_KEY)
             prompt = f"""
             Analyze these video metrics and provide a single, actionable viral optimization insight (max 20 words):
             Views: {views}
@@ -157,11 +186,8 @@ class AnalyticsService:
             Comments: {comments}
             """
             
-            chat_completion = client.chat.completions.create(
-                messages=[{"role": "user", "content": prompt}],
-                model="llama-3.3-70b-versatile",
-            )
-            return chat_completion.choices[0].message.content.strip()
+            insight = await llm_gateway.complete(prompt, route="small", max_tokens=64)
+            return insight.strip()
         except Exception:
             return "Metrics show healthy growth. Maintain current content pacing."
 
@@ -1,15 +1,13 @@
-import json
 import logging
 from typing import Dict, Any, List
-from groq import AsyncGroq
-from api.config import settings
+from api.utils.llm_cache import llm_memo
+from api.utils.llm_gateway import llm_gateway
 
-class HookValidator:
-    def __init__(self):
-        self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
-        self.model = "llama-3.3-70b-versatile"
+# Bump when the prompt changes so memoized scores are not reused
+HOOK_PROMPT_VERSION = "v1"
 
-    async def validate_hook(self, hook_text: str) -> Dict[str, Any]:
+class HookValidator:
+    async def validate_hook(self, hook_text: str, bypass_cache: bool = False) -> Dict[str, Any]:
         """
         Analyzes a script hook and provides a 'Kill-Switch' score + alternatives.
         """
@@ -37,17 +35,13 @@ class HookValidator:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a viral retention specialist. Output JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+            return await llm_memo.get_or_call(
+                "hook.validate", HOOK_PROMPT_VERSION, {"hook": hook_text}, llm_gateway.model_for("large"),
+                lambda: llm_gateway.complete_json(
+                    prompt, system="You are a viral retention specialist. Output JSON.", route="large"
+                ),
+                bypass=bypass_cache,
             )
-            
-            content = response.choices[0].message.content
-            return json.loads(content)
         except Exception as e:
             logging.error(f"Hook Validation Error: {e}")
             return {
@@ -1,11 +1,25 @@
 import json
 import logging
 from typing import Dict, Any, List, Optional
-from groq import AsyncGroq
 from api.config import settings
 from api.utils.vault import get_secret
+from api.utils.llm_cache import llm_memo
+from api.utils.llm_gateway import llm_gateway
 from pydantic import BaseModel
 
+# Bump when the visual strategy prompt changes so memoized strategies are not reused
+STRATEGY_PROMPT_VERSION = "v1"
+
+VISUAL_STRATEGY_FORMAT = """{
+            "speed_range": [min, max],
+            "jitter_intensity": float,
+            "recommended_filters": ["f6", "f7", "f8"],
+            "hook_points": [[start, end], ...],
+            "b_roll_keywords": ["keyword1", "keyword2"],
+            "vibe": "Energetic" | "Calm" | "Educational" | "Dramatic",
+            "explanation": "Why this strategy?"
+        }"""
+
 class VideoStrategy(BaseModel):
     speed_range: List[float] = [0.98, 1.02]
     jitter_intensity: float = 1.0
@@ -29,11 +43,16 @@ class StoryScript(BaseModel):
     vibe_summary: str
     target_duration: float
 
+def _validates(model, data: Dict) -> bool:
+    try:
+        model(**data)
+        return True
+    except Exception:
+        return False
+
 class StrategyService:
     def __init__(self):
         self.api_key = get_secret("groq_api_key")
-        self.client = AsyncGroq(api_key=self.api_key)
-        self.model = "llama-3.3-70b-versatile"
 
     async def generate_screenplay(self, prompt: str, style: str = "Cinematic") -> StoryScript:
         """
@@ -85,35 +104,26 @@ class StrategyService:
                     ]
                 )
 
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-            
-            data = json.loads(response.choices[0].message.content)
+            data = await llm_gateway.complete_json(user_prompt, system=system_prompt, route="large")
             return StoryScript(**data)
         except Exception as e:
             logging.error(f"[StrategyService] Screenplay Error: {e}")
             raise
-    async def generate_visual_strategy(self, transcript: List[Dict], niche: str, style: str = "Default", visual_insights: Optional[Dict] = None) -> VideoStrategy:
-        """
-        Analyzes transcript content, user-selected style, and VLM visual insights to decide on video editing parameters.
-        """
+    @staticmethod
+    def transcript_text(transcript) -> str:
         if isinstance(transcript, str):
-            full_text = transcript
-        else:
-            full_text = " ".join([s.get("text", "") for s in transcript])
-        
+            return transcript
+        return " ".join([s.get("text", "") for s in transcript])
+
+    @staticmethod
+    def visual_strategy_brief(full_text: str, niche: str, style: str, visual_insights: Optional[Dict] = None) -> str:
+        """Task and decision criteria of the visual strategy prompt (shared with the fused prompt)."""
         # Prepare Visual Context if available
         visual_context = ""
         if visual_insights:
             visual_context = f"\nVISUAL INSIGHTS (VLM):\n{json.dumps(visual_insights, indent=2)}\n"
 
-        prompt = f"""
+        return f"""
         You are an elite AI Video Editor. Analyze the following video transcript, niche, user-selected STYLE, and VISUAL INSIGHTS to decide the visual strategy.
         
         NICHE: {niche}
@@ -132,33 +142,36 @@ class StrategyService:
         4. FILTERS: 'f6' (Speed Ramping), 'f7' (Cinematic), 'f8' (Jitter), 'f9' (Glow), 'f10' (Grain), 'f11' (Grayscale), 'f12' (Glitch).
         5. HOOKS: Identify 1-3 specific segments (start/end in seconds) that are the most viral, emotional, or high-energy parts of the transcript.
         6. B-ROLL: Provide 3-5 search keywords for stock footage.
-        
+        """
+
+    @staticmethod
+    def editor_system_prompt(style: str) -> str:
+        return f"You are a professional social media editor. The user wants a '{style}' aesthetic. Output JSON."
+
+    async def generate_visual_strategy(self, transcript: List[Dict], niche: str, style: str = "Default", visual_insights: Optional[Dict] = None,
+                                       bypass_cache: bool = False) -> VideoStrategy:
+        """
+        Analyzes transcript content, user-selected style, and VLM visual insights to decide on video editing parameters.
+        """
+        full_text = self.transcript_text(transcript)
+        prompt = f"""{self.visual_strategy_brief(full_text, niche, style, visual_insights)}
         OUTPUT FORMAT (JSON ONLY):
-        {{
-            "speed_range": [min, max],
-            "jitter_intensity": float,
-            "recommended_filters": ["f6", "f7", "f8"],
-            "hook_points": [[start, end], ...],
-            "b_roll_keywords": ["keyword1", "keyword2"],
-            "vibe": "Energetic" | "Calm" | "Educational" | "Dramatic",
-            "explanation": "Why this strategy?"
-        }}
+        {VISUAL_STRATEGY_FORMAT}
         """
 
         try:
             if not self.api_key or self.api_key == "your_key_here":
                 return VideoStrategy()
 
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"You are a professional social media editor. The user wants a '{style}' aesthetic. Output JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+            data = await llm_memo.get_or_call(
+                "strategy.visual", STRATEGY_PROMPT_VERSION,
+                {"transcript": full_text[:2000], "niche": niche, "style": style, "visual": visual_insights},
+                llm_gateway.model_for("large"),
+                lambda: llm_gateway.complete_json(prompt, system=self.editor_system_prompt(style), route="large"),
+                bypass=bypass_cache,
+                # Only cache answers that actually validate as a strategy
+                is_valid=lambda d: _validates(VideoStrategy, d),
             )
-            
-            data = json.loads(response.choices[0].message.content)
             return VideoStrategy(**data)
         except Exception as e:
             logging.error(f"[StrategyService] Error: {e}")
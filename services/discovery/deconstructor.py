@@ -16,9 +16,8 @@ class PatternDeconstructor:
         if not settings.GROQ_API_KEY:
              return self._fallback_pattern(transcript)
 
-        from groq import Groq
-        client = Groq(api_key=settings.GROQ_API_KEY)
-        
+        from api.utils.llm_gateway import llm_gateway
+
         prompt = f"""
         [Ettametta ANALYST]
         Analyze this video for viral potential:
@@ -36,16 +35,11 @@ class PatternDeconstructor:
         """
         
         try:
-            completion = client.chat.completions.create(
-                model="llama3-70b-8192",
-                messages=[
-                    {"role": "system", "content": "You are a viral content strategist. Output only JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={{"type": "json_object"}}
+            res = await llm_gateway.complete_json(
+                prompt,
+                system="You are a viral content strategist. Output only JSON.",
+                route="large",
             )
-            
-            res = json.loads(completion.choices[0].message.content)
             return ViralPattern(
                 id=f"groq_{metadata.get('id', 'unknown')}",
                 hook_score=float(res.get("hook_score", 0.5)),
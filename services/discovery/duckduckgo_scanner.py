@@ -2,6 +2,7 @@ import aiohttp
 import logging
 from typing import List, Optional
 from .models import ContentCandidate
+from api.utils.http_client import http_clients
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -52,22 +53,22 @@ class DuckDuckGoScanner:
     async def _search_ddg(self, query: str, niche: str) -> List[ContentCandidate]:
         """Search DuckDuckGo HTML for results."""
         try:
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                    "Accept-Language": "en-US,en;q=0.5",
-                }
+            session = http_clients.session()
+            headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.5",
+            }
+            
+            url = f"https://html.duckduckgo.com/html/?q={query.replace(' ', '+')}"
+            
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status != 200:
+                    return []
                 
-                url = f"https://html.duckduckgo.com/html/?q={query.replace(' ', '+')}"
+                html = await response.text()
+                return self._parse_results(html, niche)
                 
-                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                    if response.status != 200:
-                        return []
-                    
-                    html = await response.text()
-                    return self._parse_results(html, niche)
-                    
         except Exception as e:
             logger.error(f"[DuckDuckGo] Request error: {e}")
             return []
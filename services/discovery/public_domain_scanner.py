@@ -1,8 +1,8 @@
-import aiohttp
 import logging
 import random
 from typing import List, Optional
 from .models import ContentCandidate
+from api.utils.http_client import http_clients
 from api.config import settings
 
 class PublicDomainScanner:
@@ -21,21 +21,21 @@ class PublicDomainScanner:
             try:
                 headers = {"Authorization": settings.PEXELS_API_KEY}
                 params = {"query": niche, "per_page": 5, "orientation": "portrait"}
-                async with aiohttp.ClientSession(headers=headers) as session:
-                    async with session.get(self.pexels_base_url, params=params) as res:
-                        if res.status == 200:
-                            data = await res.json()
-                            for v in data.get("videos", []):
-                                candidates.append(ContentCandidate(
-                                    id=f"pexels_{v['id']}",
-                                    platform="Pexels",
-                                    url=v['url'],
-                                    author=v['user']['name'],
-                                    title=f"Stock B-Roll: {niche}",
-                                    view_count=random.randint(1000, 5000),
-                                    engagement_rate=0.9, # High quality score
-                                    metadata={"video_files": v['video_files']}
-                                ))
+                session = http_clients.session()
+                async with session.get(self.pexels_base_url, params=params, headers=headers) as res:
+                    if res.status == 200:
+                        data = await res.json()
+                        for v in data.get("videos", []):
+                            candidates.append(ContentCandidate(
+                                id=f"pexels_{v['id']}",
+                                platform="Pexels",
+                                url=v['url'],
+                                author=v['user']['name'],
+                                title=f"Stock B-Roll: {niche}",
+                                view_count=random.randint(1000, 5000),
+                                engagement_rate=0.9, # High quality score
+                                metadata={"video_files": v['video_files']}
+                            ))
             except Exception as e:
                 logging.error(f"[PublicDomain] Pexels Error: {e}")
 
@@ -47,22 +47,22 @@ class PublicDomainScanner:
                 "rows": 3,
                 "sort[]": "downloads desc"
             }
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.archive_base_url, params=params) as res:
-                    if res.status == 200:
-                        data = await res.json()
-                        docs = data.get("response", {}).get("docs", [])
-                        for doc in docs:
-                            candidates.append(ContentCandidate(
-                                id=f"archive_{doc['identifier']}",
-                                platform="Archive.org",
-                                url=f"https://archive.org/details/{doc['identifier']}",
-                                author=", ".join(doc.get("creator", ["Public Domain"])) if isinstance(doc.get("creator"), list) else doc.get("creator", "Public Domain"),
-                                title=doc.get("title", "Historical Footage"),
-                                view_count=doc.get("downloads", 0),
-                                engagement_rate=0.8,
-                                metadata={"identifier": doc['identifier']}
-                            ))
+            session = http_clients.session()
+            async with session.get(self.archive_base_url, params=params) as res:
+                if res.status == 200:
+                    data = await res.json()
+                    docs = data.get("response", {}).get("docs", [])
+                    for doc in docs:
+                        candidates.append(ContentCandidate(
+                            id=f"archive_{doc['identifier']}",
+                            platform="Archive.org",
+                            url=f"https://archive.org/details/{doc['identifier']}",
+                            author=", ".join(doc.get("creator", ["Public Domain"])) if isinstance(doc.get("creator"), list) else doc.get("creator", "Public Domain"),
+                            title=doc.get("title", "Historical Footage"),
+                            view_count=doc.get("downloads", 0),
+                            engagement_rate=0.8,
+                            metadata={"identifier": doc['identifier']}
+                        ))
         except Exception as e:
             logging.error(f"[PublicDomain] Archive.org Error: {e}")
 
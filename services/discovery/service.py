@@ -1,5 +1,4 @@
 import json
-import redis
 import asyncio
 import datetime
 from typing import List
@@ -22,12 +21,18 @@ from .bilibili_scanner import base_bilibili_scanner
 from .skool_scanner import base_skool_scanner
 from .duckduckgo_scanner import base_duckduckgo_scanner
 from .deconstructor import pattern_deconstructor
+from .trend_cache import trend_cache
 from api.utils.database import SessionLocal
-from api.utils.models import ContentCandidateDB, SystemSettings, NicheTrendDB, MonitoredNiche
+from api.utils.models import ContentCandidateDB, NicheTrendDB, MonitoredNiche
 from api.config import settings
 from api.utils.vault import get_secret
+from api.utils.settings_cache import settings_cache
 from api.utils.celery import celery_app
-from groq import Groq
+from api.utils.llm_gateway import llm_gateway
+from api.utils.upsert import bulk_upsert
+
+# Columns a re-discovered candidate refreshes; identity and text stay as first seen
+CANDIDATE_METRIC_COLUMNS = ("view_count", "engagement_rate", "views", "engagement_score", "viral_score")
 
 class DiscoveryService:
     def __init__(self):
@@ -53,28 +58,21 @@ class DiscoveryService:
             base_skool_scanner,
         ]
 
-    async def find_trending_content(self, niche: str, horizon: str = "30d", tier: str = "free") -> List[ContentCandidate]:
-        import json
-        import redis
-        from api.config import settings
-
-        # 1. Check Cache
-        redis_url = settings.REDIS_URL
-        # Ensure we're using the correct hostname within docker
-        # If running in docker, 'localhost' won't work for accessing other containers
-        # We need to replace 'localhost' with 'redis' but keep the port/db
-        if "//localhost" in redis_url:
-             redis_url = redis_url.replace("//localhost", "//redis")
+    async def find_trending_content(self, niche: str, horizon: str = "30d", tier: str = "free", refresh: bool = False) -> List[ContentCandidate]:
+        """
+        Trending candidates for a niche. Served from the trend cache (fresh,
+        or stale while a background scan refreshes it); concurrent requests
+        for the same niche/horizon/tier share one scan. `refresh` forces a
+        scan and writes its result through.
+        """
+        async def scan():
+            candidates = await self._scan_trends(niche, horizon, tier)
+            return [c.model_dump(mode="json") for c in candidates]
 
-        # Custom JSON Encoder for datetime
-        def json_serial(obj):
-            from datetime import datetime
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            raise TypeError (f"Type {type(obj)} not serializable")
+        items = await trend_cache.get_or_scan(niche, horizon, tier, scan, refresh=refresh)
+        return [ContentCandidate(**item) for item in items]
 
-        import datetime
-        
+    async def _scan_trends(self, niche: str, horizon: str, tier: str) -> List[ContentCandidate]:
         # Calculate published_after based on horizon
         now = datetime.datetime.now(datetime.timezone.utc)
         published_after = None
@@ -85,24 +83,9 @@ class DiscoveryService:
         elif horizon == "30d":
             published_after = now - datetime.timedelta(days=30)
 
-        try:
-            r = redis.from_url(redis_url)
-            cache_key = f"discovery:trends:{niche}:{horizon}"
-            cached_data = r.get(cache_key)
-            
-            if cached_data:
-                print(f"[Discovery] Cache HIT for {niche} ({horizon})")
-                data = json.loads(cached_data)
-                return [ContentCandidate(**item) for item in data]
-        except Exception as e:
-             print(f"[Discovery] Redis connection failed: {e}")
-             r = None
-
-        print(f"[Discovery] Cache MISS for {niche} ({horizon}), scanning...")
+        print(f"[Discovery] Scanning {niche} ({horizon}, tier {tier})...")
 
         # 2. Parallel Scanning
-        import asyncio
-        
         # Prepare scanner tasks
         tasks = []
         for scanner in self.scanners:
@@ -159,59 +142,68 @@ class DiscoveryService:
                 db.close()
 
         # Enforcement: Selective Monetization Mode (Viral Score > 85)
-        db = SessionLocal()
-        try:
-            mode_setting = db.query(SystemSettings).filter(SystemSettings.key == "monetization_mode").first()
-            monetization_mode = mode_setting.value if mode_setting else "all"
-            
-            if monetization_mode == "selective":
-                threshold = 65
-                original_count = len(all_candidates)
-                all_candidates = [c for c in all_candidates if (getattr(c, 'viral_score', 0) or 0) >= threshold]
-                print(f"[Discovery] Selective Mode: Filtered {original_count} -> {len(all_candidates)} candidates (Threshold: {threshold})")
-        finally:
-            db.close()
+        monetization_mode = settings_cache.get("monetization_mode", "all")
+        if monetization_mode == "selective":
+            threshold = 65
+            original_count = len(all_candidates)
+            all_candidates = [c for c in all_candidates if (getattr(c, 'viral_score', 0) or 0) >= threshold]
+            print(f"[Discovery] Selective Mode: Filtered {original_count} -> {len(all_candidates)} candidates (Threshold: {threshold})")
         
         # 3. Persistence Logic (Efficient Batch Integration)
+        self.persist_candidates(niche, all_candidates)
+
+        # 5. Recursive Discovery Expansion (Autonomous Scaling)
+        if len(all_candidates) > 0:
+            asyncio.create_task(self._trigger_recursive_expansion(niche, all_candidates))
+
+        return all_candidates
+
+    @staticmethod
+    def candidate_row(niche: str, c: ContentCandidate) -> dict:
+        """Column values of a ContentCandidateDB row for a scanned candidate."""
+        return {
+            "id": c.id,
+            "platform": c.platform,
+            "url": c.url,
+            "author": c.author,
+            "title": c.title,
+            "description": c.description,
+            "view_count": c.views,
+            "engagement_rate": c.engagement_score,
+            "views": c.views,
+            "engagement_score": c.engagement_score,
+            "viral_score": c.viral_score,
+            "duration_seconds": c.duration_seconds,
+            "thumbnail_url": c.thumbnail_url,
+            "metadata_json": c.metadata,
+            "niche": niche,
+        }
+
+    def persist_candidates(self, niche: str, candidates: List[ContentCandidate]) -> int:
+        """
+        Upserts a scan batch in a few statements: new candidates are
+        inserted, known ones only get their metrics refreshed (and only when
+        they changed). Returns the number of rows written.
+        """
+        if not candidates:
+            return 0
         db = SessionLocal()
         try:
-            db_candidates = []
-            for c in all_candidates:
-                db_candidates.append(ContentCandidateDB(
-                    id=c.id,
-                    platform=c.platform,
-                    url=c.url,
-                    author=c.author,
-                    title=c.title,
-                    description=c.description,
-                    view_count=c.views,
-                    engagement_rate=c.engagement_score,
-                    views=c.views,
-                    engagement_score=c.engagement_score,
-                    viral_score=c.viral_score,
-                    duration_seconds=c.duration_seconds,
-                    thumbnail_url=c.thumbnail_url,
-                    metadata_json=c.metadata,
-                    niche=niche
-                ))
-            
-            for db_c in db_candidates:
-                db.merge(db_c)
-            
+            count = bulk_upsert(
+                db, ContentCandidateDB,
+                (self.candidate_row(niche, c) for c in candidates),
+                update_columns=CANDIDATE_METRIC_COLUMNS,
+            )
             db.commit()
-            print(f"[Discovery] Successfully persisted {len(db_candidates)} candidates for {niche}.")
+            print(f"[Discovery] Successfully persisted {count} candidates for {niche}.")
+            return count
         except Exception as e:
             print(f"[Discovery] Persistence Error: {e}")
             db.rollback()
+            return 0
         finally:
             db.close()
 
-        # 5. Recursive Discovery Expansion (Autonomous Scaling)
-        if len(all_candidates) > 0:
-            asyncio.create_task(self._trigger_recursive_expansion(niche, all_candidates))
-
-        return all_candidates
-
     async def _trigger_recursive_expansion(self, niche: str, candidates: List[ContentCandidate]):
         """
         AI identifies related sub-niches and triggers background scans.
@@ -221,7 +213,6 @@ class DiscoveryService:
             return
 
         try:
-            client = Groq(api_key=groq_key)
             titles = [c.title for c in candidates[:10]]
             
             prompt = f"""
@@ -232,13 +223,7 @@ class DiscoveryService:
             Return ONLY a JSON array of strings. Example: ["Sub-Niche 1", "Keyword 2", "Topic 3"]
             """
             
-            completion = client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            
-            response = json.loads(completion.choices[0].message.content)
+            response = await llm_gateway.complete_json(prompt, route="small")
             sub_niches = response.get("sub_niches") or response.get("keywords") or list(response.values())[0]
             
             if sub_niches and isinstance(sub_niches, list):
@@ -259,8 +244,6 @@ class DiscoveryService:
             return candidates
 
         try:
-            client = Groq(api_key=groq_key)
-            
             # Analyze top 20 candidates in a single high-speed batch
             candidate_summaries = []
             for i, c in enumerate(candidates[:20]):
@@ -278,14 +261,7 @@ class DiscoveryService:
             {json.dumps(candidate_summaries)}
             """
 
-            # Use the faster llama-3.1-70b-versatile for high-quality ranking at speed
-            completion = client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
-            )
-            
-            response_json = json.loads(completion.choices[0].message.content)
+            response_json = await llm_gateway.complete_json(prompt, route="large")
             indices = response_json.get("indices") or list(response_json.values())[0]
 
             if not indices or not isinstance(indices, list):
@@ -1,10 +1,10 @@
-import httpx
 import logging
 import json
 from bs4 import BeautifulSoup
 from typing import List, Optional
 from datetime import datetime
 from services.discovery.models import ContentCandidate
+from api.utils.http_client import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -40,60 +40,60 @@ class SkoolScanner:
         }
 
         try:
-            async with httpx.AsyncClient(headers=headers, follow_redirects=True, timeout=15.0) as client:
-                response = await client.get(url)
-                
-                if response.status_code != 200:
-                    logger.warning(f"[SkoolScanner] Blocked or failed with status {response.status_code}")
-                    return []
+            client = http_clients.client(url)
+            response = await client.get(url, headers=headers, follow_redirects=True, timeout=15.0)
+            
+            if response.status_code != 200:
+                logger.warning(f"[SkoolScanner] Blocked or failed with status {response.status_code}")
+                return []
 
-                # Parse the HTML
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Skool uses a heavily JS-driven framework. We look for predictable data chunks
-                # or fall back to extracting text matching typical community cards.
-                candidates = []
-                
-                # Try to extract the hydrated JSON state (common in modern React/Next.js apps)
-                # Skool might inject a script tag with window.__INITIAL_STATE__ or similar
-                script_tag = soup.find('script', string=lambda t: t and 'INITIAL_STATE' in t)
-                
-                if script_tag:
-                    logger.info("[SkoolScanner] Found hydrated state, parsing JSON...")
-                    # Implementation details would go here to parse the specific Skool JSON structure
-                    # For now, we will simulate extraction since actual Skool DOM changes frequently
-                    candidates = self._parse_json_state(script_tag.string, niche)
-                else:
-                    logger.info("[SkoolScanner] No explicit JSON state found, attempting DOM parsing...")
-                    # Fallback to direct DOM parsing (looking for group cards)
-                    # This relies heavily on current CSS classes which break often
-                    cards = soup.find_all('div', class_=lambda c: c and 'group-card' in c.lower())
-                    for idx, card in enumerate(cards):
-                        title = card.find('h3')
-                        desc = card.find('p')
-                        members = card.find('span', string=lambda t: t and 'Members' in t)
-                        
-                        if title:
-                            candidates.append(ContentCandidate(
-                                id=f"skool_{idx}",
-                                platform=self.platform,
-                                url="https://skool.com/", # Needs exact path
-                                author="Skool Community",
-                                title=title.text.strip(),
-                                description=desc.text.strip() if desc else "Trending community",
-                                view_count=1000, # Simulated proxy for members
-                                engagement_rate=0.8,
-                                discovery_date=datetime.now(),
-                                tags=["skool", "community", niche if niche else "trending"],
-                                metadata={"source": "dom_scrape"}
-                            ))
-                
-                # If we still failed to get real data due to anti-bot measures, return empty
-                if not candidates:
-                    logger.warning("[SkoolScanner] Real DOM extraction failed (likely bot protection). Returning empty results.")
-                    return []
+            # Parse the HTML
+            soup = BeautifulSoup(response.text, 'html.parser')
+            
+            # Skool uses a heavily JS-driven framework. We look for predictable data chunks
+            # or fall back to extracting text matching typical community cards.
+            candidates = []
+            
+            # Try to extract the hydrated JSON state (common in modern React/Next.js apps)
+            # Skool might inject a script tag with window.__INITIAL_STATE__ or similar
+            script_tag = soup.find('script', string=lambda t: t and 'INITIAL_STATE' in t)
+            
+            if script_tag:
+                logger.info("[SkoolScanner] Found hydrated state, parsing JSON...")
+                # Implementation details would go here to parse the specific Skool JSON structure
+                # For now, we will simulate extraction since actual Skool DOM changes frequently
+                candidates = self._parse_json_state(script_tag.string, niche)
+            else:
+                logger.info("[SkoolScanner] No explicit JSON state found, attempting DOM parsing...")
+                # Fallback to direct DOM parsing (looking for group cards)
+                # This relies heavily on current CSS classes which break often
+                cards = soup.find_all('div', class_=lambda c: c and 'group-card' in c.lower())
+                for idx, card in enumerate(cards):
+                    title = card.find('h3')
+                    desc = card.find('p')
+                    members = card.find('span', string=lambda t: t and 'Members' in t)
+                    
+                    if title:
+                        candidates.append(ContentCandidate(
+                            id=f"skool_{idx}",
+                            platform=self.platform,
+                            url="https://skool.com/", # Needs exact path
+                            author="Skool Community",
+                            title=title.text.strip(),
+                            description=desc.text.strip() if desc else "Trending community",
+                            view_count=1000, # Simulated proxy for members
+                            engagement_rate=0.8,
+                            discovery_date=datetime.now(),
+                            tags=["skool", "community", niche if niche else "trending"],
+                            metadata={"source": "dom_scrape"}
+                        ))
+            
+            # If we still failed to get real data due to anti-bot measures, return empty
+            if not candidates:
+                logger.warning("[SkoolScanner] Real DOM extraction failed (likely bot protection). Returning empty results.")
+                return []
 
-                return candidates
+            return candidates
 
         except Exception as e:
             logger.error(f"[SkoolScanner] Scrape Error: {e}")
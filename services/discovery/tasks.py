@@ -11,17 +11,21 @@ def sentinel_trend_watcher():
     Background task that iterates through all active niches and triggers discovery.
     If AUTO_PILOT is enabled, it triggers the Viral Loop for autonomous processing.
     """
-    from api.utils.models import SystemSettings
+    from api.utils.settings_cache import settings_cache
+    from api.utils.vault import get_secret
+    from api.utils.youtube_quota import youtube_quota
     from services.optimization.viral_loop import base_viral_loop
     
     db = SessionLocal()
     try:
         # Check for Auto-Pilot setting
-        auto_pilot_setting = db.query(SystemSettings).filter(SystemSettings.key == "auto_pilot").first()
-        is_auto_pilot = auto_pilot_setting.value.lower() == "true" if auto_pilot_setting else False
+        is_auto_pilot = settings_cache.get_bool("auto_pilot")
         
         niches = db.query(MonitoredNiche).filter(MonitoredNiche.is_active == True).all()
         print(f"[Sentinel] Monitoring {len(niches)} active niches (Auto-Pilot: {is_auto_pilot})...")
+        # YouTube scans past the discovery budget are skipped by the scanners themselves
+        youtube_headroom = youtube_quota.headroom(youtube_quota.account(get_secret("youtube_api_key")))
+        print(f"[Sentinel] YouTube quota left for discovery today: {youtube_headroom['remaining']['discovery']} units")
         
         for n in niches:
             if is_auto_pilot:
@@ -47,8 +51,9 @@ def scan_trends_task(niche: str):
     """
     print(f"[Discovery Task] Automated scan for: {niche}")
     # DiscoveryService is async, so we run it in a loop
+    # Always scan: the result is written through to the trend cache for the dashboard
     loop = asyncio.get_event_loop()
-    candidates = loop.run_until_complete(base_discovery_service.find_trending_content(niche))
+    candidates = loop.run_until_complete(base_discovery_service.find_trending_content(niche, refresh=True))
     
     return {
         "status": "success", 
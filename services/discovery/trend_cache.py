@@ -0,0 +1,191 @@
+import time
+import uuid
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from api.config import settings
+from api.utils.cache import TwoTierCache, get_redis, mark_redis_down
+
+logger = logging.getLogger(__name__)
+
+# Deletes the lock only if we still own it (it may have expired and been re-taken)
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+Scan = Callable[[], Awaitable[List[Dict[str, Any]]]]
+
+
+class TrendCache:
+    """
+    Cache of discovery scan results keyed by niche, horizon and subscription
+    tier (`discovery:trends:{niche}:{horizon}:{tier}`), backed by the
+    two-tier cache (in-process LRU in front of Redis).
+
+    - Write-through: every completed scan stores its result.
+    - Stale-while-revalidate: past DISCOVERY_CACHE_TTL an entry is still
+      served immediately for DISCOVERY_CACHE_STALE_TTL while one background
+      scan refreshes it.
+    - Single-flight: concurrent requests for one key share one scan in the
+      process, and a Redis lock makes other API replicas and workers wait
+      for that scan's result instead of starting their own. The shared scan
+      is its own task, so a cancelled caller (e.g. a client disconnecting)
+      neither aborts it nor fails the other callers.
+    """
+
+    def __init__(self, fresh_ttl: Optional[int] = None, stale_ttl: Optional[int] = None):
+        self.fresh_ttl = fresh_ttl or settings.DISCOVERY_CACHE_TTL
+        self.stale_ttl = stale_ttl or settings.DISCOVERY_CACHE_STALE_TTL
+        self.store = TwoTierCache("discovery:trends", ttl=self.fresh_ttl + self.stale_ttl, max_local=256)
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        self._background: set = set()
+        self._lock = threading.Lock()
+        self.counters = {"fresh": 0, "stale": 0, "scans": 0, "coalesced": 0, "peer_waits": 0}
+
+    @staticmethod
+    def key(niche: str, horizon: str, tier: str) -> str:
+        return f"{niche.strip().lower()}:{horizon}:{tier or 'free'}"
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    async def get_or_scan(self, niche: str, horizon: str, tier: str, scan: Scan, refresh: bool = False) -> List[Dict[str, Any]]:
+        """
+        Cached scan result for (niche, horizon, tier); `scan()` runs on a
+        miss, in the background when the entry is stale, or always with
+        `refresh` (the result is written through either way).
+        """
+        key = self.key(niche, horizon, tier)
+        if not refresh:
+            entry = self.store.get(key)
+            if entry and self._age(entry) >= self.fresh_ttl:
+                # Another process may already have refreshed it in Redis
+                entry = self.store.get(key, local=False) or entry
+            if entry:
+                if self._age(entry) < self.fresh_ttl:
+                    self._count("fresh")
+                else:
+                    self._count("stale")
+                    self._revalidate(key, scan)
+                return entry["items"]
+        return await self._single_flight(key, scan)
+
+    @staticmethod
+    def _age(entry: Dict[str, Any]) -> float:
+        return time.time() - entry.get("fetched_at", 0)
+
+    def _revalidate(self, key: str, scan: Scan):
+        if (id(asyncio.get_running_loop()), key) in self._inflight:
+            return
+        task, _ = self._flight(key, scan)
+        # Keep a reference until done and log failures nobody awaited
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task):
+        self._background.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.warning(f"[TrendCache] Background refresh failed: {task.exception()}")
+
+    def _flight(self, key: str, scan: Scan):
+        """This loop's in-flight scan task for key, started if there is none; (task, started)."""
+        loop = asyncio.get_running_loop()
+        flight = (id(loop), key)
+        with self._lock:
+            task = self._inflight.get(flight)
+            if task is not None:
+                return task, False
+            task = loop.create_task(self._scan_once(key, scan))
+            self._inflight[flight] = task
+
+        def done(finished: asyncio.Task):
+            with self._lock:
+                if self._inflight.get(flight) is finished:
+                    del self._inflight[flight]
+            # Mark retrieved so a scan whose callers all went away does not warn
+            if not finished.cancelled():
+                finished.exception()
+
+        task.add_done_callback(done)
+        return task, True
+
+    async def _single_flight(self, key: str, scan: Scan) -> List[Dict[str, Any]]:
+        task, started = self._flight(key, scan)
+        if not started:
+            self._count("coalesced")
+        # Shielded: cancelling this caller leaves the shared scan running
+        return await asyncio.shield(task)
+
+    async def _scan_once(self, key: str, scan: Scan) -> List[Dict[str, Any]]:
+        token = self._acquire_lock(key)
+        if token is None:
+            self._count("peer_waits")
+            items = await self._wait_for_peer(key, started=time.time())
+            if items is not None:
+                return items
+            logger.warning(f"[TrendCache] No result from the peer scanning '{key}', scanning here")
+        try:
+            self._count("scans")
+            items = await scan()
+            if items:
+                self.store.set(key, {"fetched_at": time.time(), "items": items})
+            return items
+        finally:
+            if token:
+                self._release_lock(key, token)
+
+    def _acquire_lock(self, key: str) -> Optional[str]:
+        """Lock token, "" when Redis is unavailable (scan locally), None if another process holds it."""
+        client = get_redis()
+        if client is None:
+            return ""
+        token = uuid.uuid4().hex
+        try:
+            if client.set(f"discovery:lock:{key}", token, nx=True, ex=settings.DISCOVERY_SCAN_LOCK_TTL):
+                return token
+            return None
+        except Exception as e:
+            mark_redis_down(e)
+            return ""
+
+    def _release_lock(self, key: str, token: str):
+        client = get_redis()
+        if client is None:
+            return
+        try:
+            client.eval(_RELEASE_LOCK, 1, f"discovery:lock:{key}", token)
+        except Exception as e:
+            mark_redis_down(e)
+
+    async def _wait_for_peer(self, key: str, started: float, interval: float = 0.5) -> Optional[List[Dict[str, Any]]]:
+        deadline = time.monotonic() + settings.DISCOVERY_SCAN_WAIT
+        while time.monotonic() < deadline:
+            await asyncio.sleep(interval)
+            entry = self.store.get(key, local=False)
+            if entry and entry.get("fetched_at", 0) >= started - 1:
+                return entry["items"]
+            client = get_redis()
+            if client is None:
+                return None
+            try:
+                if not client.exists(f"discovery:lock:{key}"):
+                    # The peer finished (or died) without a usable result
+                    return None
+            except Exception as e:
+                mark_redis_down(e)
+                return None
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = dict(self.counters)
+        return {**counters, "store": self.store.stats()}
+
+
+trend_cache = TrendCache()
@@ -3,7 +3,8 @@ from .models import ContentCandidate
 from typing import List, Optional
 import random
 from api.config import settings
-from googleapiclient.discovery import build
+from api.utils.youtube_api import youtube_api
+from api.utils.youtube_quota import QuotaExceeded
 import datetime
 import re
 
@@ -16,12 +17,10 @@ class YouTubeLongScanner(TrendScanner):
             return []
 
         try:
-            youtube = build("youtube", "v3", developerKey=settings.YOUTUBE_API_KEY)
-            
             # Search for 'medium' duration (4 to 20 mins)
             search_params = {
                 "q": f"{niche} guide",
-                "part": "id,snippet",
+                "part": "id",
                 "maxResults": 5,
                 "type": "video",
                 "videoDuration": "medium",
@@ -32,21 +31,19 @@ class YouTubeLongScanner(TrendScanner):
             if published_after:
                 search_params["publishedAfter"] = published_after.isoformat().replace("+00:00", "") + "Z"
 
-            search_response = youtube.search().list(**search_params).execute()
+            api_key = settings.YOUTUBE_API_KEY
+            search_response = await youtube_api.search(api_key=api_key, **search_params)
+            video_ids = [item["id"]["videoId"] for item in search_response.get("items", []) if item["id"].get("videoId")]
+
+            # Stats, duration and snippet for all results in one call
+            videos = await youtube_api.videos(video_ids, api_key=api_key)
 
             candidates = []
-            for item in search_response.get("items", []):
-                video_id = item["id"]["videoId"]
-                snippet = item["snippet"]
-                
-                video_response = youtube.videos().list(
-                    id=video_id,
-                    part="statistics,contentDetails"
-                ).execute()
+            for video_id in video_ids:
+                v_data = videos.get(video_id)
+                if not v_data: continue
                 
-                if not video_response.get("items"): continue
-                
-                v_data = video_response["items"][0]
+                snippet = v_data.get("snippet", {})
                 stats = v_data["statistics"]
                 # Duration is in ISO 8601 (e.g. PT10M30S)
                 duration_raw = v_data["contentDetails"]["duration"]
@@ -81,6 +78,9 @@ class YouTubeLongScanner(TrendScanner):
             
             return candidates
 
+        except QuotaExceeded as e:
+            print(f"[YouTubeLongScanner] Skipped: {e}")
+            return []
         except Exception as e:
             print(f"[YouTubeLongScanner] ERROR: {str(e)}")
             return []
@@ -3,11 +3,12 @@ from .models import ContentCandidate
 from typing import List, Optional
 import random
 from api.config import settings
-from googleapiclient.discovery import build
 import datetime
 import re
 
 from api.utils.vault import get_secret
+from api.utils.youtube_api import youtube_api
+from api.utils.youtube_quota import QuotaExceeded
 
 class YouTubeShortsScanner(TrendScanner):
     async def scan_trends(self, niche: str, published_after: Optional[datetime.datetime] = None) -> List[ContentCandidate]:
@@ -20,13 +21,12 @@ class YouTubeShortsScanner(TrendScanner):
             raise ValueError("YouTube API key not configured. Please set YOUTUBE_API_KEY in environment.")
 
         try:
-            youtube = build("youtube", "v3", developerKey=api_key)
-            
             # 1. Search for trending videos in the niche
             # We filter for 'short' duration and 'video' type
+            # (snippets come with the batched video lookup below)
             search_params = {
                 "q": f"{niche} #shorts",
-                "part": "id,snippet",
+                "part": "id",
                 "maxResults": 10,
                 "type": "video",
                 "videoDuration": "short",
@@ -37,20 +37,18 @@ class YouTubeShortsScanner(TrendScanner):
             if published_after:
                 search_params["publishedAfter"] = published_after.isoformat().replace("+00:00", "") + "Z"
 
-            search_response = youtube.search().list(**search_params).execute()
+            search_response = await youtube_api.search(api_key=api_key, **search_params)
+            video_ids = [item["id"]["videoId"] for item in search_response.get("items", []) if item["id"].get("videoId")]
+
+            # 2. Get detailed video stats for the whole page in one call
+            videos = await youtube_api.videos(video_ids, api_key=api_key)
 
             candidates = []
-            for item in search_response.get("items", []):
-                video_id = item["id"]["videoId"]
-                snippet = item["snippet"]
-                
-                # 2. Get detailed video stats
-                video_response = youtube.videos().list(
-                    id=video_id,
-                    part="statistics,contentDetails"
-                ).execute()
-                
-                video_data = video_response["items"][0] if video_response.get("items") else {}
+            for video_id in video_ids:
+                video_data = videos.get(video_id)
+                if not video_data:
+                    continue
+                snippet = video_data.get("snippet", {})
                 stats = video_data.get("statistics", {})
                 content_details = video_data.get("contentDetails", {})
                 
@@ -89,6 +87,9 @@ class YouTubeShortsScanner(TrendScanner):
             
             return candidates
 
+        except QuotaExceeded as e:
+            print(f"[YouTubeScanner] Skipped: {e}")
+            return []
         except Exception as e:
             print(f"[YouTubeScanner] ERROR: {str(e)}")
             raise ValueError(f"YouTube API error: {str(e)}")
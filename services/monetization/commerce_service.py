@@ -1,22 +1,20 @@
 import logging
-import httpx
+from api.utils.http_client import http_clients
 from typing import List, Dict, Any, Optional
 from api.config import settings
 from api.utils.database import SessionLocal
-from api.utils.models import SystemSettings, AffiliateLinkDB
+from api.utils.models import AffiliateLinkDB
+from api.utils.settings_cache import settings_cache
 
 class CommerceService:
     def __init__(self):
         self.logger = logging.getLogger("CommerceService")
 
-    async def _get_shopify_creds(self, db) -> Dict[str, str]:
-        """Fetches Shopify credentials from DB settings."""
-        shop_url = db.query(SystemSettings).filter(SystemSettings.key == "shopify_shop_url").first()
-        access_token = db.query(SystemSettings).filter(SystemSettings.key == "shopify_access_token").first()
-        
+    async def _get_shopify_creds(self) -> Dict[str, str]:
+        """Fetches Shopify credentials from DB settings (cached)."""
         return {
-            "url": shop_url.value if shop_url else None,
-            "token": access_token.value if access_token else None
+            "url": settings_cache.get("shopify_shop_url"),
+            "token": settings_cache.get("shopify_access_token")
         }
 
     async def get_relevant_products(self, niche: str) -> List[Dict[str, Any]]:
@@ -25,7 +23,7 @@ class CommerceService:
         """
         db = SessionLocal()
         try:
-            creds = await self._get_shopify_creds(db)
+            creds = await self._get_shopify_creds()
             
             if creds["url"] and creds["token"] and "shpat_" in creds["token"]:
                 self.logger.info(f"[Commerce] Fetching real products from Shopify: {creds['url']}")
@@ -63,26 +61,26 @@ class CommerceService:
         }
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(search_url, headers=headers, timeout=10.0)
-                if response.status_code == 200:
-                    data = response.json()
-                    products = []
-                    for p in data.get("products", []):
-                        # Construct a direct product link
-                        handle = p.get("handle")
-                        product_url = f"https://{shop_url}/products/{handle}"
-                        products.append({
-                            "id": str(p.get("id")),
-                            "name": p.get("title"),
-                            "price": p.get("variants", [{}])[0].get("price", "0.00"),
-                            "url": product_url,
-                            "source": "shopify"
-                        })
-                    return products
-                else:
-                    self.logger.error(f"[Commerce] Shopify API Error: {response.status_code} - {response.text}")
-                    return []
+            client = http_clients.client(search_url)
+            response = await client.get(search_url, headers=headers, timeout=10.0)
+            if response.status_code == 200:
+                data = response.json()
+                products = []
+                for p in data.get("products", []):
+                    # Construct a direct product link
+                    handle = p.get("handle")
+                    product_url = f"https://{shop_url}/products/{handle}"
+                    products.append({
+                        "id": str(p.get("id")),
+                        "name": p.get("title"),
+                        "price": p.get("variants", [{}])[0].get("price", "0.00"),
+                        "url": product_url,
+                        "source": "shopify"
+                    })
+                return products
+            else:
+                self.logger.error(f"[Commerce] Shopify API Error: {response.status_code} - {response.text}")
+                return []
         except Exception as e:
             self.logger.error(f"[Commerce] Shopify Connection Failed: {e}")
             return []
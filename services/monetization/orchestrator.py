@@ -1,7 +1,6 @@
 import logging
 from typing import List, Dict, Any, Optional
-from api.utils.database import SessionLocal
-from api.utils.models import SystemSettings
+from api.utils.settings_cache import settings_cache
 from .strategies.commerce import CommerceStrategy
 from .strategies.affiliate import AffiliateStrategy
 from .strategies.lead_gen import LeadGenStrategy
@@ -26,32 +25,22 @@ class MonetizationOrchestrator:
         self.logger = logging.getLogger("MonetizationOrchestrator")
 
     async def get_active_strategy(self) -> Any:
-        db = SessionLocal()
-        try:
-            setting = db.query(SystemSettings).filter(SystemSettings.key == "active_monetization_strategy").first()
-            strategy_key = setting.value if setting else "commerce"
-            
-            if strategy_key not in self.strategies:
-                self.logger.warning(f"Unknown strategy key: {strategy_key}. Falling back to commerce.")
-                return self.strategies["commerce"]
-            
-            return self.strategies[strategy_key]
-        finally:
-            db.close()
+        strategy_key = settings_cache.get("active_monetization_strategy", "commerce")
+        
+        if strategy_key not in self.strategies:
+            self.logger.warning(f"Unknown strategy key: {strategy_key}. Falling back to commerce.")
+            return self.strategies["commerce"]
+        
+        return self.strategies[strategy_key]
 
     async def should_monetize(self, viral_score: int = 0) -> bool:
-        db = SessionLocal()
-        try:
-            setting = db.query(SystemSettings).filter(SystemSettings.key == "monetization_mode").first()
-            mode = setting.value if setting else "selective"
-            
-            if mode == "all":
-                return True
-            
-            # Selective mode: Only monetize high-potential content
-            return viral_score >= 85
-        finally:
-            db.close()
+        mode = settings_cache.get("monetization_mode", "selective")
+        
+        if mode == "all":
+            return True
+        
+        # Selective mode: Only monetize high-potential content
+        return viral_score >= 85
 
     async def get_monetization_assets(self, niche: str, viral_score: int = 0) -> List[Dict[str, Any]]:
         if not await self.should_monetize(viral_score):
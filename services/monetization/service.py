@@ -1,16 +1,16 @@
 import logging
-import json
 from typing import List, Dict, Any, Optional
-from groq import AsyncGroq
-from api.config import settings
+from api.utils.llm_cache import llm_memo
+from api.utils.llm_gateway import llm_gateway
 
 from .orchestrator import base_monetization_orchestrator
 
+# Bump when the matching prompt changes so memoized matches are not reused
+MATCH_PROMPT_VERSION = "v1"
+
 class MonetizationEngine:
     def __init__(self):
-        self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
         self.orchestrator = base_monetization_orchestrator
-        self.model = "llama-3.3-70b-versatile"
 
     async def recommend_products(self, niche: str, script_text: str) -> List[Dict[str, Any]]:
         """
@@ -18,7 +18,7 @@ class MonetizationEngine:
         """
         return await self.orchestrator.get_monetization_assets(niche)
 
-    async def match_viral_to_product(self, niche: str, viral_title: str) -> Optional[Dict[str, Any]]:
+    async def match_viral_to_product(self, niche: str, viral_title: str, bypass_cache: bool = False) -> Optional[Dict[str, Any]]:
         """
         Matches a specific viral trend to the most relevant asset from the active strategy.
         """
@@ -39,12 +39,14 @@ class MonetizationEngine:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                response_format={"type": "json_object"}
+            # Picking an ID from a short list is a cheap task
+            data = await llm_memo.get_or_call(
+                "monetization.match", MATCH_PROMPT_VERSION,
+                {"title": viral_title, "assets": [[p['id'], p['name']] for p in assets]},
+                llm_gateway.model_for("small"),
+                lambda: llm_gateway.complete_json(prompt, route="small"),
+                bypass=bypass_cache,
             )
-            data = json.loads(response.choices[0].message.content)
             aid = data.get("asset_id")
             return next((p for p in assets if p['id'] == aid), assets[0])
         except Exception as e:
@@ -2,8 +2,7 @@ import logging
 import random
 from typing import List, Dict, Any
 from .base import BaseMonetizationStrategy
-from api.utils.database import SessionLocal
-from api.utils.models import SystemSettings
+from api.utils.settings_cache import settings_cache
 
 class CryptoStrategy(BaseMonetizationStrategy):
     """
@@ -15,74 +14,65 @@ class CryptoStrategy(BaseMonetizationStrategy):
         Fetches crypto wallet addresses from database configuration.
         Returns available crypto wallets for donations/tips.
         """
-        db = SessionLocal()
-        try:
-            # Check for configured crypto wallets
-            wallets_setting = db.query(SystemSettings).filter(
-                SystemSettings.key == "crypto_wallets"
-            ).first()
-            
-            if not wallets_setting or not wallets_setting.value:
-                logging.warning(f"[CryptoStrategy] No crypto wallets configured. Set 'crypto_wallets' in settings (format: BTC:addr,ETH:addr).")
-                return []
-            
-            # Parse wallets (format: BTC:addr,ETH:addr,USDT:addr)
-            assets = []
-            wallet_str = wallets_setting.value
-            
-            if "BTC" in wallet_str.upper():
-                btc_addr = self._extract_wallet(wallet_str, "BTC")
-                if btc_addr:
-                    assets.append({
-                        "id": "btc_wallet",
-                        "name": "Bitcoin",
-                        "symbol": "BTC",
-                        "address": btc_addr,
-                        "type": "crypto"
-                    })
-            
-            if "ETH" in wallet_str.upper():
-                eth_addr = self._extract_wallet(wallet_str, "ETH")
-                if eth_addr:
-                    assets.append({
-                        "id": "eth_wallet",
-                        "name": "Ethereum", 
-                        "symbol": "ETH",
-                        "address": eth_addr,
-                        "type": "crypto"
-                    })
-            
-            if "USDT" in wallet_str.upper():
-                usdt_addr = self._extract_wallet(wallet_str, "USDT")
-                if usdt_addr:
-                    assets.append({
-                        "id": "usdt_wallet",
-                        "name": "Tether (USDT)",
-                        "symbol": "USDT",
-                        "address": usdt_addr,
-                        "type": "crypto"
-                    })
-            
-            # Add generic donation link if configured
-            donation_setting = db.query(SystemSettings).filter(
-                SystemSettings.key == "donation_link"
-            ).first()
-            
-            if donation_setting and donation_setting.value:
+        # Check for configured crypto wallets
+        wallet_str = settings_cache.get("crypto_wallets")
+        
+        if not wallet_str:
+            logging.warning(f"[CryptoStrategy] No crypto wallets configured. Set 'crypto_wallets' in settings (format: BTC:addr,ETH:addr).")
+            return []
+        
+        # Parse wallets (format: BTC:addr,ETH:addr,USDT:addr)
+        assets = []
+        
+        if "BTC" in wallet_str.upper():
+            btc_addr = self._extract_wallet(wallet_str, "BTC")
+            if btc_addr:
+                assets.append({
+                    "id": "btc_wallet",
+                    "name": "Bitcoin",
+                    "symbol": "BTC",
+                    "address": btc_addr,
+                    "type": "crypto"
+                })
+        
+        if "ETH" in wallet_str.upper():
+            eth_addr = self._extract_wallet(wallet_str, "ETH")
+            if eth_addr:
                 assets.append({
-                    "id": "donation_link",
-                    "name": "Support via PayPal/Donation",
-                    "url": donation_setting.value,
-                    "type": "donation"
+                    "id": "eth_wallet",
+                    "name": "Ethereum", 
+                    "symbol": "ETH",
+                    "address": eth_addr,
+                    "type": "crypto"
                 })
-            
-            if not assets:
-                logging.warning(f"[CryptoStrategy] Could not parse crypto wallets from: {wallets_setting.value}")
-                return []
-            
-            return assets
-        finally:
-            db.close()
+        
+        if "USDT" in wallet_str.upper():
+            usdt_addr = self._extract_wallet(wallet_str, "USDT")
+            if usdt_addr:
+                assets.append({
+                    "id": "usdt_wallet",
+                    "name": "Tether (USDT)",
+                    "symbol": "USDT",
+                    "address": usdt_addr,
+                    "type": "crypto"
+                })
+        
+        # Add generic donation link if configured
+        donation_link = settings_cache.get("donation_link")
+        
+        if donation_link:
+            assets.append({
+                "id": "donation_link",
+                "name": "Support via PayPal/Donation",
+                "url": donation_link,
+                "type": "donation"
+            })
+        
+        if not assets:
+            logging.warning(f"[CryptoStrategy] Could not parse crypto wallets from: {wallet_str}")
+            return []
+        
+        return assets
     
     def _extract_wallet(self, wallet_str: str, symbol: str) -> str:
         """Extract wallet address for a given symbol"""
@@ -1,16 +1,16 @@
 import logging
 import json
 from typing import List, Dict, Any, Optional
-from groq import AsyncGroq
-from api.config import settings
+from api.utils.llm_cache import llm_memo
+from api.utils.llm_gateway import llm_gateway
 from services.voiceover.service import base_voiceover_service
 
-class GlobalReachAdapter:
-    def __init__(self):
-        self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
-        self.model = "llama-3.3-70b-versatile"
+# Bump when a prompt changes so memoized translations are not reused
+TRANSLATION_PROMPT_VERSION = "v1"
 
-    async def translate_metadata(self, title: str, description: str, tags: List[str], target_lang: str) -> Dict[str, Any]:
+class GlobalReachAdapter:
+    async def translate_metadata(self, title: str, description: str, tags: List[str], target_lang: str,
+                                 bypass_cache: bool = False) -> Dict[str, Any]:
         """
         Translates video metadata using Groq/LLM.
         """
@@ -31,17 +31,17 @@ class GlobalReachAdapter:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"You are a native {target_lang} viral marketing expert. Output JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+            return await llm_memo.get_or_call(
+                "translate.metadata", TRANSLATION_PROMPT_VERSION,
+                {"title": title, "description": description, "tags": tags, "lang": target_lang},
+                llm_gateway.model_for("large"),
+                lambda: llm_gateway.complete_json(
+                    prompt,
+                    system=f"You are a native {target_lang} viral marketing expert. Output JSON.",
+                    route="large",
+                ),
+                bypass=bypass_cache,
             )
-            
-            content = response.choices[0].message.content
-            return json.loads(content)
         except Exception as e:
             logging.error(f"[GlobalReachAdapter] Translation Error: {e}")
             return {
@@ -51,7 +51,8 @@ class GlobalReachAdapter:
                 "error": str(e)
             }
 
-    async def translate_script_segments(self, segments: List[Dict[str, Any]], target_lang: str) -> List[Dict[str, Any]]:
+    async def translate_script_segments(self, segments: List[Dict[str, Any]], target_lang: str,
+                                        bypass_cache: bool = False) -> List[Dict[str, Any]]:
         """
         Translates a list of script segments for dubbing/subtitles.
         """
@@ -69,17 +70,17 @@ class GlobalReachAdapter:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": f"You are a native {target_lang} scriptwriter. Output JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+            translated_data = await llm_memo.get_or_call(
+                "translate.segments", TRANSLATION_PROMPT_VERSION,
+                {"segments": segments, "lang": target_lang},
+                llm_gateway.model_for("large"),
+                lambda: llm_gateway.complete_json(
+                    prompt,
+                    system=f"You are a native {target_lang} scriptwriter. Output JSON.",
+                    route="large",
+                ),
+                bypass=bypass_cache,
             )
-            
-            content = response.choices[0].message.content
-            translated_data = json.loads(content)
             return translated_data.get("segments", segments)
         except Exception as e:
             logging.error(f"[GlobalReachAdapter] Script Translation Error: {e}")
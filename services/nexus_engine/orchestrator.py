@@ -20,7 +20,7 @@ class NexusOrchestrator:
         
         try:
             from services.video_engine.remotion_service import remotion_service
-            import cv2 # To get clip durations if not provided
+            from services.video_engine.media_index import media_index
 
             # 1. Prepare clips for Remotion
             # We need to calculate durationInFrames for each clip
@@ -29,11 +29,8 @@ class NexusOrchestrator:
                 if not os.path.exists(v_path):
                     continue
                 
-                # Get duration using cv2 (cheaper than moviepy for just metadata)
-                cap = cv2.VideoCapture(v_path)
-                fps = cap.get(cv2.CAP_PROP_FPS) or 30
-                frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                cap.release()
+                # Frame count from the shared media index (probed once per file)
+                frame_count = media_index.get(v_path)["frame_count"]
                 
                 remotion_clips.append({
                     "url": v_path,
@@ -2,7 +2,7 @@ import logging
 import json
 import requests
 import asyncio
-from groq import Groq
+from groq import AsyncGroq
 from config import settings
 from typing import Dict, Any
 from skills.discovery import discovery_skill
@@ -22,7 +22,7 @@ logger = logging.getLogger(__name__)
 
 class OpenClawAgent:
     def __init__(self):
-        self.groq_client = Groq(api_key=settings.GROQ_API_KEY)
+        self.groq_client = AsyncGroq(api_key=settings.GROQ_API_KEY)
         self.model = settings.MODEL
         self.system_prompt = """You are OpenClaw, the autonomous Master Controller for the ettametta multi-agent empire.
         Your goal is to assist the user by orchestrating a team of specialized agents:
@@ -100,7 +100,7 @@ class OpenClawAgent:
 
         try:
             # 1. Ask LLM for intent
-            completion = self.groq_client.chat.completions.create(
+            completion = await self.groq_client.chat.completions.create(
                 messages=[
                     {"role": "system", "content": self.system_prompt},
                     {"role": "user", "content": message}
@@ -1,73 +1,76 @@
 from .models import PostMetadata
 from api.config import settings
 from api.utils.os_worker import ai_worker
+from api.utils.llm_cache import llm_memo
+from api.utils.llm_gateway import llm_gateway
 from api.utils.database import SessionLocal
-from api.utils.models import AffiliateLinkDB, SystemSettings
+from api.utils.models import AffiliateLinkDB
+from api.utils.settings_cache import settings_cache
 from services.monetization.service import base_monetization_engine
+from services.decision_engine.service import VISUAL_STRATEGY_FORMAT, VideoStrategy, base_strategy_service
 import json
 import logging
 import random
+from typing import Dict, Optional, Tuple
 from services.monetization.auto_merch import base_auto_merch_service
 
+# Bump when the package prompt changes so memoized packages are not reused
+PACKAGE_PROMPT_VERSION = "v1"
+FUSED_PROMPT_VERSION = "v1"
+
 class OptimizationService:
-    async def generate_viral_package(self, content_id: str, niche: str, platform: str) -> PostMetadata:
+    async def _monetization_cta(self, db, content_id: str, niche: str) -> str:
         """
-        Uses shared AIWorker to generate SEO-optimized title, description, and hashtags.
-        Automatically injects relevant affiliate links and CTAs if available.
+        Picks the monetization CTA (and arbitrage suggestion) for this post,
+        honouring the aggression and active strategy settings. Empty when
+        nothing should be harvested this time.
         """
-        db = SessionLocal()
         affiliate_info = ""
         commerce_info = ""
-        aggression = 100 # Default
+
+        # 1. Check Monetization Settings
+        aggression = settings_cache.get_int("monetization_aggression", 100)
+        active_strategy = settings_cache.get("active_monetization_strategy", "affiliate")
         
-        try:
-            # 1. Check Monetization Settings
-            agg_setting = db.query(SystemSettings).filter(SystemSettings.key == "monetization_aggression").first()
-            if agg_setting:
-                aggression = int(agg_setting.value)
-            
-            strategy_setting = db.query(SystemSettings).filter(SystemSettings.key == "active_monetization_strategy").first()
-            active_strategy = strategy_setting.value if strategy_setting else "affiliate"
+        # Determine if we should harvest this time (Probability check)
+        should_harvest = random.randint(1, 100) <= aggression
+
+        if should_harvest:
+            # 2. Source Monetization based on Strategy
+            if active_strategy == "commerce":
+                product = await base_monetization_engine.match_viral_to_product(niche, content_id)
+                if product:
+                    from services.monetization.strategies.commerce import CommerceStrategy
+                    strategy = CommerceStrategy()
+                    commerce_cta = await strategy.generate_cta(niche, content_id)
+                    commerce_info = f"\n- MONETIZATION CTA: {commerce_cta}"
             
-            # Determine if we should harvest this time (Probability check)
-            should_harvest = random.randint(1, 100) <= aggression
-
-            if should_harvest:
-                # 2. Source Monetization based on Strategy
-                if active_strategy == "commerce":
-                    product = await base_monetization_engine.match_viral_to_product(niche, content_id)
-                    if product:
-                        from services.monetization.strategies.commerce import CommerceStrategy
-                        strategy = CommerceStrategy()
-                        commerce_cta = await strategy.generate_cta(niche, content_id)
-                        commerce_info = f"\n- MONETIZATION CTA: {commerce_cta}"
-                
-                elif active_strategy == "affiliate":
-                    aff_product = db.query(AffiliateLinkDB).filter(AffiliateLinkDB.niche == niche).order_by(AffiliateLinkDB.created_at.desc()).first()
-                    if aff_product:
-                        from services.monetization.strategies.affiliate import AffiliateStrategy
-                        strategy = AffiliateStrategy()
-                        affiliate_cta = await strategy.generate_cta(niche, content_id)
-                        affiliate_info = f"\n- MONETIZATION CTA: {affiliate_cta}"
-
-                # 3. Monetization Arbitrage (Reverse Strategy)
-                # If content is deemed high-potential, recommend creating a custom merch design
-                if aggression > 50: # Only for aggressive growth accounts
-                    # In a real scenario, we'd check a 'ViralScore' from DiscoveryService here
-                    # For now, we simulate arbitrage potential
-                    if random.random() > 0.7:
-                        arbitrage_suggestion = await base_auto_merch_service.trigger_auto_merch(niche)
-                        commerce_info += f"\n- ARBITRAGE SUGGESTION: {arbitrage_suggestion}"
+            elif active_strategy == "affiliate":
+                aff_product = db.query(AffiliateLinkDB).filter(AffiliateLinkDB.niche == niche).order_by(AffiliateLinkDB.created_at.desc()).first()
+                if aff_product:
+                    from services.monetization.strategies.affiliate import AffiliateStrategy
+                    strategy = AffiliateStrategy()
+                    affiliate_cta = await strategy.generate_cta(niche, content_id)
+                    affiliate_info = f"\n- MONETIZATION CTA: {affiliate_cta}"
 
-            # Fallback if no real key is configured
-            if not settings.GROQ_API_KEY or settings.GROQ_API_KEY == "your_key_here":
-                # We still want UI to look good, so we try fallback via AIWorker if possible or default hardcoded
-                return self._get_fallback_package(niche, platform, None)
+            # 3. Monetization Arbitrage (Reverse Strategy)
+            # If content is deemed high-potential, recommend creating a custom merch design
+            if aggression > 50: # Only for aggressive growth accounts
+                # In a real scenario, we'd check a 'ViralScore' from DiscoveryService here
+                # For now, we simulate arbitrage potential
+                if random.random() > 0.7:
+                    arbitrage_suggestion = await base_auto_merch_service.trigger_auto_merch(niche)
+                    commerce_info += f"\n- ARBITRAGE SUGGESTION: {arbitrage_suggestion}"
+
+        return commerce_info or affiliate_info
 
-            prompt = f"""
+    @staticmethod
+    def _package_brief(niche: str, platform: str, cta: str) -> str:
+        """Task and field rules of the metadata package prompt (shared with the fused prompt)."""
+        return f"""
             You are a viral content strategist. Generate a high-velocity viral metadata package for a {platform} video in the {niche} niche.
             
-            {f"IMPORTANT: You MUST append the following monetization CTA to the very end of the description exactly as written: {commerce_info or affiliate_info}" if (commerce_info or affiliate_info) else "Focus on high engagement and retention hooks."}
+            {f"IMPORTANT: You MUST append the following monetization CTA to the very end of the description exactly as written: {cta}" if cta else "Focus on high engagement and retention hooks."}
             
             Provide the result in JSON format with the following keys:
             - title: A hook-driven, high-CTR title (max 50 chars)
@@ -76,20 +79,50 @@ class OptimizationService:
             - cta: A strong, urgent call to action
             """
 
-            response_content = await ai_worker.analyze_viral_pattern(prompt)
-            
-            if "Error" in response_content:
-                return self._get_fallback_package(niche, platform)
+    @staticmethod
+    def _has_llm_key() -> bool:
+        return bool(settings.GROQ_API_KEY) and settings.GROQ_API_KEY != "your_key_here"
 
-            try:
+    async def generate_viral_package(self, content_id: str, niche: str, platform: str, bypass_cache: bool = False,
+                                     cta: Optional[str] = None) -> PostMetadata:
+        """
+        Uses shared AIWorker to generate SEO-optimized title, description, and hashtags.
+        Automatically injects relevant affiliate links and CTAs if available.
+        A `cta` already picked for this post (e.g. by a failed fused plan) is
+        reused instead of running the monetization step again.
+        """
+        db = SessionLocal()
+        try:
+            if cta is None:
+                cta = await self._monetization_cta(db, content_id, niche)
+
+            # Fallback if no real key is configured
+            if not self._has_llm_key():
+                # We still want UI to look good, so we try fallback via AIWorker if possible or default hardcoded
+                return self._get_fallback_package(niche, platform, None)
+
+            prompt = self._package_brief(niche, platform, cta)
+
+            async def generate():
+                response_content = await ai_worker.analyze_viral_pattern(prompt)
+                if "Error" in response_content:
+                    raise ValueError(response_content)
                 # Attempt to parse JSON if model returned it
-                if "{" in response_content:
-                    start = response_content.find("{")
-                    end = response_content.rfind("}") + 1
-                    data = json.loads(response_content[start:end])
-                else:
+                if "{" not in response_content:
                     raise ValueError("No JSON found in response")
-                    
+                start = response_content.find("{")
+                end = response_content.rfind("}") + 1
+                return json.loads(response_content[start:end])
+
+            try:
+                # Keyed by content as well: each video keeps its own title across retries
+                data = await llm_memo.get_or_call(
+                    "optimization.viral_package", PACKAGE_PROMPT_VERSION,
+                    {"content_id": content_id, "niche": niche, "platform": platform, "cta": cta},
+                    llm_gateway.model_for("large"),
+                    generate,
+                    bypass=bypass_cache,
+                )
             except (json.JSONDecodeError, ValueError):
                 # Fallback to simple parsing or just use defaults
                 return self._get_fallback_package(niche, platform)
@@ -108,6 +141,79 @@ class OptimizationService:
         finally:
             db.close()
 
+    async def generate_fused_plan(self, content_id: str, niche: str, platform: str, transcript,
+                                  style: str = "Default", visual_insights: Optional[Dict] = None,
+                                  bypass_cache: bool = False
+                                  ) -> Tuple[Optional[VideoStrategy], Optional[PostMetadata], Optional[str]]:
+        """
+        One structured-output call returning both the visual strategy and the
+        viral metadata package, which otherwise take two serialized round
+        trips over the same context.
+
+        Returns (strategy, metadata, cta). Strategy and metadata are None when
+        the key is missing, the call fails or the answer does not validate
+        against VideoStrategy and PostMetadata; callers then fall back to the
+        separate calls, passing `cta` on to generate_viral_package so the
+        monetization step (and its side effects) is not repeated. `cta` is
+        None only if it was never computed.
+        """
+        if not self._has_llm_key():
+            return None, None, None
+
+        db = SessionLocal()
+        try:
+            cta = await self._monetization_cta(db, content_id, niche)
+        except Exception as e:
+            logging.error(f"[Optimization] Fused plan monetization error: {e}")
+            cta = ""
+        finally:
+            db.close()
+
+        full_text = base_strategy_service.transcript_text(transcript)
+        prompt = f"""
+        Produce TWO results for one video in a single JSON answer.
+
+        PART 1 - "strategy":
+        {base_strategy_service.visual_strategy_brief(full_text, niche, style, visual_insights)}
+
+        PART 2 - "package":
+        {self._package_brief(niche, platform, cta)}
+
+        OUTPUT FORMAT (JSON ONLY):
+        {{
+            "strategy": {VISUAL_STRATEGY_FORMAT},
+            "package": {{"title": "...", "description": "...", "hashtags": ["#tag1", "#tag2", "#tag3", "#tag4"], "cta": "..."}}
+        }}
+        """
+
+        def parse(data) -> Tuple[VideoStrategy, PostMetadata]:
+            package = dict(data["package"], best_posting_time="Optimal Time Identified", platform=platform)
+            return VideoStrategy(**data["strategy"]), PostMetadata(**package)
+
+        def valid(data) -> bool:
+            try:
+                parse(data)
+                return True
+            except Exception:
+                return False
+
+        try:
+            data = await llm_memo.get_or_call(
+                "optimization.fused_plan", FUSED_PROMPT_VERSION,
+                {"content_id": content_id, "niche": niche, "platform": platform, "cta": cta,
+                 "transcript": full_text[:2000], "style": style, "visual": visual_insights},
+                llm_gateway.model_for("large"),
+                lambda: llm_gateway.complete_json(
+                    prompt, system=base_strategy_service.editor_system_prompt(style), route="large"
+                ),
+                bypass=bypass_cache,
+                is_valid=valid,
+            )
+            return (*parse(data), cta)
+        except Exception as e:
+            logging.warning(f"[Optimization] Fused plan failed validation, using separate calls: {e}")
+            return None, None, cta
+
     def _get_fallback_package(self, niche, platform, product=None):
         # Return minimal/empty package when API key is not configured
         description = f"Generate content for your {niche} niche."
@@ -2,9 +2,10 @@ from .publisher_base import SocialPublisher
 from .models import PostMetadata
 from typing import Optional
 from .auth import token_manager
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from google.oauth2.credentials import Credentials
+from api.utils.youtube_api import youtube_api
+from api.utils.youtube_quota import COSTS, QuotaExceeded
 
 class YouTubePublisher(SocialPublisher):
     async def upload_video(self, video_path: str, metadata: PostMetadata, account_id: Optional[int] = None) -> Optional[str]:
@@ -18,7 +19,6 @@ class YouTubePublisher(SocialPublisher):
 
         # Build credentials
         creds = Credentials(token=access_token)
-        youtube = build("youtube", "v3", credentials=creds)
 
         body = {
             "snippet": {
@@ -32,17 +32,22 @@ class YouTubePublisher(SocialPublisher):
             }
         }
 
-        insert_request = youtube.videos().insert(
-            part="snippet,status",
-            body=body,
-            media_body=MediaFileUpload(video_path, chunksize=-1, resumable=True)
-        )
-
         try:
             print(f"[YouTubePublisher] Uploading {video_path} to YouTube...")
-            response = insert_request.execute()
+            # Publishing has first call on the shared daily quota
+            response = await youtube_api.execute(
+                lambda yt: yt.videos().insert(
+                    part="snippet,status",
+                    body=body,
+                    media_body=MediaFileUpload(video_path, chunksize=-1, resumable=True)
+                ),
+                credentials=creds, cost=COSTS["videos.insert"], priority="publish",
+            )
             video_id = response.get("id")
             return f"https://youtube.com/shorts/{video_id}"
+        except QuotaExceeded as e:
+            print(f"[YouTubePublisher] Skipped: {e}")
+            return None
         except Exception as e:
             print(f"[YouTubePublisher] FAILED: {str(e)}")
             return None
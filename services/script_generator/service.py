@@ -1,15 +1,9 @@
 import os
-import json
 import logging
 from typing import Dict, Any, List
-from groq import AsyncGroq
-from api.config import settings
+from api.utils.llm_gateway import llm_gateway
 
 class ScriptGenerator:
-    def __init__(self):
-        self.client = AsyncGroq(api_key=settings.GROQ_API_KEY)
-        self.model = "llama-3.3-70b-versatile"
-
     async def generate_script(self, topic: str, niche: str, duration_sec: int = 60, style: str = "story") -> Dict[str, Any]:
         """
         Generates a structured script for a faceless video.
@@ -45,17 +39,9 @@ class ScriptGenerator:
         """
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You output valid JSON for video scripts."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+            return await llm_gateway.complete_json(
+                prompt, system="You output valid JSON for video scripts.", route="large"
             )
-            
-            content = response.choices[0].message.content
-            return json.loads(content)
         except Exception as e:
             logging.error(f"Script Generation Error: {e}")
             return {
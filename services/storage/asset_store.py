@@ -0,0 +1,283 @@
+"""
+Asset Store - Content-addressed local cache for fetched and generated media
+
+Source downloads, stock B-roll, generated images and voiceovers all land here
+as `objects/<sha256><ext>`, written atomically. Source URLs (or any other
+stable key, e.g. a voiceover's engine + text) are recorded as aliases, so a
+second job -- on any worker sharing the volume -- reuses the file instead of
+fetching it again. The store is held to a byte budget by evicting the least
+recently used objects; an object's mtime doubles as its last-access time.
+Job checkouts are hard links (leases the job deletes when done, which pin the
+object meanwhile); anything kept permanently outside the store is a copy.
+"""
+
+import os
+import json
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AssetStore:
+    """
+    Shared store: put (file or bytes) -> object path; lookup(alias) -> object
+    path; checkout(object) -> a per-job hard link the job may delete freely,
+    or a plain copy for persistent destinations.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.root = root or settings.ASSET_STORE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.ASSET_STORE_MAX_BYTES
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.aliases_dir = os.path.join(self.root, "aliases")
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        for path in (self.objects_dir, self.aliases_dir, self.tmp_dir):
+            os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        # Bytes / objects at the last full scan plus those this process added
+        # since; puts only rescan once over budget, stats() never rescans
+        self._known_bytes: Optional[int] = None
+        self._known_objects: Optional[int] = None
+
+    # --- writes -----------------------------------------------------------
+
+    @contextmanager
+    def writer(self, ext: str = "", aliases: Iterable[str] = (), alias_ttl: Optional[int] = None):
+        """
+        Yields a temp path on the store's filesystem to write into; on clean
+        exit the file is committed under its content hash. The committed
+        object path is available afterwards as `handle["path"]`.
+        """
+        tmp_path = os.path.join(self.tmp_dir, f"{uuid.uuid4()}{ext}")
+        handle = {"tmp": tmp_path, "path": None}
+        try:
+            yield handle
+            handle["path"] = self.put_file(tmp_path, aliases=aliases, ext=ext, alias_ttl=alias_ttl)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put_file(self, src_path: str, aliases: Iterable[str] = (), ext: Optional[str] = None,
+                 move: bool = True, alias_ttl: Optional[int] = None) -> str:
+        """Commits a file under its content hash and records its aliases."""
+        ext = os.path.splitext(src_path)[1] if ext is None else ext
+        object_path = os.path.join(self.objects_dir, f"{file_sha256(src_path)}{ext}")
+
+        if os.path.exists(object_path):
+            # Same bytes already stored (re-upload, mirror, regenerated asset)
+            if move:
+                os.remove(src_path)
+            self._touch(object_path)
+        else:
+            staged = src_path
+            if not move or not self._same_fs(src_path):
+                staged = os.path.join(self.tmp_dir, f"{uuid.uuid4()}{ext}")
+                shutil.copy2(src_path, staged)
+                if move:
+                    os.remove(src_path)
+            # Atomic publish: readers never see a partially written object
+            os.replace(staged, object_path)
+            self._touch(object_path)
+            with self._lock:
+                if self._known_bytes is not None:
+                    self._known_bytes += os.path.getsize(object_path)
+                    self._known_objects += 1
+
+        for alias in aliases:
+            self.add_alias(alias, object_path, ttl=alias_ttl)
+        with self._lock:
+            over_budget = self._known_bytes is None or self._known_bytes > self.max_bytes
+        if over_budget:
+            self.evict(keep=object_path)
+        return object_path
+
+    def put_bytes(self, data: bytes, aliases: Iterable[str] = (), ext: str = "",
+                  alias_ttl: Optional[int] = None) -> str:
+        with self.writer(ext, aliases=aliases, alias_ttl=alias_ttl) as handle:
+            with open(handle["tmp"], "wb") as f:
+                f.write(data)
+        return handle["path"]
+
+    def adopt(self, path: str, aliases: Iterable[str] = (), alias_ttl: Optional[int] = None) -> str:
+        """
+        Stores a copy of a file produced in place (e.g. under outputs/). The
+        original is left untouched and unlinked, so it never pins the object.
+        """
+        self.put_file(path, aliases=aliases, move=False, alias_ttl=alias_ttl)
+        return path
+
+    # --- aliases ----------------------------------------------------------
+
+    def _alias_path(self, alias: str) -> str:
+        return os.path.join(self.aliases_dir, hashlib.sha256(alias.encode()).hexdigest())
+
+    def add_alias(self, alias: str, object_path: str, ttl: Optional[int] = None):
+        entry = {"alias": alias, "object": os.path.basename(object_path),
+                 "expires": time.time() + ttl if ttl else None}
+        alias_path = self._alias_path(alias)
+        tmp_path = f"{alias_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, alias_path)
+
+    def lookup(self, *aliases: str) -> Optional[str]:
+        """
+        Object path for the first alias that resolves (counted as one hit),
+        or None (one miss).
+        """
+        path = next((p for p in map(self._resolve, aliases) if p), None)
+        with self._lock:
+            if path:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if path:
+            self._touch(path)
+        return path
+
+    def _resolve(self, alias: str) -> Optional[str]:
+        alias_path = self._alias_path(alias)
+        try:
+            with open(alias_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        object_path = os.path.join(self.objects_dir, entry["object"])
+        expired = entry.get("expires") and entry["expires"] < time.time()
+        if expired or not os.path.exists(object_path):
+            # Evicted object or stale alias: drop it so the next lookup is cheap
+            try:
+                os.remove(alias_path)
+            except OSError:
+                pass
+            return None
+        return object_path
+
+    # --- reads ------------------------------------------------------------
+
+    def checkout(self, object_path: str, dest_dir: str, name: Optional[str] = None,
+                 persistent: bool = False) -> str:
+        """
+        Per-job hard link to a stored object (copy if linking is impossible).
+        The link pins the object against eviction until the job deletes it;
+        destinations nobody cleans up must pass `persistent=True` for a copy.
+        """
+        os.makedirs(dest_dir, exist_ok=True)
+        dest = os.path.join(dest_dir, name or f"{uuid.uuid4()}{os.path.splitext(object_path)[1]}")
+        if os.path.exists(dest):
+            os.remove(dest)
+        if persistent:
+            shutil.copy2(object_path, dest)
+            return dest
+        try:
+            os.link(object_path, dest)
+        except OSError:
+            shutil.copy2(object_path, dest)
+        return dest
+
+    def _touch(self, object_path: str):
+        try:
+            os.utime(object_path, None)
+        except OSError:
+            pass
+
+    def _same_fs(self, path: str) -> bool:
+        try:
+            return os.stat(path).st_dev == os.stat(self.tmp_dir).st_dev
+        except OSError:
+            return False
+
+    # --- eviction & metrics -------------------------------------------------
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """
+        Removes least-recently-used objects until the store fits its budget.
+        Objects still hard-linked into a job directory (st_nlink > 1) are in
+        use and skipped, as is `keep` (the object just written). Returns
+        bytes freed.
+        """
+        entries = self._scan()
+        total = sum(size for _, size, _, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        freed = 0
+        removed = 0
+        for _, size, nlink, path in sorted(entries):
+            if total - freed <= self.max_bytes:
+                break
+            if nlink > 1 or path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            freed += size
+            removed += 1
+            with self._lock:
+                self.evictions += 1
+                self.evicted_bytes += size
+        with self._lock:
+            self._known_bytes = total - freed
+            self._known_objects = len(entries) - removed
+        if freed:
+            logger.info(f"[AssetStore] Evicted {freed / 2**20:.1f} MB (budget {self.max_bytes / 2**30:.1f} GB)")
+        return freed
+
+    def _scan(self):
+        """(mtime, size, nlink, path) of every object; resyncs the running totals."""
+        entries = []
+        for name in os.listdir(self.objects_dir):
+            path = os.path.join(self.objects_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, stat.st_nlink, path))
+        with self._lock:
+            self._known_bytes = sum(size for _, size, _, _ in entries)
+            self._known_objects = len(entries)
+        return entries
+
+    def stats(self) -> Dict:
+        """
+        Counters only: object and byte totals are the running estimates (as
+        of the last scan, plus this process's writes), not a fresh scan.
+        """
+        if self._known_bytes is None:
+            self._scan()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "evicted_bytes": self.evicted_bytes,
+                "objects": self._known_objects,
+                "bytes": self._known_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+asset_store = AssetStore()
@@ -17,5 +17,9 @@ def manage_lifecycle():
         
     loop.run_until_complete(storage_manager.enforce_threshold())
     loop.run_until_complete(storage_manager.apply_retention_policy(days=90))
+
+    # Objects released by finished jobs become evictable once their links are gone
+    from .asset_store import asset_store
+    asset_store.evict()
     
     logging.info("[StorageTasks] Storage lifecycle management complete.")
@@ -16,7 +16,7 @@ import logging
 import asyncio
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
-import aiohttp
+from api.utils.http_client import http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -76,23 +76,23 @@ class TradingService:
                 "apikey": self.alpha_vantage_key
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as resp:
-                    data = await resp.json()
-                    
-                    if "Global Quote" in data:
-                        quote = data["Global Quote"]
-                        return {
-                            "symbol": quote.get("01. symbol"),
-                            "price": float(quote.get("05. price", 0)),
-                            "change": float(quote.get("09. change", 0)),
-                            "change_percent": quote.get("10. change percent", "0%"),
-                            "volume": int(quote.get("06. volume", 0)),
-                            "timestamp": datetime.utcnow().isoformat()
-                        }
-                    
-                    return {}
-                    
+            session = http_clients.session()
+            async with session.get(url, params=params) as resp:
+                data = await resp.json()
+                
+                if "Global Quote" in data:
+                    quote = data["Global Quote"]
+                    return {
+                        "symbol": quote.get("01. symbol"),
+                        "price": float(quote.get("05. price", 0)),
+                        "change": float(quote.get("09. change", 0)),
+                        "change_percent": quote.get("10. change percent", "0%"),
+                        "volume": int(quote.get("06. volume", 0)),
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                
+                return {}
+                
         except Exception as e:
             logger.error(f"Alpha Vantage API error: {e}")
             return {}
@@ -124,22 +124,22 @@ class TradingService:
                 "include_market_cap": "true"
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, params=params) as resp:
-                    data = await resp.json()
-                    
-                    if symbol in data:
-                        quote = data[symbol]
-                        return {
-                            "symbol": symbol,
-                            "price": quote.get("usd", 0),
-                            "change_24h": quote.get("usd_24h_change", 0),
-                            "market_cap": quote.get("usd_market_cap", 0),
-                            "timestamp": datetime.utcnow().isoformat()
-                        }
-                    
-                    return {}
-                    
+            session = http_clients.session()
+            async with session.get(url, params=params) as resp:
+                data = await resp.json()
+                
+                if symbol in data:
+                    quote = data[symbol]
+                    return {
+                        "symbol": symbol,
+                        "price": quote.get("usd", 0),
+                        "change_24h": quote.get("usd_24h_change", 0),
+                        "market_cap": quote.get("usd_market_cap", 0),
+                        "timestamp": datetime.utcnow().isoformat()
+                    }
+                
+                return {}
+                
         except Exception as e:
             logger.error(f"CoinGecko API error: {e}")
             return {}
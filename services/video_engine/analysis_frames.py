@@ -0,0 +1,240 @@
+"""
+Analysis Frames - Decode once, fan out to every analysis stage
+
+A single decoder pass turns a source video into a stack of downscaled BGR
+frames at a fixed analysis rate and stores it as a memory-mapped `.npy` file.
+OCR, VLM keyframe sampling, scene detection and the readability check all read
+from that stack instead of each reopening the file and seeking through it.
+"""
+
+import os
+import json
+import math
+import shutil
+import logging
+import threading
+import subprocess
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from api.config import settings
+from .media_index import media_index
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisFrames:
+    """Read-only view over a decoded frame stack."""
+
+    def __init__(self, frames: np.ndarray, timestamps: List[float], scale: float, source_fps: float):
+        self.frames = frames            # (N, H, W, 3) uint8 BGR, memory-mapped
+        self.timestamps = timestamps    # seconds, one per frame
+        self.scale = scale              # analysis size / source size
+        self.source_fps = source_fps
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def height(self) -> int:
+        return self.frames.shape[1]
+
+    @property
+    def width(self) -> int:
+        return self.frames.shape[2]
+
+    def source_frame(self, i: int) -> int:
+        """Index of analysis frame i in the source video's frame numbering."""
+        return int(round(self.timestamps[i] * self.source_fps))
+
+    def evenly_spaced(self, count: int) -> List[int]:
+        """Indices of `count` frames spread across the timeline."""
+        if not len(self) or count <= 0:
+            return []
+        return sorted({int(i) for i in np.linspace(0, len(self) - 1, num=min(count, len(self)))})
+
+    def scene_changes(self, threshold: float = 0.4) -> List[float]:
+        """
+        Timestamps where the colour histogram jumps (hard cuts), computed on the
+        shared stack without touching the source file.
+        """
+        import cv2
+        cuts = []
+        previous = None
+        for i in range(len(self)):
+            hist = cv2.calcHist([self.frames[i]], [0, 1, 2], None, [8, 8, 8], [0, 256] * 3)
+            hist = cv2.normalize(hist, hist).flatten()
+            if previous is not None:
+                distance = cv2.compareHist(previous, hist, cv2.HISTCMP_BHATTACHARYYA)
+                if distance > threshold:
+                    cuts.append(self.timestamps[i])
+            previous = hist
+        return cuts
+
+
+class AnalysisFrameCache:
+    """
+    Produces (once) and serves AnalysisFrames keyed by media fingerprint.
+
+    Concurrent jobs for the same source share one stack (identical bytes give
+    the same fingerprint), so jobs `acquire()` it and the files are only
+    deleted when the last one calls `release()` with the returned key. Another worker process may
+    still delete it underneath us, so `get()` re-decodes if the files vanish.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or settings.ANALYSIS_FRAMES_DIR
+        self.rate = settings.ANALYSIS_FPS
+        self.max_side = settings.ANALYSIS_MAX_SIDE
+        self.ffmpeg = os.getenv("FFMPEG_BINARY", "ffmpeg")
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._refs: Dict[str, int] = {}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _paths(self, key: str):
+        base = os.path.join(self.cache_dir, f"{key}_{self.rate:g}fps_{self.max_side}")
+        return f"{base}.npy", f"{base}.json"
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, video_path: str) -> AnalysisFrames:
+        """Returns the shared frame stack for video_path, decoding it on first use."""
+        key = media_index.fingerprint(video_path)
+        npy_path, meta_path = self._paths(key)
+
+        for attempt in range(2):
+            with self._lock_for(key):
+                if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+                    self._decode(video_path, npy_path, meta_path)
+            try:
+                with open(meta_path) as f:
+                    meta = json.load(f)
+                frames = np.load(npy_path, mmap_mode="r")[:meta["count"]]
+                return AnalysisFrames(frames, meta["timestamps"], meta["scale"], meta["source_fps"])
+            except FileNotFoundError:
+                # Released by another process between the check and the open
+                if attempt:
+                    raise
+                logger.info(f"[AnalysisFrames] Stack for {video_path} vanished, decoding again")
+
+    def peek(self, video_path: str) -> Optional[AnalysisFrames]:
+        """Returns the stack only if it has already been decoded (never decodes)."""
+        npy_path, meta_path = self._paths(media_index.fingerprint(video_path))
+        if not (os.path.exists(npy_path) and os.path.exists(meta_path)):
+            return None
+        return self.get(video_path)
+
+    def acquire(self, video_path: str) -> str:
+        """
+        Registers a job using video_path's stack. Returns the stack key to
+        pass to `release()` exactly once (the source may be gone by then).
+        """
+        key = media_index.fingerprint(video_path)
+        with self._locks_guard:
+            self._refs[key] = self._refs.get(key, 0) + 1
+        return key
+
+    def release(self, key: str):
+        """Drops the cached stack once no job in this process holds it."""
+        with self._locks_guard:
+            refs = self._refs.get(key, 0) - 1
+            if refs > 0:
+                self._refs[key] = refs
+                return
+            self._refs.pop(key, None)
+        with self._lock_for(key):
+            for path in self._paths(key):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _target_size(self, width: int, height: int):
+        scale = min(1.0, self.max_side / float(max(width, height) or 1))
+        # Even dimensions keep ffmpeg's scaler and the memmap shape in agreement
+        w = max(2, int(width * scale) // 2 * 2)
+        h = max(2, int(height * scale) // 2 * 2)
+        return w, h, w / float(width or 1)
+
+    def _decode(self, video_path: str, npy_path: str, meta_path: str):
+        info = media_index.get(video_path)
+        if not info["has_video"] or not info["width"]:
+            raise RuntimeError(f"No decodable video stream in {video_path}")
+
+        w, h, scale = self._target_size(info["width"], info["height"])
+        capacity = max(1, math.ceil(info["duration"] * self.rate) + 2)
+        tmp_npy = f"{npy_path}.{os.getpid()}.tmp.npy"
+        stack = np.lib.format.open_memmap(tmp_npy, mode="w+", dtype=np.uint8, shape=(capacity, h, w, 3))
+
+        logger.info(f"[AnalysisFrames] Decoding {video_path} -> {capacity} frames @ {w}x{h}")
+        try:
+            count = self._decode_ffmpeg(video_path, stack, w, h) if shutil.which(self.ffmpeg) else 0
+            if count == 0:
+                count = self._decode_opencv(video_path, stack, w, h, info["fps"])
+            if count == 0:
+                raise RuntimeError(f"Decoded no frames from {video_path}")
+            stack.flush()
+            del stack
+            os.replace(tmp_npy, npy_path)
+        except Exception:
+            if os.path.exists(tmp_npy):
+                os.remove(tmp_npy)
+            raise
+        meta = {
+            "count": count,
+            "timestamps": [i / self.rate for i in range(count)],
+            "scale": scale,
+            "source_fps": info["fps"] or 30.0,
+        }
+        tmp_meta = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_meta, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_meta, meta_path)
+
+    def _decode_ffmpeg(self, video_path: str, stack: np.ndarray, w: int, h: int) -> int:
+        """One ffmpeg pass: rate-limit and downscale in the decoder, stream raw BGR."""
+        frame_bytes = w * h * 3
+        proc = subprocess.Popen(
+            [self.ffmpeg, "-v", "error", "-i", video_path, "-an",
+             "-vf", f"fps={self.rate:g},scale={w}:{h}",
+             "-f", "rawvideo", "-pix_fmt", "bgr24", "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        count = 0
+        try:
+            while count < len(stack):
+                buf = proc.stdout.read(frame_bytes)
+                if len(buf) < frame_bytes:
+                    break
+                stack[count] = np.frombuffer(buf, dtype=np.uint8).reshape(h, w, 3)
+                count += 1
+        finally:
+            proc.stdout.close()
+            proc.kill()
+            proc.wait()
+        return count
+
+    def _decode_opencv(self, video_path: str, stack: np.ndarray, w: int, h: int, fps: float) -> int:
+        """Sequential fallback: grab() every frame, retrieve() only the sampled ones."""
+        import cv2
+        cap = cv2.VideoCapture(video_path)
+        step = max(1.0, (fps or 30.0) / self.rate)
+        count, index, next_pick = 0, 0, 0.0
+        try:
+            while count < len(stack) and cap.grab():
+                if index >= next_pick:
+                    ok, frame = cap.retrieve()
+                    if not ok:
+                        break
+                    stack[count] = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+                    count += 1
+                    next_pick += step
+                index += 1
+        finally:
+            cap.release()
+        return count
+
+
+analysis_frames = AnalysisFrameCache()
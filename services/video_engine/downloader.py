@@ -1,27 +1,124 @@
 import os
+import time
 import uuid
+import asyncio
 import logging
+import threading
 import yt_dlp
-from typing import Optional
+from collections import OrderedDict
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from api.config import settings
+from services.storage.asset_store import AssetStore, asset_store
+from .media_index import media_index
+
+# Extracted info dicts carry signed media URLs that expire, so the dict from
+# verification is only reused for a download that follows shortly after.
+INFO_TTL = 600
+TRACKING_PARAMS = {"si", "feature", "pp", "t", "is_from_webapp", "sender_device", "_r", "_t"}
+
+# What the downloaded file is for: transcript extraction only needs audio,
+# analysis only needs small frames, previews need small frames plus audio,
+# and only final renders need full quality.
+PURPOSES = ("audio", "analysis", "preview", "final")
+# A stored download also serves every purpose it is at least as good for
+SATISFIED_BY = {
+    "audio": ("audio", "preview", "final"),
+    "analysis": ("analysis", "preview", "final"),
+    "preview": ("preview", "final"),
+    "final": ("final",),
+}
+
+
+def format_selector(purpose: str) -> str:
+    """yt-dlp format selector for a download purpose."""
+    if purpose == "audio":
+        return "bestaudio/best"
+    if purpose == "analysis":
+        h = settings.DOWNLOAD_PREVIEW_MAX_HEIGHT
+        return f"bestvideo[height<={h}]/best[height<={h}]/worst"
+    h = settings.DOWNLOAD_PREVIEW_MAX_HEIGHT if purpose == "preview" else settings.DOWNLOAD_FINAL_MAX_HEIGHT
+    return f"bestvideo[height<={h}]+bestaudio/best[height<={h}]/best"
+
+
+def canonical_url(url: str) -> str:
+    """
+    Stable identity for a source URL: strips tracking parameters and maps the
+    YouTube URL variants (watch, shorts, youtu.be, m.) to `youtube:<id>`.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    for prefix in ("www.", "m."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = parts.path.rstrip("/")
+    query = [(k, v) for k, v in parse_qsl(parts.query)
+             if k not in TRACKING_PARAMS and not k.startswith("utm_")]
+
+    if host == "youtu.be" and path:
+        return f"youtube:{path.lstrip('/')}"
+    if host.endswith("youtube.com"):
+        if path.startswith("/shorts/"):
+            return f"youtube:{path.split('/')[2]}"
+        video_id = dict(query).get("v")
+        if video_id:
+            return f"youtube:{video_id}"
+    return urlunsplit(("https", host, path, urlencode(sorted(query)), ""))
+
+
+def info_identity(info: Dict) -> Optional[str]:
+    """Extractor-level identity (`youtube:<id>`, `tiktok:<id>`) of an info dict."""
+    if info.get("extractor_key") and info.get("id"):
+        return f"{info['extractor_key'].lower()}:{info['id']}"
+    return None
+
 
 class VideoDownloader:
-    def __init__(self, download_dir: str = "temp/downloads"):
+    """
+    yt-dlp front end: one extraction per URL (verification info is reused for
+    the download), blocking work kept off the event loop, and downloads
+    deduplicated by canonical URL and by content hash.
+
+    Downloads live once in the shared asset store; every job gets its own
+    hard link in `download_dir`, so a job deleting its copy never affects
+    another.
+    """
+
+    def __init__(self, download_dir: str = "temp/downloads", store: Optional[AssetStore] = None):
         self.download_dir = download_dir
+        self.store = store or asset_store
         os.makedirs(self.download_dir, exist_ok=True)
+        os.makedirs(settings.YTDLP_CACHE_DIR, exist_ok=True)
+        self._info: "OrderedDict[str, tuple]" = OrderedDict()
+        self._info_lock = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
 
-    async def download_video(self, url: str) -> Optional[str]:
-        """
-        Downloads a video from a URL and returns the local file path.
-        """
-        from api.config import settings
-        file_id = str(uuid.uuid4())
-        output_path = os.path.join(self.download_dir, f"{file_id}.%(ext)s")
-        
+    def _cookie_path(self, url: str) -> Optional[str]:
+        # Determine cookies path - check multiple locations for Docker compatibility
+        is_tiktok = 'tiktok' in url.lower()
+        is_youtube = 'youtube' in url.lower() or 'youtu.be' in url.lower()
+
+        cookie_path = None
+        if is_tiktok:
+            cookie_path = os.getenv('TIKTOK_COOKIES_FILE') or settings.TIKTOK_COOKIES_PATH
+        elif is_youtube:
+            cookie_path = os.getenv('YOUTUBE_COOKIES_FILE') or settings.YOUTUBE_COOKIES_PATH
+
+        # If relative path, try /app location (Docker mount point)
+        if cookie_path and not os.path.isabs(cookie_path) and not os.path.exists(cookie_path):
+            cookie_path_alt = f"/app/{cookie_path}"
+            if os.path.exists(cookie_path_alt):
+                cookie_path = cookie_path_alt
+
+        if cookie_path and os.path.exists(cookie_path):
+            return cookie_path
+        if cookie_path:
+            print(f"[VideoDownloader] WARNING: Cookie file not found: {cookie_path}")
+        return None
+
+    def _ydl_opts(self, url: str, **overrides) -> Dict:
         ydl_opts = {
-            # More flexible format selector for better compatibility
-            'format': 'bestvideo[height<=1080]+bestaudio/best[height<=1080]/best',
-            'outtmpl': output_path,
-            'merge_output_format': 'mp4',
             'quiet': True,
             'no_warnings': True,
             'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/116.0.0.0 Safari/537.36',
@@ -31,103 +128,138 @@ class VideoDownloader:
                     'player_client': ['android', 'web', 'tv']
                 }
             },
+            # Shared across workers: player JS / signature functions are fetched once
+            'cachedir': settings.YTDLP_CACHE_DIR,
         }
-        
-        # Determine cookies path - check multiple locations for Docker compatibility
-        is_tiktok = 'tiktok' in url.lower()
-        is_youtube = 'youtube' in url.lower() or 'youtu.be' in url.lower()
-        
-        cookie_path = None
-        if is_tiktok:
-            cookie_path = os.getenv('TIKTOK_COOKIES_FILE') or settings.TIKTOK_COOKIES_PATH
-        elif is_youtube:
-            cookie_path = os.getenv('YOUTUBE_COOKIES_FILE') or settings.YOUTUBE_COOKIES_PATH
-        
-        # If relative path, try multiple locations (Docker mounts)
-        if cookie_path and not os.path.isabs(cookie_path):
-            # Try relative to current directory
-            if not os.path.exists(cookie_path):
-                # Try relative to /app (Docker mount point)
-                cookie_path_alt = f"/app/{cookie_path}"
-                if os.path.exists(cookie_path_alt):
-                    cookie_path = cookie_path_alt
-                    print(f"[VideoDownloader] Using cookie at: {cookie_path}")
-        
-        if cookie_path and os.path.exists(cookie_path):
+        cookie_path = self._cookie_path(url)
+        if cookie_path:
             ydl_opts['cookiefile'] = cookie_path
-            print(f"[VideoDownloader] Using cookies: {cookie_path}")
-        elif cookie_path:
-            print(f"[VideoDownloader] WARNING: Cookie file not found: {cookie_path}")
+        ydl_opts.update(overrides)
+        return ydl_opts
+
+    def _lock_for(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def _remember_info(self, key: str, info: Dict):
+        with self._info_lock:
+            self._info[key] = (time.monotonic() + INFO_TTL, info)
+            while len(self._info) > 64:
+                self._info.popitem(last=False)
+
+    def _take_info(self, key: str) -> Optional[Dict]:
+        """Pops a still-fresh info dict (a download consumes and mutates it)."""
+        with self._info_lock:
+            entry = self._info.pop(key, None)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _lookup(self, key: Optional[str], purpose: str = "final") -> Optional[str]:
+        """Stored download for `key` good enough for `purpose`, if any."""
+        if not key:
+            return None
+        return self.store.lookup(*(f"url:{stored}:{key}" for stored in SATISFIED_BY[purpose]))
+
+    async def download_video(self, url: str, purpose: str = "final") -> Optional[str]:
+        """
+        Downloads a video from a URL and returns the local file path.
+        `purpose` (audio, analysis, preview, final) picks the cheapest source
+        format that serves the downstream need.
+        """
+        if purpose not in SATISFIED_BY:
+            raise ValueError(f"Unknown download purpose '{purpose}', expected one of {PURPOSES}")
+        return await asyncio.to_thread(self._download, url, purpose)
+
+    def _download(self, url: str, purpose: str) -> Optional[str]:
+        key = canonical_url(url)
+        with self._lock_for(key):
+            stored = self._lookup(key, purpose)
+            info = None
+            if not stored:
+                info = self._take_info(key)
+                stored = self._lookup(info_identity(info), purpose) if info else None
+            if stored:
+                logging.info(f"[VideoDownloader] Reusing download of {key} for {purpose}")
+                return self.store.checkout(stored, self.download_dir)
+
+            fetched, info = self._fetch(url, info, purpose)
+            if not fetched:
+                return None
+            # Content-addressed: the same bytes under another URL (re-upload, mirror) share one copy
+            aliases = [f"url:{purpose}:{alias}" for alias in {key, info_identity(info or {})} if alias]
+            stored = self.store.put_file(fetched, aliases=aliases, alias_ttl=settings.DOWNLOAD_INDEX_TTL)
+            return self.store.checkout(stored, self.download_dir)
+
+    def _fetch(self, url: str, info: Optional[Dict], purpose: str = "final"):
+        """Runs the download, reusing `info` when verification already extracted it."""
+        # Written inside the store's filesystem so committing it is a rename
+        output_path = os.path.join(self.store.tmp_dir, f"{uuid.uuid4()}.%(ext)s")
+        ydl_opts = self._ydl_opts(
+            url,
+            # Flexible selectors (each ends in a catch-all) for better compatibility
+            format=format_selector(purpose),
+            outtmpl=output_path,
+        )
+        if purpose in ("preview", "final"):
+            ydl_opts['merge_output_format'] = 'mp4'
 
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=True)
-                final_path = ydl.prepare_filename(info)
-                return final_path
+                if info:
+                    # Re-runs format selection on the verified info: no second extraction
+                    result = ydl.process_ie_result(info, download=True)
+                else:
+                    result = ydl.extract_info(url, download=True)
+                return ydl.prepare_filename(result), result
         except Exception as e:
             # Absolute last resort for any format error
             print(f"[VideoDownloader] Broad fallback triggered for {url}. Error: {str(e)}")
             ydl_opts.pop('format', None) # Let yt-dlp decide
             try:
                 with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                    info = ydl.extract_info(url, download=True)
-                    return ydl.prepare_filename(info)
+                    result = ydl.extract_info(url, download=True)
+                    return ydl.prepare_filename(result), result
             except Exception as e2:
                 print(f"[VideoDownloader] Critical Failure for {url}: {str(e2)}")
-                return None
+                return None, None
 
     async def verify_video_asset(self, url: str) -> bool:
         """
         Quickly inspects the URL to ensure it has a valid video stream.
+        The extracted info is kept for the download that follows.
         """
-        from api.config import settings
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'simulate': True,
-            'skip_download': True,
-            # DO NOT specify format here. specifying format leads to "Requested format is not available"
-            # on some platforms if the selector is even slightly off.
-            # Use Android client for YouTube (simpler signature encryption)
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android', 'web', 'tv']
-                }
-            },
-        }
-        
-        # Add cookies for validation bypass
-        is_tiktok = 'tiktok' in url.lower()
-        is_youtube = 'youtube' in url.lower() or 'youtu.be' in url.lower()
-        
-        cookie_path = None
-        if is_tiktok:
-            cookie_path = os.getenv('TIKTOK_COOKIES_FILE') or settings.TIKTOK_COOKIES_PATH
-        elif is_youtube:
-            cookie_path = os.getenv('YOUTUBE_COOKIES_FILE') or settings.YOUTUBE_COOKIES_PATH
+        return await asyncio.to_thread(self._verify, url)
 
-        # If relative path, try /app location for Docker
-        if cookie_path and not os.path.isabs(cookie_path):
-            if not os.path.exists(cookie_path):
-                cookie_path_alt = f"/app/{cookie_path}"
-                if os.path.exists(cookie_path_alt):
-                    cookie_path = cookie_path_alt
+    def _verify(self, url: str) -> bool:
+        key = canonical_url(url)
+        # A stored audio-only download says nothing about the video stream;
+        # one fetched for frames does, once the file is seen to carry video
+        stored = self._lookup(key, "analysis")
+        if stored and self._has_video(stored):
+            return True
 
-        if cookie_path and os.path.exists(cookie_path):
-            ydl_opts['cookiefile'] = cookie_path
+        ydl_opts = self._ydl_opts(
+            url,
+            simulate=True,
+            skip_download=True,
+            # DO NOT specify format here. specifying format leads to "Requested format is not available"
+            # on some platforms if the selector is even slightly off.
+        )
 
         try:
             with yt_dlp.YoutubeDL(ydl_opts) as ydl:
                 info = ydl.extract_info(url, download=False)
                 # Check for video stream (vcodec != 'none')
                 vcodec = info.get('vcodec') or 'none'
-                
+
                 # If we get metadata but vcodec is 'none', it might just be the format selection failed.
                 # As long as we got 'info', the video exists.
                 if vcodec == 'none' and not info.get('formats'):
                      print(f"[VideoDownloader] VALIDATION FAILED: {url} has no formats.")
                      return False
-                     
+
+                self._remember_info(key, info)
                 return True
         except Exception as e:
             # If we see "format is not available", it means the video exists but ytdlp struggled with the selector.
@@ -138,4 +270,12 @@ class VideoDownloader:
             print(f"[VideoDownloader] Validation Error for {url}: {e}")
             return False
 
+    @staticmethod
+    def _has_video(path: str) -> bool:
+        try:
+            return bool(media_index.get(path)["has_video"])
+        except Exception as e:
+            logging.warning(f"[VideoDownloader] Could not probe stored download {path}: {e}")
+            return False
+
 base_video_downloader = VideoDownloader()
@@ -0,0 +1,423 @@
+"""
+FilterGraph Engine - Single-pass native ffmpeg rendering
+
+Compiles the ordered list of enabled VideoFilterDB filters (plus the AI strategy
+parameters) into one ffmpeg filtergraph and renders it in a single decode/encode
+pass, instead of compositing each effect frame-by-frame through MoviePy.
+
+The per-pixel math mirrors the MoviePy effects used by VideoProcessor
+(LumContrast, MultiplyColor, BlackAndWhite) so the two paths stay visually
+interchangeable; `measure_parity` quantifies the difference.
+"""
+
+import os
+import csv
+import random
+import shutil
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Dict, Callable
+from .media_index import media_index
+
+try:
+    import cv2
+    import numpy as np
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Filters whose output does not depend on random draws. Only these are compared
+# when checking parity against the MoviePy path.
+PARITY_SAFE_FILTERS = ("f1", "f2", "f3", "f9", "f10", "f11")
+
+# Mean PSNR (dB) above which two renders are considered visually equivalent
+PARITY_PSNR_THRESHOLD = 30.0
+
+
+def _contrast_lut(lum: float, contrast: float) -> Callable[[str], str]:
+    """Equivalent of moviepy vfx.LumContrast (threshold 127) as a lutrgb expression."""
+    gain = 1.0 + contrast
+    offset = lum - contrast * 127.0
+    return lambda v: f"clip(({v})*{gain:.4f}{offset:+.4f},0,255)"
+
+
+def _colorx_lut(factor: float) -> Callable[[str], str]:
+    """Equivalent of moviepy vfx.MultiplyColor as a lutrgb expression."""
+    return lambda v: f"clip(({v})*{factor:.4f},0,255)"
+
+
+def _glow_lut() -> Callable[[str], str]:
+    """Atmospheric glow (f9): 30% LumContrast(5, 0.1) layer over the source."""
+    inner = _contrast_lut(5, 0.1)
+    return lambda v: f"0.7*({v})+0.3*{inner(v)}"
+
+
+class FilterGraphEngine:
+    """
+    Compiles enabled filter ids into an ffmpeg filtergraph and renders it.
+    """
+
+    def __init__(self, ffmpeg_binary: Optional[str] = None):
+        self.ffmpeg = ffmpeg_binary or os.getenv("FFMPEG_BINARY", "ffmpeg")
+        self._available_filters = None
+
+    def _has_filter(self, name: str) -> bool:
+        """Checks (once) which filters the local ffmpeg build was compiled with."""
+        if self._available_filters is None:
+            try:
+                result = subprocess.run(
+                    [self.ffmpeg, "-hide_banner", "-filters"],
+                    capture_output=True, text=True, timeout=10
+                )
+                self._available_filters = {
+                    parts[1] for parts in (line.split() for line in result.stdout.splitlines())
+                    if len(parts) > 2 and "->" in parts[2]
+                }
+            except Exception as e:
+                logger.warning(f"[FilterGraph] Could not list ffmpeg filters: {e}")
+                self._available_filters = set()
+        return name in self._available_filters
+
+    def probe(self, input_path: str) -> Dict:
+        """Reads width, height, fps, duration and audio presence from the media index."""
+        return media_index.get(input_path)
+
+    def compile(
+        self,
+        enabled_filters: List[str],
+        width: int,
+        height: int,
+        duration: float,
+        strategy: Optional[Dict] = None,
+        font_path: Optional[str] = None,
+        seed: Optional[int] = None,
+        time_offset: float = 0.0
+    ) -> Dict:
+        """
+        Translates the ordered filter ids into ffmpeg video/audio filter chains.
+
+        Consecutive per-pixel colour operations are fused into a single lutrgb
+        so the whole grade costs one table lookup per pixel. `time_offset` shifts
+        the timeline so a segment starting mid-file sees the same `t` (and hence
+        the same leak/jitter/interrupt timing) as a full single-pass render.
+
+        Returns {"video": str, "audio": str, "applied": [...], "skipped": [...]}.
+        """
+        strategy = strategy or {}
+        rng = random.Random(seed)
+        video: List[str] = []
+        audio: List[str] = []
+        applied: List[str] = []
+        skipped: List[str] = []
+        luts: List[Callable[[str], str]] = []
+        if time_offset:
+            video.append(f"setpts=PTS+{time_offset:.6f}/TB")
+
+        def flush_luts():
+            if not luts:
+                return
+            expr = "val"
+            for lut in luts:
+                expr = lut(expr)
+            video.append(f"lutrgb=r='{expr}':g='{expr}':b='{expr}'")
+            luts.clear()
+
+        def add(stage: str):
+            flush_luts()
+            video.append(stage)
+
+        def zoom(factor: float, x: str = "(in_w-out_w)/2", y: str = "(in_h-out_h)/2"):
+            add(f"scale=trunc(iw*{factor:.4f}/2)*2:trunc(ih*{factor:.4f}/2)*2")
+            add(f"crop={width}:{height}:'{x}':'{y}'")
+
+        seen = set()
+        for fid in enabled_filters:
+            if fid in seen:
+                continue
+            seen.add(fid)
+
+            if fid == "f1":  # Mirror Transform
+                add("hflip")
+            elif fid == "f2":  # Dynamic Zoom
+                zoom(1.05)
+            elif fid == "f3":  # HLS Color Grade
+                luts.append(_contrast_lut(0, 0.05))
+            elif fid == "f4":  # Pattern Interrupts ("!" flash every 3s)
+                if not font_path or not self._has_filter("drawtext"):
+                    skipped.append(fid)
+                    continue
+                add(
+                    f"drawtext=fontfile='{font_path}':text='!':fontsize=70:fontcolor=white:"
+                    f"x=(w-tw)/2:y=(h-th)/2:enable='gte(t,2)*lt(mod(t-2,3),0.2)'"
+                )
+            elif fid == "f6":  # Speed Ramping
+                low, high = strategy.get("speed_range", [0.95, 1.05])
+                speed = rng.uniform(low, high)
+                add(f"setpts=PTS/{speed:.4f}")
+                audio.append(f"atempo={speed:.4f}")
+            elif fid == "f7":  # Cinematic Overlays (warm light leak)
+                start = rng.uniform(0, max(duration - 1.0, 0.0))
+                add(
+                    f"drawbox=x=0:y=0:w=iw:h=ih:color=0xFFD2A0@0.08:t=fill:"
+                    f"enable='between(t,{start:.3f},{start + 0.6:.3f})'"
+                )
+            elif fid == "f8":  # Dynamic Jitter (deterministic per-timestamp hash)
+                intensity = float(strategy.get("jitter_intensity", 1.0))
+                phase = rng.uniform(0, 1000)
+                jx = f"{intensity:.3f}*(2*mod(sin(t*12.9898+{phase:.3f})*43758.5453,1)-1)"
+                jy = f"{intensity:.3f}*(2*mod(sin(t*78.233+{phase:.3f})*43758.5453,1)-1)"
+                zoom(1.04 + intensity * 0.01, x=f"(in_w-out_w)/2+{jx}", y=f"(in_h-out_h)/2+{jy}")
+            elif fid == "f9":  # Atmospheric Glow
+                luts.append(_glow_lut())
+            elif fid == "f10":  # Film Grain (contrast texture, as apply_film_grain)
+                luts.append(_contrast_lut(0, 0.08))
+            elif fid == "f11":  # Grayscale (equal-weight, as vfx.BlackAndWhite)
+                add("colorchannelmixer=" + ":".join(["0.3333", "0.3333", "0.3333", "0"] * 3))
+            elif fid == "f12":  # Random Glitch
+                luts.append(_colorx_lut(rng.uniform(0.9, 1.1)))
+                zoom(1.01)
+            else:
+                # f5 (captions) needs a transcript and is rendered by Remotion
+                skipped.append(fid)
+                continue
+            applied.append(fid)
+
+        insights = strategy.get("visual_insights") or {}
+        if insights:
+            mood = str(insights.get("visual_mood", "Neutral")).lower()
+            if "dark" in mood or "mysterious" in mood:
+                luts.append(_contrast_lut(-2, 0.1))
+            elif "energetic" in mood or "bright" in mood:
+                luts.append(_colorx_lut(1.1))
+                luts.append(_contrast_lut(5, 0.05))
+            elif "vintage" in mood or "nostalgic" in mood:
+                luts.append(_colorx_lut(0.95))
+                luts.append(_contrast_lut(0, -0.05))
+            try:
+                low_aesthetic = float(insights.get("aesthetic_rating", 5)) < 4
+            except (TypeError, ValueError):
+                low_aesthetic = False
+            if low_aesthetic and "f9" not in seen:
+                luts.append(_glow_lut())
+
+        flush_luts()
+        if time_offset:
+            video.append("setpts=PTS-STARTPTS")
+        # Keep the encoder happy regardless of the filters applied
+        video.append("format=yuv420p")
+
+        return {
+            "video": ",".join(video),
+            "audio": ",".join(audio),
+            "applied": applied,
+            "skipped": skipped,
+        }
+
+    def build_command(self, input_path: str, output_path: str, graph: Dict,
+                      codec: str = "libx264", has_audio: bool = True) -> List[str]:
+        """Builds the ffmpeg argv for a compiled graph."""
+        cmd = [self.ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+               "-i", input_path, "-map", "0:v:0", "-vf", graph["video"]]
+        if has_audio:
+            cmd += ["-map", "0:a:0?"]
+            if graph["audio"]:
+                cmd += ["-af", graph["audio"]]
+            cmd += ["-c:a", "aac"]
+        else:
+            cmd += ["-an"]
+        cmd += ["-c:v", codec]
+        if codec == "libx264":
+            cmd += ["-preset", "veryfast", "-crf", "20"]
+        cmd += ["-movflags", "+faststart", output_path]
+        return cmd
+
+    def render(
+        self,
+        input_path: str,
+        output_path: str,
+        enabled_filters: List[str],
+        strategy: Optional[Dict] = None,
+        codec: str = "libx264",
+        font_path: Optional[str] = None,
+        seed: Optional[int] = None,
+        info: Optional[Dict] = None
+    ) -> str:
+        """
+        Renders input_path through the compiled filtergraph in one ffmpeg pass.
+        Falls back to libx264 if the requested (hardware) encoder fails.
+        """
+        info = info or self.probe(input_path)
+        graph = self.compile(
+            enabled_filters, info["width"], info["height"], info["duration"],
+            strategy=strategy, font_path=font_path, seed=seed
+        )
+        if graph["skipped"]:
+            logger.info(f"[FilterGraph] Not handled natively: {graph['skipped']}")
+        logger.info(f"[FilterGraph] Rendering {graph['applied']} -> {output_path}")
+
+        self._encode(input_path, output_path, graph, codec, has_audio=info.get("has_audio", True))
+        return output_path
+
+    def _encode(self, input_path: str, output_path: str, graph: Dict, codec: str,
+                has_audio: bool = True, threads: Optional[int] = None) -> str:
+        """Runs one compiled graph, retrying with libx264 if the requested encoder fails."""
+        codecs = [codec] if codec == "libx264" else [codec, "libx264"]
+        last_error = ""
+        for current in codecs:
+            cmd = self.build_command(input_path, output_path, graph, codec=current, has_audio=has_audio)
+            if threads:
+                cmd[-1:-1] = ["-threads", str(threads)]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode == 0:
+                return current
+            last_error = result.stderr.strip()[-500:]
+            logger.warning(f"[FilterGraph] Encoder {current} failed: {last_error}")
+        raise RuntimeError(f"ffmpeg filtergraph render failed: {last_error}")
+
+    def _run(self, cmd: List[str], step: str):
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg {step} failed: {result.stderr.strip()[-500:]}")
+
+    def split_at_keyframes(self, input_path: str, work_dir: str, segment_seconds: float) -> List[Dict]:
+        """
+        Stream-copies the video track into segments of roughly `segment_seconds`.
+        The segment muxer only cuts on keyframes, so no re-encode is needed.
+        Returns [{"path", "start", "end"}, ...] in timeline order.
+        """
+        list_path = os.path.join(work_dir, "segments.csv")
+        self._run([
+            self.ffmpeg, "-y", "-hide_banner", "-loglevel", "error", "-i", input_path,
+            "-map", "0:v:0", "-c", "copy", "-f", "segment",
+            "-segment_time", f"{segment_seconds:.3f}", "-reset_timestamps", "1",
+            "-segment_list", list_path, "-segment_list_type", "csv",
+            os.path.join(work_dir, "src_%04d.mp4")
+        ], "segment split")
+
+        segments = []
+        with open(list_path, newline="") as f:
+            for row in csv.reader(f):
+                if len(row) >= 3:
+                    segments.append({
+                        "path": os.path.join(work_dir, row[0]),
+                        "start": float(row[1]),
+                        "end": float(row[2]),
+                    })
+        return segments
+
+    def render_segmented(
+        self,
+        input_path: str,
+        output_path: str,
+        enabled_filters: List[str],
+        strategy: Optional[Dict] = None,
+        codec: str = "libx264",
+        font_path: Optional[str] = None,
+        seed: Optional[int] = None,
+        info: Optional[Dict] = None,
+        segment_seconds: float = 30.0,
+        workers: Optional[int] = None
+    ) -> str:
+        """
+        Renders long inputs in parallel: split at keyframes, render every segment
+        with the same seed and timeline offset, then stitch with stream copy.
+
+        Each segment is its own ffmpeg process, so a thread pool is enough to keep
+        every core busy (and works inside daemonic Celery prefork children, which
+        may not spawn a multiprocessing pool). Audio is filtered once, in full.
+        """
+        info = info or self.probe(input_path)
+        workers = workers or os.cpu_count() or 1
+        if seed is None:
+            # One draw for the whole job so every segment gets identical parameters
+            seed = random.randrange(2 ** 31)
+
+        work_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(os.path.abspath(output_path)))
+        try:
+            segments = self.split_at_keyframes(input_path, work_dir, segment_seconds)
+            if len(segments) < 2:
+                return self.render(input_path, output_path, enabled_filters, strategy=strategy,
+                                   codec=codec, font_path=font_path, seed=seed, info=info)
+
+            pool_size = min(workers, len(segments))
+            threads_per_segment = max(1, (os.cpu_count() or 1) // pool_size)
+            logger.info(
+                f"[FilterGraph] Rendering {len(segments)} segments on {pool_size} workers "
+                f"({threads_per_segment} threads each), seed={seed}"
+            )
+
+            def render_segment(index_segment):
+                index, segment = index_segment
+                graph = self.compile(
+                    enabled_filters, info["width"], info["height"], info["duration"],
+                    strategy=strategy, font_path=font_path, seed=seed, time_offset=segment["start"]
+                )
+                out = os.path.join(work_dir, f"out_{index:04d}.mp4")
+                self._encode(segment["path"], out, graph, codec, has_audio=False, threads=threads_per_segment)
+                return out
+
+            with ThreadPoolExecutor(max_workers=pool_size) as pool:
+                rendered = list(pool.map(render_segment, enumerate(segments)))
+
+            concat_list = os.path.join(work_dir, "concat.txt")
+            with open(concat_list, "w") as f:
+                for path in rendered:
+                    f.write(f"file '{path}'\n")
+
+            # Audio takes the same filter chain (speed ramp) in one cheap pass
+            graph = self.compile(enabled_filters, info["width"], info["height"], info["duration"],
+                                 strategy=strategy, font_path=font_path, seed=seed)
+            cmd = [self.ffmpeg, "-y", "-hide_banner", "-loglevel", "error",
+                   "-f", "concat", "-safe", "0", "-i", concat_list]
+            if info.get("has_audio", True):
+                cmd += ["-i", input_path, "-map", "0:v:0", "-map", "1:a:0?"]
+                if graph["audio"]:
+                    cmd += ["-af", graph["audio"]]
+                cmd += ["-c:a", "aac"]
+            else:
+                cmd += ["-map", "0:v:0"]
+            cmd += ["-c:v", "copy", "-movflags", "+faststart", output_path]
+            self._run(cmd, "segment stitch")
+            return output_path
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def measure_parity(self, reference_path: str, candidate_path: str, samples: int = 5) -> float:
+        """
+        Returns the mean PSNR (dB) between evenly spaced frames of two renders.
+        Candidate frames are resized to the reference size before comparison.
+        """
+        if not CV2_AVAILABLE:
+            raise RuntimeError("OpenCV not available for parity check")
+
+        ref = cv2.VideoCapture(reference_path)
+        cand = cv2.VideoCapture(candidate_path)
+        try:
+            total = min(int(ref.get(cv2.CAP_PROP_FRAME_COUNT)), int(cand.get(cv2.CAP_PROP_FRAME_COUNT)))
+            if total <= 0:
+                raise RuntimeError("Parity check found no frames to compare")
+            positions = np.linspace(0, total - 1, num=min(samples, total)).astype(int)
+            scores = []
+            for pos in positions:
+                ref.set(cv2.CAP_PROP_POS_FRAMES, int(pos))
+                cand.set(cv2.CAP_PROP_POS_FRAMES, int(pos))
+                ok_ref, ref_frame = ref.read()
+                ok_cand, cand_frame = cand.read()
+                if not (ok_ref and ok_cand):
+                    continue
+                if cand_frame.shape != ref_frame.shape:
+                    cand_frame = cv2.resize(cand_frame, (ref_frame.shape[1], ref_frame.shape[0]))
+                scores.append(min(cv2.PSNR(ref_frame, cand_frame), 100.0))
+            if not scores:
+                raise RuntimeError("Parity check could not decode comparable frames")
+            return float(sum(scores) / len(scores))
+        finally:
+            ref.release()
+            cand.release()
+
+
+filtergraph_engine = FilterGraphEngine()
@@ -0,0 +1,220 @@
+"""
+Media Index - Persistent metadata and keyframe table per media file
+
+Runs a single ffprobe per file and stores the stream metadata (duration, fps,
+resolution, codecs) together with the keyframe/GOP table. Entries are keyed by
+a content fingerprint plus mtime and persisted as JSON, so every stage of a
+job (and every worker on the box) reuses the same probe instead of reopening
+the file with cv2/MoviePy just to read its properties.
+"""
+
+import os
+import json
+import bisect
+import hashlib
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from api.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bytes hashed from each end of the file. Hashing a few MB instead of the whole
+# file keeps fingerprinting O(1) for multi-GB sources.
+FINGERPRINT_CHUNK = 1024 * 1024
+
+
+class MediaIndex:
+    """
+    Serves probed media metadata from memory, then disk, then ffprobe.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None, memory_entries: int = 256):
+        self.index_dir = index_dir or settings.MEDIA_INDEX_DIR
+        self.ffprobe = os.getenv("FFPROBE_BINARY", "ffprobe")
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    def fingerprint(self, path: str) -> str:
+        """Content hash (size + head/tail bytes) combined with the file mtime."""
+        stat = os.stat(path)
+        digest = hashlib.sha256(f"{stat.st_size}:{stat.st_mtime_ns}".encode())
+        with open(path, "rb") as f:
+            digest.update(f.read(FINGERPRINT_CHUNK))
+            if stat.st_size > 2 * FINGERPRINT_CHUNK:
+                f.seek(-FINGERPRINT_CHUNK, os.SEEK_END)
+                digest.update(f.read(FINGERPRINT_CHUNK))
+        return digest.hexdigest()
+
+    def get(self, path: str) -> Dict:
+        """
+        Returns metadata for `path`:
+        {width, height, fps, duration, frame_count, video_codec, audio_codec,
+         has_video, has_audio, keyframes: [seconds], gop_seconds}
+        """
+        key = self.fingerprint(path)
+
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+
+        entry_path = os.path.join(self.index_dir, f"{key}.json")
+        info = None
+        if os.path.exists(entry_path):
+            try:
+                with open(entry_path) as f:
+                    info = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"[MediaIndex] Discarding unreadable entry {entry_path}: {e}")
+
+        if info is None:
+            info = self._probe(path)
+            if info.get("source") == "ffprobe":
+                self._persist(entry_path, info)
+
+        with self._lock:
+            self._memory[key] = info
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+        return info
+
+    def _persist(self, entry_path: str, info: Dict):
+        """Atomic write so concurrent workers never read a half-written entry."""
+        tmp_path = f"{entry_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(info, f)
+            os.replace(tmp_path, entry_path)
+        except OSError as e:
+            logger.warning(f"[MediaIndex] Could not persist entry {entry_path}: {e}")
+
+    def _probe(self, path: str) -> Dict:
+        """One ffprobe call: streams, format and video packet flags (demux only, no decode)."""
+        try:
+            result = subprocess.run(
+                [self.ffprobe, "-v", "error", "-of", "json",
+                 "-show_format", "-show_streams",
+                 "-show_entries", "packet=stream_index,pts_time,flags",
+                 path],
+                capture_output=True, text=True, timeout=120
+            )
+            if result.returncode != 0:
+                raise RuntimeError(result.stderr.strip()[-300:])
+            return self.parse_ffprobe(json.loads(result.stdout))
+        except Exception as e:
+            logger.warning(f"[MediaIndex] ffprobe unavailable for {path} ({e}), probing with OpenCV")
+            return self._probe_opencv(path)
+
+    @staticmethod
+    def parse_ffprobe(data: Dict) -> Dict:
+        """Normalizes ffprobe JSON into the index entry format."""
+        streams = data.get("streams", [])
+        video = next((s for s in streams if s.get("codec_type") == "video"), None)
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+        fps = 0.0
+        if video:
+            rate = video.get("avg_frame_rate") or video.get("r_frame_rate") or "0/1"
+            num, _, den = rate.partition("/")
+            try:
+                fps = float(num) / float(den or 1) if float(den or 1) else 0.0
+            except ValueError:
+                fps = 0.0
+
+        duration = float(data.get("format", {}).get("duration") or (video or {}).get("duration") or 0.0)
+
+        keyframes: List[float] = []
+        if video:
+            index = video.get("index")
+            for packet in data.get("packets", []):
+                if packet.get("stream_index") == index and "K" in packet.get("flags", ""):
+                    try:
+                        keyframes.append(float(packet["pts_time"]))
+                    except (KeyError, ValueError):
+                        continue
+            keyframes.sort()
+
+        frame_count = int((video or {}).get("nb_frames") or 0) or int(round(duration * fps))
+        gop = (keyframes[-1] - keyframes[0]) / (len(keyframes) - 1) if len(keyframes) > 1 else duration
+
+        return {
+            "width": int((video or {}).get("width") or 0),
+            "height": int((video or {}).get("height") or 0),
+            "fps": fps,
+            "duration": duration,
+            "frame_count": frame_count,
+            "video_codec": (video or {}).get("codec_name"),
+            "audio_codec": (audio or {}).get("codec_name"),
+            "has_video": video is not None,
+            "has_audio": audio is not None,
+            "keyframes": keyframes,
+            "gop_seconds": gop,
+            "source": "ffprobe",
+        }
+
+    def _probe_opencv(self, path: str) -> Dict:
+        """Degraded probe when ffprobe is missing: no codec, audio or keyframe data."""
+        import cv2
+        cap = cv2.VideoCapture(path)
+        try:
+            if not cap.isOpened():
+                raise RuntimeError(f"Cannot open video: {path}")
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            return {
+                "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                "fps": fps,
+                "duration": frame_count / fps if fps > 0 else 0.0,
+                "frame_count": frame_count,
+                "video_codec": None,
+                "audio_codec": None,
+                "has_video": frame_count > 0,
+                # Unknown without ffprobe; callers treat the audio map as optional
+                "has_audio": True,
+                "keyframes": [],
+                "gop_seconds": 0.0,
+                # Kept in memory only, so a later ffprobe run can fill the gaps
+                "source": "opencv",
+            }
+        finally:
+            cap.release()
+
+    @staticmethod
+    def _snap(keyframes: List[float], seconds: float) -> float:
+        if not keyframes:
+            return seconds
+        pos = bisect.bisect_right(keyframes, seconds)
+        return keyframes[max(pos - 1, 0)]
+
+    def keyframe_at_or_before(self, path: str, seconds: float) -> float:
+        """Nearest keyframe time <= seconds (a seek there needs no extra decoding)."""
+        return self._snap(self.get(path)["keyframes"], seconds)
+
+    def sample_times(self, path: str, count: int) -> List[float]:
+        """
+        `count` evenly spaced timestamps across the file, snapped to keyframes
+        when a keyframe table is available. Where keyframes are sparser than
+        the samples, targets that would snap onto an already used keyframe
+        keep their exact time instead, so `count` timestamps always come back.
+        """
+        info = self.get(path)
+        duration = info["duration"]
+        if count <= 0 or duration <= 0:
+            return []
+        targets = [duration * (i + 0.5) / count for i in range(count)]
+        if not info["keyframes"]:
+            return targets
+        times = set()
+        for t in targets:
+            kf = self._snap(info["keyframes"], t)
+            times.add(t if kf in times else kf)
+        return sorted(times)
+
+
+media_index = MediaIndex()
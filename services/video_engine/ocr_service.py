@@ -1,67 +1,192 @@
-import easyocr
-import cv2
 import os
 import logging
 import numpy as np
 from typing import List, Dict, Tuple
+from api.config import settings
+from api.utils.model_registry import model_registry
+from .analysis_frames import analysis_frames
+
+# Caption placement works on 5 horizontal bands of the frame
+ZONES = 5
+# Pre-filter: a pixel step brighter/darker than this counts as a stroke edge...
+TEXT_EDGE_THRESHOLD = 32
+# ...and a row (3-row average) needs this share of edge pixels to look like text
+TEXT_ROW_DENSITY = 0.04
+
+
+def spread_order(count: int) -> List[int]:
+    """
+    0..count-1 in bit-reversed order (0, n/2, n/4, 3n/4, ...) so any prefix
+    covers the whole timeline - early exit never sees only the intro.
+    """
+    if count <= 0:
+        return []
+    bits = max(1, (count - 1).bit_length())
+    keys = [int(format(i, f"0{bits}b")[::-1], 2) for i in range(count)]
+    return sorted(range(count), key=keys.__getitem__)
+
+
+def text_likely_zones(frames: np.ndarray) -> np.ndarray:
+    """
+    Cheap text-presence test per zone for a (N, H, W, 3) stack: dense
+    horizontal intensity transitions along rows are characteristic of glyph
+    strokes. Returns a (N, ZONES) bool array.
+    """
+    luma = frames[..., 1].astype(np.int16)
+    edges = np.abs(np.diff(luma, axis=2)) > TEXT_EDGE_THRESHOLD
+    rows = edges.mean(axis=2)
+    # 3-row moving average so single hard edges/noise lines do not qualify
+    padded = np.pad(rows, ((0, 0), (1, 1)), mode="edge")
+    rows = (padded[:, :-2] + padded[:, 1:-1] + padded[:, 2:]) / 3.0
+
+    height = frames.shape[1]
+    bounds = np.linspace(0, height, ZONES + 1).astype(int)
+    return np.stack(
+        [rows[:, bounds[z]:bounds[z + 1]].max(axis=1) >= TEXT_ROW_DENSITY for z in range(ZONES)],
+        axis=1,
+    )
+
+
+def load_easyocr_reader():
+    """
+    Registry loader. This will download models on first run if not present.
+    Raises on failure so the registry does not keep a failed load; the next
+    OCR call retries (e.g. after a transient download error).
+    """
+    try:
+        import easyocr
+        # We use English by default, but can be expanded.
+        reader = easyocr.Reader(['en'], gpu=False) # GPU=False for OCI ARM compatibility
+    except Exception as e:
+        logging.error(f"[OCRService] Failed to initialize EasyOCR: {e}")
+        raise RuntimeError(f"EasyOCR unavailable: {e}") from e
+    logging.info("[OCRService] EasyOCR initialized.")
+    return reader
+
 
 class OCRService:
     def __init__(self):
-        # Initialize reader once. This will download models on first run if not present.
-        # We use English by default, but can be expanded.
-        try:
-            self.reader = easyocr.Reader(['en'], gpu=False) # GPU=False for OCI ARM compatibility
-            logging.info("[OCRService] EasyOCR initialized.")
-        except Exception as e:
-            logging.error(f"[OCRService] Failed to initialize EasyOCR: {e}")
-            self.reader = None
-
-    def detect_text_regions(self, video_path: str, sample_rate: int = 30) -> List[Dict]:
+        self._reader = None
+
+    @property
+    def reader(self):
+        # Loaded on first OCR call via the process-wide model registry;
+        # a failed load is retried on the next call instead of disabling OCR
+        if self._reader is None:
+            try:
+                self._reader = model_registry.get("easyocr")
+            except Exception as e:
+                logging.warning(f"[OCRService] OCR unavailable for this call: {e}")
+        return self._reader
+
+    @reader.setter
+    def reader(self, value):
+        self._reader = value
+
+    def detect_text_regions(self, video_path: str, sample_rate: int = 30, fast: bool = True) -> List[Dict]:
         """
         Samples frames from a video and detects bounding boxes of text.
         Returns a list of regions found.
+
+        Frames come from the shared analysis stack (decoded once per job);
+        boxes are mapped back to source-resolution coordinates. The fast path
+        pre-filters zones with `text_likely_zones`, OCRs only the likely zone
+        crops in batches, and stops once zone occupancy stops changing.
+        `fast=False` runs full-frame OCR on every sampled frame.
         """
         if not self.reader:
             return []
 
-        cap = cv2.VideoCapture(video_path)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        
+        shared = analysis_frames.get(video_path)
+        # sample_rate is expressed in source frames; convert to analysis-frame stride
+        step = max(1, int(round(sample_rate / (shared.source_fps or 30.0) * settings.ANALYSIS_FPS)))
+        sampled = list(range(0, len(shared), step))
+
+        if not fast:
+            return self._detect_full_frames(shared, sampled)
+        return self._detect_zone_crops(shared, sampled)
+
+    def _detection(self, shared, idx: int, bbox, text: str, prob: float, y_offset: int = 0) -> Dict:
+        inv = 1.0 / (shared.scale or 1.0)
+        # bbox is 4 points: tl, tr, br, bl
+        tl, tr, br, bl = bbox
+        return {
+            "frame": shared.source_frame(idx),
+            "text": text,
+            "confidence": prob,
+            "bbox": {
+                "xmin": int(min(tl[0], bl[0]) * inv),
+                "ymin": int((min(tl[1], tr[1]) + y_offset) * inv),
+                "xmax": int(max(tr[0], br[0]) * inv),
+                "ymax": int((max(bl[1], br[1]) + y_offset) * inv)
+            },
+            "normalized_y": ((tl[1] + br[1]) / 2 + y_offset) / shared.height # 0 to 1
+        }
+
+    def _detect_full_frames(self, shared, sampled: List[int]) -> List[Dict]:
         all_detections = []
-        
-        # Sample frames (every 1 second or sample_rate frames)
-        for i in range(0, frame_count, sample_rate):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, i)
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Perform OCR on the frame
+        for idx in sampled:
+            frame = np.ascontiguousarray(shared.frames[idx])
             # EasyOCR returns: [ ([[x,y],[x,y],[x,y],[x,y]], text, confidence), ... ]
-            results = self.reader.readtext(frame)
-            
-            for (bbox, text, prob) in results:
+            for (bbox, text, prob) in self.reader.readtext(frame):
                 if prob > 0.3: # Filter low confidence
-                    # bbox is 4 points: tl, tr, br, bl
-                    tl, tr, br, bl = bbox
-                    all_detections.append({
-                        "frame": i,
-                        "text": text,
-                        "confidence": prob,
-                        "bbox": {
-                            "xmin": int(min(tl[0], bl[0])),
-                            "ymin": int(min(tl[1], tr[1])),
-                            "xmax": int(max(tr[0], br[0])),
-                            "ymax": int(max(bl[1], br[1]))
-                        },
-                        "normalized_y": (tl[1] + br[1]) / (2 * height) # 0 to 1
-                    })
-        
-        cap.release()
+                    all_detections.append(self._detection(shared, idx, bbox, text, prob))
+        return all_detections
+
+    def _detect_zone_crops(self, shared, sampled: List[int]) -> List[Dict]:
+        height, width = shared.height, shared.width
+        bounds = np.linspace(0, height, ZONES + 1).astype(int)
+        zone_h = int(bounds[1])
+        # Crops carry half a zone of context above and below; a fixed crop size
+        # lets EasyOCR batch them
+        crop_h = min(height, 2 * zone_h)
+
+        all_detections = []
+        occupancy, stable = None, 0
+        order = [sampled[i] for i in spread_order(len(sampled))]
+        batch_size = max(1, settings.OCR_BATCH_FRAMES)
+
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            likely = text_likely_zones(np.stack([shared.frames[idx] for idx in batch]))
+
+            crops, owners = [], []
+            for frame_idx, zones in zip(batch, likely):
+                for z in np.flatnonzero(zones):
+                    y0 = int(min(max(0, bounds[z] - zone_h // 2), height - crop_h))
+                    crops.append(np.ascontiguousarray(shared.frames[frame_idx, y0:y0 + crop_h]))
+                    owners.append((frame_idx, z, y0))
+
+            if crops:
+                results = self.reader.readtext_batched(
+                    crops, n_width=width, n_height=crop_h, batch_size=len(crops)
+                )
+                for (frame_idx, z, y0), found in zip(owners, results):
+                    for (bbox, text, prob) in found:
+                        if prob <= 0.3: # Filter low confidence
+                            continue
+                        center = (bbox[0][1] + bbox[2][1]) / 2 + y0
+                        # Only keep text centred in this crop's own zone; the
+                        # context margins belong to the neighbouring crops
+                        if bounds[z] <= center < bounds[z + 1]:
+                            all_detections.append(self._detection(shared, frame_idx, bbox, text, prob, y0))
+
+            current = tuple(self._zone_counts(all_detections) > 0)
+            stable = stable + 1 if current == occupancy else 0
+            occupancy = current
+            if stable >= settings.OCR_STABLE_BATCHES:
+                logging.info(f"[OCRService] Zone occupancy stable after {start + len(batch)}/{len(order)} frames")
+                break
+
         return all_detections
 
+    @staticmethod
+    def _zone_counts(detections: List[Dict]) -> np.ndarray:
+        zones = np.zeros(ZONES, dtype=int)
+        for d in detections:
+            zones[min(int(d["normalized_y"] * ZONES), ZONES - 1)] += 1
+        return zones
+
     def get_caption_strategy(self, video_path: str) -> str:
         """
         Analyzes the video and returns a placement strategy: 'bottom' (default), 'top', or 'center'.
@@ -78,12 +203,7 @@ class OCRService:
         # Zone 3: Lower Middle (0.6-0.8)
         # Zone 4: Bottom (0.8-1.0)
         
-        zones = [0, 0, 0, 0, 0]
-        for d in detections:
-            y = d["normalized_y"]
-            idx = int(y * 5)
-            if idx > 4: idx = 4
-            zones[idx] += 1
+        zones = self._zone_counts(detections).tolist()
             
         logging.info(f"[OCRService] Vertical Density Map: {zones}")
 
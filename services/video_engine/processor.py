@@ -9,6 +9,9 @@ from typing import List, Optional, Dict
 from .transcription import transcription_service
 from .ocr_service import ocr_service
 from .stock_service import stock_service
+from .media_index import media_index
+from .analysis_frames import analysis_frames
+from .filtergraph import filtergraph_engine, PARITY_SAFE_FILTERS, PARITY_PSNR_THRESHOLD
 from api.config import settings
 
 try:
@@ -91,10 +94,24 @@ class VideoProcessor:
         except Exception as e:
             logging.warning(f"[VideoProcessor] Could not check ffmpeg version: {e}")
 
-    async def _verify_video_readable(self, clip: VideoFileClip):
+    async def _verify_video_readable(self, clip: VideoFileClip, input_path: Optional[str] = None):
         """Verify video can be read by iterating frames."""
         import threading
         
+        # Fail fast on files the index already knows have no decodable video
+        if input_path:
+            info = media_index.get(input_path)
+            if not info["has_video"] or info["frame_count"] <= 0:
+                raise RuntimeError(f"Video not readable: no video frames in {input_path}")
+            # A shared analysis decode (if this job already made one) proves the
+            # stream decodes; never start one here -- B-roll clips pass through too
+            try:
+                shared = await asyncio.to_thread(analysis_frames.peek, input_path)
+                if shared is not None and len(shared) > 0:
+                    return
+            except Exception as e:
+                logging.warning(f"[VideoProcessor] Shared decode unavailable, iterating clip: {e}")
+        
         result = {"success": False, "error": None}
         
         def iterate_frames():
@@ -131,13 +148,10 @@ class VideoProcessor:
             fps = clip.fps
             duration = clip.duration
         else:
-            cap = cv2.VideoCapture(input_path)
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = total_frames / fps if fps > 0 else 0
-            cap.release()
+            info = media_index.get(input_path)
+            width, height = info["width"], info["height"]
+            fps = info["fps"]
+            duration = info["duration"]
         
         # Store OpenCV state for processing
         self._opencv_mode = True
@@ -180,7 +194,7 @@ class VideoProcessor:
             # Pre-iterate frames to ensure video is readable (handles ARM64 issues)
             try:
                 await asyncio.wait_for(
-                    self._verify_video_readable(clip),
+                    self._verify_video_readable(clip, input_path),
                     timeout=30
                 )
             except asyncio.TimeoutError:
@@ -209,23 +223,21 @@ class VideoProcessor:
             logging.error("[VideoProcessor] OpenCV not available, cannot fallback")
             raise RuntimeError("Video loading failed and OpenCV fallback unavailable")
         
-        logging.info(f"[VideoProcessor] Probing video with OpenCV: {input_path}")
-        cap = cv2.VideoCapture(input_path)
-        
-        if not cap.isOpened():
-            cap.release()
-            raise RuntimeError(f"OpenCV cannot open video: {input_path}")
+        logging.info(f"[VideoProcessor] Probing video via media index: {input_path}")
+        try:
+            info = media_index.get(input_path)
+        except Exception as e:
+            raise RuntimeError(f"Cannot probe video: {input_path}: {e}")
+        if not info["has_video"]:
+            raise RuntimeError(f"No video stream in: {input_path}")
         
         # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = frame_count / fps if fps > 0 else 0
-        
-        cap.release()
+        fps = info["fps"]
+        width, height = info["width"], info["height"]
+        frame_count = info["frame_count"]
+        duration = info["duration"]
         
-        logging.info(f"[VideoProcessor] OpenCV probe: {width}x{height}, {fps}fps, {duration:.2f}s, {frame_count} frames")
+        logging.info(f"[VideoProcessor] Index probe: {width}x{height}, {fps}fps, {duration:.2f}s, {frame_count} frames")
         
         # Set environment variable to help MoviePy work around issues
         os.environ['FFMPEG_BINARY'] = 'ffmpeg'
@@ -242,16 +254,64 @@ class VideoProcessor:
             logging.error(f"[VideoProcessor] Final video load attempt failed: {e}")
             raise
 
+    def _grain_bank(self, height: int, width: int, size: int = 16, seed: int = 0) -> "np.ndarray":
+        """
+        Precomputes a bank of film-grain textures so frames reuse noise
+        instead of drawing fresh random numbers every frame.
+        """
+        rng = np.random.default_rng(seed)
+        return rng.integers(0, 30, size=(size, height, width, 3), dtype=np.uint8)
+
+    def _transform_opencv_batch(self, batch: "np.ndarray", first_index: int,
+                                enabled_filters: List[str], grain: Optional["np.ndarray"]) -> "np.ndarray":
+        """Applies mirror, 1.05x zoom, grain and grayscale to a (N, H, W, 3) frame stack."""
+        count, height, width = batch.shape[:3]
+
+        # 1+2. Mirror and 1.05x zoom with center crop, folded into one inverse
+        # affine map so each frame is sampled exactly once (same pixel mapping
+        # as flip -> resize -> crop)
+        new_width, new_height = int(width * 1.05), int(height * 1.05)
+        sx, sy = new_width / width, new_height / height
+        start_x, start_y = (new_width - width) // 2, (new_height - height) // 2
+        inverse = np.array([
+            [-1.0 / sx, 0.0, width - 1 - ((start_x + 0.5) / sx - 0.5)],
+            [0.0, 1.0 / sy, (start_y + 0.5) / sy - 0.5],
+        ], dtype=np.float64)
+        out = np.empty_like(batch)
+        for i in range(count):
+            cv2.warpAffine(batch[i], inverse, (width, height), dst=out[i],
+                           flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                           borderMode=cv2.BORDER_REPLICATE)
+
+        if enabled_filters:
+            if "f10" in enabled_filters and grain is not None:  # Film grain
+                idx = (np.arange(first_index, first_index + count)) % len(grain)
+                out = np.minimum(out.astype(np.uint16) + grain[idx], 255).astype(np.uint8)
+            if "f11" in enabled_filters:  # Grayscale (BGR luma weights, as cv2.COLOR_BGR2GRAY)
+                gray = out @ np.array([0.114, 0.587, 0.299], dtype=np.float32)
+                out = np.repeat(np.clip(gray + 0.5, 0, 255).astype(np.uint8)[..., None], 3, axis=3)
+        return out
+
     def _process_video_opencv(self, input_path: str, output_name: str, 
                              enabled_filters: List[str] = None, 
-                             strategy: Dict = None) -> str:
+                             strategy: Dict = None,
+                             batch_size: int = 16) -> str:
         """
         Full video processing pipeline using OpenCV when MoviePy fails.
         This is a fallback that applies basic transformations.
+
+        Decode, transform and encode run concurrently: a decoder thread reads
+        batches of frames, a worker pool applies vectorized NumPy transforms to
+        whole frame stacks, and the calling thread writes results in order.
+        Bounded queues keep memory flat when encoding falls behind.
         """
         if not CV2_AVAILABLE:
             raise RuntimeError("OpenCV not available")
         
+        import queue
+        import threading
+        from concurrent.futures import ThreadPoolExecutor
+
         logging.info(f"[VideoProcessor] Processing video with OpenCV: {input_path}")
         
         cap = cv2.VideoCapture(input_path)
@@ -268,50 +328,170 @@ class VideoProcessor:
         output_path = os.path.join(self.output_dir, output_name)
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-        
-        frame_count = 0
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Apply transformations
-            # 1. Mirror (horizontal flip)
-            frame = cv2.flip(frame, 1)
-            
-            # 2. Slight resize (to change hash)
-            scale = 1.05
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
-            
-            # Crop back to original size
-            start_x = (new_width - width) // 2
-            start_y = (new_height - height) // 2
-            frame = frame[start_y:start_y+height, start_x:start_x+width]
-            
-            # Apply enabled filters
-            if enabled_filters:
-                if "f10" in enabled_filters:  # Film grain
-                    noise = np.random.randint(0, 30, frame.shape, dtype=np.uint8)
-                    frame = cv2.add(frame, noise)
-                if "f11" in enabled_filters:  # Grayscale
-                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                    frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
-            
-            out.write(frame)
-            frame_count += 1
-            
-            # Progress logging
-            if frame_count % 30 == 0:
-                logging.info(f"[OpenCV] Processed {frame_count}/{total_frames} frames")
-        
-        cap.release()
-        out.release()
+
+        enabled_filters = enabled_filters or []
+        grain = self._grain_bank(height, width) if "f10" in enabled_filters else None
+        # Memory is bounded by frames in flight, a fixed budget that does not
+        # grow with the core count; no point in more workers than queued batches
+        inflight_batches = max(1, settings.OPENCV_MAX_INFLIGHT_FRAMES // batch_size)
+        workers = max(1, min((os.cpu_count() or 2) - 1, inflight_batches))
+        # Futures in submission order; the bound applies backpressure to the decoder
+        pending: "queue.Queue" = queue.Queue(maxsize=inflight_batches)
+        stop = threading.Event()
+        decode_error = []
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            def decode():
+                try:
+                    index = 0
+                    while not stop.is_set():
+                        frames = []
+                        while len(frames) < batch_size:
+                            ret, frame = cap.read()
+                            if not ret:
+                                break
+                            frames.append(frame)
+                        if not frames:
+                            break
+                        future = pool.submit(self._transform_opencv_batch, np.stack(frames),
+                                             index, enabled_filters, grain)
+                        pending.put(future)
+                        index += len(frames)
+                        if len(frames) < batch_size:
+                            break
+                except Exception as e:
+                    decode_error.append(e)
+                finally:
+                    pending.put(None)
+
+            decoder = threading.Thread(target=decode, name="opencv-decode", daemon=True)
+            decoder.start()
+
+            frame_count = 0
+            batches = 0
+            try:
+                while True:
+                    future = pending.get()
+                    if future is None:
+                        break
+                    transformed = future.result()
+                    for frame in transformed:
+                        out.write(frame)
+                    frame_count += len(transformed)
+                    batches += 1
+                    
+                    # Progress logging
+                    if batches % 8 == 0:
+                        logging.info(f"[OpenCV] Processed {min(frame_count, total_frames)}/{total_frames} frames")
+            finally:
+                stop.set()
+                # Drain so a blocked decoder can exit
+                while decoder.is_alive():
+                    try:
+                        pending.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+                cap.release()
+                out.release()
+
+        if decode_error:
+            raise RuntimeError(f"OpenCV decode failed: {decode_error[0]}")
         
         logging.info(f"[VideoProcessor] OpenCV processing complete: {output_path}")
         return output_path
 
+    def render_filter_chain(self, input_path: str, output_name: str,
+                            enabled_filters: List[str],
+                            strategy: Optional[Dict] = None) -> str:
+        """
+        Renders the enabled filters as one native ffmpeg filtergraph
+        (single decode/encode pass, no per-frame Python callbacks).
+        Inputs longer than RENDER_SEGMENT_MIN_DURATION are rendered segment-parallel.
+        """
+        output_path = os.path.join(self.output_dir, output_name)
+        font_path = self.font_path if os.path.exists(self.font_path) else None
+        info = filtergraph_engine.probe(input_path)
+        workers = settings.RENDER_WORKERS or os.cpu_count() or 1
+
+        # Long inputs are split at keyframes and rendered across all cores
+        if workers > 1 and info["duration"] >= settings.RENDER_SEGMENT_MIN_DURATION:
+            return filtergraph_engine.render_segmented(
+                input_path,
+                output_path,
+                enabled_filters,
+                strategy=strategy,
+                codec=self.codec,
+                font_path=font_path,
+                info=info,
+                segment_seconds=settings.RENDER_SEGMENT_SECONDS,
+                workers=workers
+            )
+
+        return filtergraph_engine.render(
+            input_path,
+            output_path,
+            enabled_filters,
+            strategy=strategy,
+            codec=self.codec,
+            font_path=font_path,
+            info=info
+        )
+
+    def _apply_reference_filter(self, clip: VideoFileClip, filter_id: str) -> VideoFileClip:
+        """MoviePy implementation of a parity-safe filter, used as the reference render."""
+        if filter_id == "f1":
+            return clip.with_effects([vfx.MirrorX()])
+        if filter_id == "f2":
+            w, h = clip.size
+            zoomed = clip.resized(height=int(h * 1.05))
+            return zoomed.cropped(width=w, height=h, x_center=zoomed.w / 2, y_center=zoomed.h / 2)
+        if filter_id == "f3":
+            return clip.with_effects([vfx.LumContrast(lum=0, contrast=0.05)])
+        if filter_id == "f9":
+            return self.apply_atmospheric_glow(clip)
+        if filter_id == "f10":
+            return self.apply_film_grain(clip)
+        if filter_id == "f11":
+            return self.apply_grayscale(clip)
+        return clip
+
+    def verify_filtergraph_parity(self, input_path: str, enabled_filters: List[str],
+                                  sample_seconds: float = 3.0) -> Dict:
+        """
+        Renders the first seconds of input_path through both the MoviePy effects and
+        the ffmpeg filtergraph and compares them. Only deterministic filters are
+        compared, since random draws (leaks, jitter, speed) differ between paths.
+        """
+        filters = [f for f in enabled_filters if f in PARITY_SAFE_FILTERS]
+        token = uuid.uuid4().hex[:8]
+        sample_path = os.path.join(self.output_dir, f"parity_src_{token}.mp4")
+        reference_path = os.path.join(self.output_dir, f"parity_ref_{token}.mp4")
+        candidate_name = f"parity_ffmpeg_{token}.mp4"
+        candidate_path = os.path.join(self.output_dir, candidate_name)
+
+        source = VideoFileClip(input_path, audio=False)
+        try:
+            sample = source.subclipped(0, min(sample_seconds, source.duration))
+            sample.write_videofile(sample_path, codec="libx264", audio=False, logger=None)
+
+            reference = sample
+            for filter_id in filters:
+                reference = self._apply_reference_filter(reference, filter_id)
+            reference.write_videofile(reference_path, codec="libx264", audio=False, logger=None)
+
+            self.render_filter_chain(sample_path, candidate_name, filters)
+            psnr = filtergraph_engine.measure_parity(reference_path, candidate_path)
+        finally:
+            source.close()
+            for path in (sample_path, reference_path, candidate_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        passed = psnr >= PARITY_PSNR_THRESHOLD
+        log = logging.info if passed else logging.warning
+        log(f"[VideoProcessor] Filtergraph parity for {filters}: {psnr:.2f} dB (passed={passed})")
+        return {"filters": filters, "psnr": psnr, "passed": passed}
+
     def apply_originality_transformation(self, input_path: str, output_name: str) -> str:
         """
         Applies 'Copyright-Safe' transformations:
@@ -319,7 +499,15 @@ class VideoProcessor:
         - Remove dead space (simple silent part removal placeholder)
         - Add new hook overlay
         - Insert pattern interrupts
+
+        Runs as a single ffmpeg pass (mirror, zoom, grade, interrupts), falling
+        back to MoviePy compositing if the native render fails.
         """
+        try:
+            return self.render_filter_chain(input_path, output_name, ["f1", "f2", "f3", "f4"])
+        except Exception as e:
+            logging.warning(f"[VideoProcessor] Filtergraph render failed, using MoviePy: {e}")
+
         clip = VideoFileClip(input_path)
         
         # 1. Basic Transformation: Mirror and slightly zoom to change hash
@@ -510,18 +698,17 @@ class VideoProcessor:
         Takes a static 4K image and applies cinematic zooming/panning to create a video.
         Uses pure CPU-based moviepy logic.
         """
-        import httpx
         from moviepy import ImageClip
+        from api.utils.http_download import stream_download
         
         logging.info(f"[VideoProcessor] Applying cinematic motion to 4K asset: {image_url[:50]}...")
         
-        # 1. Download base image
-        temp_image = os.path.join("temp", f"lite4k_base_{uuid.uuid4()}.jpg")
+        # 1. Download base image over the shared connection pool. Not put in the
+        # asset store: every lite4k URL carries a fresh random seed, so it would
+        # never be read again. Non-2xx answers raise instead of becoming a .jpg.
         os.makedirs("temp", exist_ok=True)
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(image_url, follow_redirects=True)
-            with open(temp_image, "wb") as f:
-                f.write(resp.content)
+        temp_image = os.path.join("temp", f"lite4k_base_{uuid.uuid4()}.jpg")
+        await stream_download(image_url, temp_image)
 
         # 2. Create ImageClip at 4K resolution
         clip = ImageClip(temp_image).with_duration(duration)
@@ -654,7 +841,13 @@ class VideoProcessor:
             
         except Exception as e:
             logging.error(f"[VideoProcessor] Remotion pipeline failed: {e}. Falling back to basic ffmpeg.")
-            # Basic fallback: just return the input or do a simple copy
-            return input_path
+            try:
+                return await asyncio.to_thread(
+                    self.render_filter_chain, input_path, output_name, enabled_filters or [], strategy
+                )
+            except Exception as fe:
+                logging.error(f"[VideoProcessor] Filtergraph fallback failed: {fe}")
+                # Last resort: return the untouched input
+                return input_path
 
 base_video_processor = VideoProcessor()
@@ -1,9 +1,12 @@
-import httpx
 import os
 import logging
 import random
 from typing import List, Optional
+from api.config import settings
 from api.utils.vault import get_secret
+from api.utils.http_client import http_clients
+from api.utils.http_download import stream_download
+from services.storage.asset_store import asset_store
 
 class StockService:
     def __init__(self):
@@ -20,41 +23,41 @@ class StockService:
             return []
 
         try:
-            async with httpx.AsyncClient() as client:
-                params = {
-                    "query": keyword,
-                    "per_page": 5,
-                    "orientation": "portrait" # Prioritize vertical for Shorts/TikTok
-                }
+            client = http_clients.client(self.base_url)
+            params = {
+                "query": keyword,
+                "per_page": 5,
+                "orientation": "portrait" # Prioritize vertical for Shorts/TikTok
+            }
+            response = await client.get(f"{self.base_url}/search", params=params, headers=self.headers)
+            response.raise_for_status()
+            data = response.json()
+            
+            videos = data.get("videos", [])
+            if not videos:
+                # Fallback to horizontal if no portrait found
+                params["orientation"] = "landscape"
                 response = await client.get(f"{self.base_url}/search", params=params, headers=self.headers)
-                response.raise_for_status()
-                data = response.json()
-                
-                videos = data.get("videos", [])
-                if not videos:
-                    # Fallback to horizontal if no portrait found
-                    params["orientation"] = "landscape"
-                    response = await client.get(f"{self.base_url}/search", params=params, headers=self.headers)
-                    videos = response.json().get("videos", [])
+                videos = response.json().get("videos", [])
 
-                if not videos:
-                    return []
+            if not videos:
+                return []
 
-                # Randomly pick from top results
-                results = []
-                for _ in range(min(count, len(videos))):
-                    video = random.choice(videos)
-                    # Find best file (HD or SD)
-                    video_files = video.get("video_files", [])
-                    # Prefer HD mp4
-                    best_file = next((f for f in video_files if f.get("quality") == "hd" and f.get("file_type") == "video/mp4"), None)
-                    if not best_file:
-                        best_file = video_files[0] if video_files else None
-                    
-                    if best_file:
-                        results.append(best_file["link"])
+            # Randomly pick from top results
+            results = []
+            for _ in range(min(count, len(videos))):
+                video = random.choice(videos)
+                # Find best file (HD or SD)
+                video_files = video.get("video_files", [])
+                # Prefer HD mp4
+                best_file = next((f for f in video_files if f.get("quality") == "hd" and f.get("file_type") == "video/mp4"), None)
+                if not best_file:
+                    best_file = video_files[0] if video_files else None
                 
-                return results
+                if best_file:
+                    results.append(best_file["link"])
+            
+            return results
         except Exception as e:
             logging.error(f"[StockService] Error fetching B-roll for '{keyword}': {e}")
             return []
@@ -62,21 +65,23 @@ class StockService:
     async def download_stock_video(self, url: str, output_dir: str = "temp") -> Optional[str]:
         """
         Downloads a stock video file to a local path.
+        Clips already fetched by any job are served from the asset store.
         """
         os.makedirs(output_dir, exist_ok=True)
         filename = f"stock_{os.path.basename(url.split('?')[0])}.mp4"
         if not filename.endswith(".mp4"):
             filename += ".mp4"
             
-        filepath = os.path.join(output_dir, filename)
-        
+        alias = f"stock:{url}"
+        stored = asset_store.lookup(alias)
+        if stored:
+            return asset_store.checkout(stored, output_dir, filename, persistent=True)
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(url, follow_redirects=True)
-                response.raise_for_status()
-                with open(filepath, "wb") as f:
-                    f.write(response.content)
-                return filepath
+            # Streamed to disk (resumed on a dropped connection), never buffered in memory
+            with asset_store.writer(".mp4", aliases=[alias]) as handle:
+                await stream_download(url, handle["tmp"], max_bytes=settings.STOCK_DOWNLOAD_MAX_BYTES)
+            return asset_store.checkout(handle["path"], output_dir, filename, persistent=True)
         except Exception as e:
             logging.error(f"[StockService] Error downloading {url}: {e}")
             return None
@@ -9,6 +9,7 @@ import subprocess
 from pathlib import Path
 from bs4 import BeautifulSoup
 import uuid
+from api.utils.http_download import DownloadError, stream_download
 
 logger = logging.getLogger("StoryboardService")
 logging.basicConfig(level=logging.INFO)
@@ -102,21 +103,17 @@ class StoryboardService:
         
         while True:
             try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(download_url, timeout=10) as r:
-                        if r.status == 200:
-                            logger.info(f"   📥 Downloading {job_id} to local disk...")
-                            content = await r.read()
-                            with open(output_path, 'wb') as f:
-                                f.write(content)
-                            logger.info(f"   ✅ Saved clip: {output_path}")
-                            return True
-                        elif r.status == 404:
-                            # Not ready yet
-                            await asyncio.sleep(15)
-                        else:
-                            logger.warning(f"Unexpected status {r.status}")
-                            await asyncio.sleep(15)
+                # Streamed straight to disk; an interrupted transfer resumes where it stopped
+                await stream_download(download_url, output_path)
+                logger.info(f"   ✅ Saved clip: {output_path}")
+                return True
+            except DownloadError as e:
+                if e.status == 404:
+                    # Not ready yet
+                    await asyncio.sleep(15)
+                else:
+                    logger.warning(f"Download of {job_id} failed: {e}")
+                    await asyncio.sleep(15)
             except Exception as e:
                 logger.warning(f"Connection error: {e}")
                 await asyncio.sleep(15)
@@ -2,7 +2,7 @@ import logging
 import json
 from typing import Optional, Dict, List
 from api.utils.vault import get_secret
-import httpx
+from api.utils.http_client import http_clients
 import os
 import asyncio
 import uuid
@@ -239,9 +239,9 @@ class GenerativeService:
                     "resolution": "720p",
                     "duration_seconds": 5
                 }
-                async with httpx.AsyncClient(timeout=300) as client:
-                    response = await client.post(f"{render_node_url}/generate", json=payload)
-                    
+                client = http_clients.client(render_node_url)
+                response = await client.post(f"{render_node_url}/generate", json=payload, timeout=300)
+
                 if response.status_code == 200:
                     data = response.json()
                     job_id = data.get("job_id")
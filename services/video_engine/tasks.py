@@ -2,6 +2,7 @@ from api.utils.celery import celery_app
 
 from .processor import VideoProcessor
 from .downloader import base_video_downloader
+from .analysis_frames import analysis_frames
 from services.optimization.youtube_publisher import base_youtube_publisher
 from services.optimization.service import base_optimization_service
 import asyncio
@@ -40,6 +41,8 @@ def download_and_process_task(self, source_url: str, niche: str, platform: str,
     
     task_id = self.request.id
     db = SessionLocal()
+    # Analysis stack held by this job; released exactly once in `finally`
+    frames_key = None
     
     def update_job(status=None, progress=None, output_path=None):
         # Fresh session for each status update to avoid context leaks in prefork
@@ -72,7 +75,10 @@ def download_and_process_task(self, source_url: str, niche: str, platform: str,
             }
 
         update_job(status="Downloading", progress=10)
-        video_path = run_async(base_video_downloader.download_video(source_url))
+        # Previews (Test Drive) render from a low-res source; only final renders pull full quality
+        video_path = run_async(base_video_downloader.download_video(
+            source_url, purpose="preview" if preview_only else "final"
+        ))
         if not video_path:
             update_job(status="Failed", progress=0)
             return {"status": "error", "message": "Download failed"}
@@ -80,6 +86,13 @@ def download_and_process_task(self, source_url: str, niche: str, platform: str,
         # B. Analyze Visuals via Gemini (VLM)
         update_job(status="Analyzing Visuals", progress=35)
         from .vlm_service import vlm_service
+        # Decode once; VLM, OCR and readability checks all read this stack
+        frames_key = analysis_frames.acquire(video_path)
+        try:
+            analysis_frames.get(video_path)
+        except Exception as e:
+            # Best effort: VLM and OCR fall back to their own sampling
+            logging.warning(f"[Task] Shared analysis decode failed, continuing without it: {e}")
         visual_insights = run_async(vlm_service.analyze_video_content(video_path))
         
         # C. Generate Strategy via Groq (Integrated Scraper + VLM Intelligence)
@@ -87,7 +100,14 @@ def download_and_process_task(self, source_url: str, niche: str, platform: str,
         from services.decision_engine.service import base_strategy_service
         # We need a transcript placeholder or actual extraction
         transcript = "Visual-only analysis conducted." 
-        strategy_obj = run_async(base_strategy_service.generate_visual_strategy(transcript, niche, style=style, visual_insights=visual_insights))
+        strategy_obj, metadata, cta = None, None, None
+        if settings.FUSED_ANALYSIS:
+            # Strategy and SEO package from one round-trip instead of two serialized ones
+            strategy_obj, metadata, cta = run_async(base_optimization_service.generate_fused_plan(
+                task_id, niche, platform, transcript, style=style, visual_insights=visual_insights
+            ))
+        if strategy_obj is None:
+            strategy_obj = run_async(base_strategy_service.generate_visual_strategy(transcript, niche, style=style, visual_insights=visual_insights))
         strategy = strategy_obj.dict()
         logging.info(f"[Task] AI Combined Strategy: {strategy['vibe']} (Style: {style}, Speed: {strategy['speed_range']}, Jitter: {strategy['jitter_intensity']})")
         if visual_insights.get("visual_mood"):
@@ -147,7 +167,9 @@ def download_and_process_task(self, source_url: str, niche: str, platform: str,
         
         # 3. Generate SEO metadata/package (USING REAL SERVICE)
         update_job(status="Optimizing", progress=70)
-        metadata = run_async(base_optimization_service.generate_viral_package(task_id, niche, platform))
+        if metadata is None:
+            # Reuses the CTA a failed fused plan already picked
+            metadata = run_async(base_optimization_service.generate_viral_package(task_id, niche, platform, cta=cta))
         
         # 3.5 Storage (Upload to S3 or prepare local URL)
         from services.storage.service import base_storage_service
@@ -205,11 +227,17 @@ def download_and_process_task(self, source_url: str, niche: str, platform: str,
         update_job(status="Failed")
         logging.error(f"[Celery Task] ERROR: {e}")
         # Ensure cleanup on failure
-        if 'video_path' in locals(): cleanup_local_files(video_path)
+        if 'video_path' in locals() and video_path:
+            cleanup_local_files(video_path)
         if 'processed_path' in locals() and settings.STORAGE_PROVIDER != "LOCAL":
              cleanup_local_files(processed_path)
         return {"status": "error", "message": str(e)}
     finally:
+        if frames_key:
+            try:
+                analysis_frames.release(frames_key)
+            except Exception as e:
+                logging.warning(f"[Task] Could not release analysis frames: {e}")
         db.close()
 @celery_app.task(name="video.generate", bind=True)
 def generate_video_task(self, prompt: str, engine: str, style: str, aspect_ratio: str, user_id: int):
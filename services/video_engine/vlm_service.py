@@ -1,13 +1,40 @@
 import google.generativeai as genai
 import cv2
+import numpy as np
+import io
 import os
+import shutil
 import logging
 import json
 import httpx
 import base64
+import math
+import subprocess
 from typing import List, Dict, Optional
 from api.utils.vault import get_secret
 from api.config import settings
+from api.utils.cache import TwoTierCache
+from api.utils.hedging import LatencyTracker, hedged_call
+from .analysis_frames import analysis_frames
+from .media_index import media_index
+
+# Longest side of frames sent to vision models
+VLM_FRAME_MAX_SIDE = 1024
+
+# Bump whenever a tier prompt or output schema changes so cached analyses
+# produced by the old prompt are no longer served.
+VLM_PROMPT_VERSION = "v1"
+
+# Longest side of a tiled contact sheet (tiles shrink as keyframe count grows)
+CONTACT_SHEET_MAX_SIDE = 1536
+
+FRAME_PROMPT = "Analyze this video frame. Output JSON with: visual_mood, detected_subjects, lighting_quality, dominant_colors, aesthetic_rating (1-10)."
+FRAMES_PROMPT = "Analyze these video frames. Output JSON with: visual_mood, detected_subjects, lighting_quality, dominant_colors, edit_direction, aesthetic_rating (1-10)."
+CONTACT_SHEET_PROMPT = (
+    "This image is a contact sheet of {count} keyframes from one video, numbered in timeline order "
+    "(left to right, top to bottom). Analyze the video as a whole. Output JSON with: visual_mood, "
+    "detected_subjects, lighting_quality, dominant_colors, edit_direction, aesthetic_rating (1-10)."
+)
 
 class VLMService:
     def __init__(self):
@@ -31,63 +58,189 @@ class VLMService:
         else:
             self.groq_client = None
 
-    def _sample_keyframes(self, video_path: str, num_frames: int = 5) -> List[str]:
-        """Samples keyframes and returns paths."""
-        temp_dir = "temp_frames"
-        os.makedirs(temp_dir, exist_ok=True)
-        cap = cv2.VideoCapture(video_path)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        if total_frames <= 0:
-            cap.release()
+        self.result_cache = TwoTierCache("vlm", ttl=settings.VLM_CACHE_TTL)
+        self.latency = LatencyTracker()
+
+    @staticmethod
+    def _encode_jpeg(frame: np.ndarray) -> bytes:
+        ok, buf = cv2.imencode(".jpg", np.ascontiguousarray(frame), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        if not ok:
+            raise RuntimeError("JPEG encoding failed")
+        return buf.tobytes()
+
+    def _sample_keyframes(self, video_path: str, num_frames: int = 5) -> List[bytes]:
+        """
+        Samples keyframes as in-memory JPEG buffers owned by the calling job.
+        Nothing touches disk, so concurrent jobs cannot overwrite each other.
+        """
+        # Reuse the shared analysis stack when this job already decoded it
+        shared = analysis_frames.peek(video_path)
+        if shared is not None and len(shared):
+            return [self._encode_jpeg(shared.frames[idx]) for idx in shared.evenly_spaced(num_frames)]
+
+        try:
+            frames = self._extract_keyframes_ffmpeg(video_path, num_frames)
+            if frames:
+                return frames
+        except Exception as e:
+            logging.warning(f"[VLMService] ffmpeg keyframe select failed: {e}")
+
+        shared = analysis_frames.get(video_path)
+        return [self._encode_jpeg(shared.frames[idx]) for idx in shared.evenly_spaced(num_frames)]
+
+    def _extract_keyframes_ffmpeg(self, video_path: str, num_frames: int) -> List[bytes]:
+        """
+        One ffmpeg `select` pass over the file. When the media index has enough
+        keyframes, the decoder skips every non-keyframe (`-skip_frame nokey`)
+        and only evenly spaced I-frames are emitted.
+        """
+        ffmpeg = os.getenv("FFMPEG_BINARY", "ffmpeg")
+        if not shutil.which(ffmpeg):
+            return []
+        info = media_index.get(video_path)
+        if not info["has_video"] or not info["width"]:
+            return []
+
+        keyframes = info["keyframes"]
+        decode_args = []
+        if len(keyframes) >= num_frames:
+            # With nokey, `n` counts keyframes only
+            population = len(keyframes)
+            decode_args = ["-skip_frame", "nokey"]
+        else:
+            population = info["frame_count"]
+        if population <= 0:
             return []
+        picks = sorted({int(i) for i in np.linspace(0, population - 1, num=min(num_frames, population))})
+        select = "+".join(f"eq(n\\,{n})" for n in picks)
 
-        interval = total_frames // num_frames
-        frame_paths = []
-        for i in range(num_frames):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, i * interval)
-            ret, frame = cap.read()
-            if ret:
-                path = os.path.join(temp_dir, f"frame_{i}.jpg")
-                cv2.imwrite(path, frame)
-                frame_paths.append(path)
-        cap.release()
-        return frame_paths
+        scale = min(1.0, VLM_FRAME_MAX_SIDE / float(max(info["width"], info["height"])))
+        w = max(2, int(info["width"] * scale) // 2 * 2)
+        h = max(2, int(info["height"] * scale) // 2 * 2)
+
+        proc = subprocess.Popen(
+            [ffmpeg, "-v", "error", *decode_args, "-i", video_path, "-an",
+             "-vf", f"select='{select}',scale={w}:{h}", "-vsync", "vfr",
+             "-frames:v", str(len(picks)), "-f", "rawvideo", "-pix_fmt", "bgr24", "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        try:
+            raw, _ = proc.communicate(timeout=120)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+
+        frame_bytes = w * h * 3
+        count = len(raw) // frame_bytes
+        frames = np.frombuffer(raw[:count * frame_bytes], dtype=np.uint8).reshape(count, h, w, 3)
+        return [self._encode_jpeg(frame) for frame in frames]
+
+    @staticmethod
+    def _build_contact_sheet(frames: List[bytes]) -> bytes:
+        """
+        Tiles keyframes into one near-square grid, each tile labeled with its
+        position on the timeline, and returns it as a single JPEG.
+        """
+        images = [cv2.imdecode(np.frombuffer(b, np.uint8), cv2.IMREAD_COLOR) for b in frames]
+        images = [img for img in images if img is not None]
+        if not images:
+            raise ValueError("No decodable keyframes for contact sheet")
+
+        cols = math.ceil(math.sqrt(len(images)))
+        rows = math.ceil(len(images) / cols)
+        src_h, src_w = images[0].shape[:2]
+        scale = min(1.0, CONTACT_SHEET_MAX_SIDE / float(max(cols * src_w, rows * src_h)))
+        tile_w, tile_h = max(2, int(src_w * scale)), max(2, int(src_h * scale))
+
+        sheet = np.zeros((rows * tile_h, cols * tile_w, 3), dtype=np.uint8)
+        font_scale = max(0.5, tile_h / 240.0)
+        thickness = max(1, int(round(font_scale * 2)))
+        for i, img in enumerate(images):
+            tile = cv2.resize(img, (tile_w, tile_h), interpolation=cv2.INTER_AREA)
+            label = str(i + 1)
+            (text_w, text_h), baseline = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+            cv2.rectangle(tile, (0, 0), (text_w + 12, text_h + baseline + 12), (0, 0, 0), -1)
+            cv2.putText(tile, label, (6, text_h + 6), cv2.FONT_HERSHEY_SIMPLEX, font_scale, (255, 255, 255), thickness, cv2.LINE_AA)
+            r, c = divmod(i, cols)
+            sheet[r * tile_h:(r + 1) * tile_h, c * tile_w:(c + 1) * tile_w] = tile
+        return VLMService._encode_jpeg(sheet)
+
+    @staticmethod
+    def _perceptual_hash(frames: List[bytes]) -> str:
+        """
+        Difference hash (64 bits) per keyframe, concatenated. Re-encodes and
+        re-uploads of the same source hash identically, unlike a byte hash.
+        """
+        parts = []
+        for jpeg in frames:
+            gray = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_GRAYSCALE)
+            if gray is None:
+                continue
+            small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+            bits = (small[:, 1:] > small[:, :-1]).flatten()
+            parts.append(f"{int(np.packbits(bits).view('>u8')[0]):016x}")
+        return "".join(parts)
 
     async def analyze_video_content(self, video_path: str) -> Dict:
-        """Orchestrates VLM analysis: Groq -> Local -> Gemini."""
-        frame_paths = self._sample_keyframes(video_path)
-        if not frame_paths: return {}
+        """Orchestrates VLM analysis: cache -> Groq -> Local -> Gemini."""
+        frames = self._sample_keyframes(video_path)
+        if not frames: return {}
 
+        contact_sheet = settings.VLM_CONTACT_SHEET
+        mode = "sheet" if contact_sheet else "frames"
+        cache_key = f"{VLM_PROMPT_VERSION}:{mode}:{self._perceptual_hash(frames)}"
+        cached = self.result_cache.get(cache_key)
+        if cached:
+            logging.info(f"[VLMService] Cache hit for {video_path}, skipping model calls")
+            return cached
+
+        if contact_sheet:
+            analysis = await self._analyze_tiers([self._build_contact_sheet(frames)], sheet_frames=len(frames))
+        else:
+            analysis = await self._analyze_tiers(frames)
+        if analysis:
+            self.result_cache.set(cache_key, analysis)
+        return analysis
+
+    async def _analyze_tiers(self, frames: List[bytes], sheet_frames: int = 0) -> Dict:
+        """
+        Groq -> Local -> Gemini with hedging: a tier that has not answered
+        within its tracked latency percentile gets the next tier started in
+        parallel, and the first valid result wins. When `sheet_frames` is set,
+        `frames` holds a single contact sheet tiling that many keyframes.
+        """
+        prompt = CONTACT_SHEET_PROMPT.format(count=sheet_frames) if sheet_frames else None
+
+        tiers = []
         # Tier 1: Groq Vision (Llama 3.2 11B/90B) - FREE/LOW COST
         if self.groq_client:
-            logging.info("[VLMService] Tier 1: Attempting Groq Vision...")
-            analysis = await self._analyze_groq(frame_paths)
-            if analysis: return analysis
-
+            tiers.append(("groq", lambda: self._analyze_groq(frames, prompt)))
         # Tier 2: Local VLM (Moondream2) - ZERO COST (Private GPU)
-        logging.info("[VLMService] Tier 2: Attempting Local Moondream...")
-        local_analysis = await self._analyze_local(frame_paths)
-        if local_analysis: return local_analysis
-
+        if os.getenv("RENDER_NODE_URL"):
+            tiers.append(("local", lambda: self._analyze_local(frames)))
         # Tier 3: Gemini 1.5 Flash - PAID FALLBACK
         if self.gemini_model:
-            logging.info("[VLMService] Tier 3: Falling back to Gemini...")
-            analysis = await self._analyze_gemini(frame_paths)
-            if analysis: return analysis
+            tiers.append(("gemini", lambda: self._analyze_gemini(frames, prompt)))
+        if not tiers:
+            return {}
 
-        # Cleanup
-        for p in frame_paths:
-            if os.path.exists(p): os.remove(p)
-            
-        return {}
+        tier, analysis = await hedged_call(
+            tiers,
+            self.latency,
+            percentile=settings.VLM_HEDGE_PERCENTILE,
+            default_delay=settings.VLM_HEDGE_DEFAULT_DELAY,
+        )
+        if tier:
+            logging.info(f"[VLMService] Analysis served by tier '{tier}'")
+        return analysis or {}
 
-    async def _analyze_groq(self, frame_paths: List[str]) -> Optional[Dict]:
+    async def _analyze_groq(self, frames: List[bytes], prompt: Optional[str] = None) -> Optional[Dict]:
         """Analyzes using Groq Vision."""
         try:
             # Groq Vision usually handles 1 image well, for multiple we sample the best one
             # for cost and prompt limits.
-            with open(frame_paths[0], "rb") as image_file:
-                base64_image = base64.b64encode(image_file.read()).decode('utf-8')
+            base64_image = base64.b64encode(frames[0]).decode('utf-8')
 
             completion = await self.groq_client.chat.completions.create(
                 model="llama-3.2-11b-vision-preview",
@@ -95,7 +248,7 @@ class VLMService:
                     {
                         "role": "user",
                         "content": [
-                            {"type": "text", "text": "Analyze this video frame. Output JSON with: visual_mood, detected_subjects, lighting_quality, dominant_colors, aesthetic_rating (1-10)."},
+                            {"type": "text", "text": prompt or FRAME_PROMPT},
                             {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
                         ]
                     }
@@ -107,14 +260,13 @@ class VLMService:
             logging.warning(f"[VLMService] Groq Vision failed: {e}")
             return None
 
-    async def _analyze_local(self, frame_paths: List[str]) -> Optional[Dict]:
+    async def _analyze_local(self, frames: List[bytes]) -> Optional[Dict]:
         """Analyzes using Moondream2 on the remote inference node."""
         render_node_url = os.getenv("RENDER_NODE_URL")
         if not render_node_url: return None
 
         try:
-            with open(frame_paths[0], "rb") as f:
-                b64_img = base64.b64encode(f.read()).decode('utf-8')
+            b64_img = base64.b64encode(frames[0]).decode('utf-8')
             
             async with httpx.AsyncClient(timeout=30) as client:
                 resp = await client.post(
@@ -133,13 +285,13 @@ class VLMService:
             logging.warning(f"[VLMService] Local VLM failed: {e}")
         return None
 
-    async def _analyze_gemini(self, frame_paths: List[str]) -> Optional[Dict]:
+    async def _analyze_gemini(self, frames: List[bytes], prompt: Optional[str] = None) -> Optional[Dict]:
         """Analyzes using Gemini Multimodal."""
         try:
             from PIL import Image
-            images = [Image.open(p) for p in frame_paths]
-            prompt = "Analyze these video frames. Output JSON with: visual_mood, detected_subjects, lighting_quality, dominant_colors, edit_direction, aesthetic_rating (1-10)."
-            response = self.gemini_model.generate_content([prompt] + images)
+            images = [Image.open(io.BytesIO(b)) for b in frames]
+            # Async variant so a hedged/cancelled Gemini call never blocks the event loop
+            response = await self.gemini_model.generate_content_async([prompt or FRAMES_PROMPT] + images)
             
             text = response.text
             if "```json" in text:
@@ -149,4 +301,10 @@ class VLMService:
             logging.error(f"[VLMService] Gemini failed: {e}")
             return None
 
-vlm_service = VLMService()
+def __getattr__(name):
+    # `vlm_service` resolves through the model registry so importing this
+    # module never initializes the Gemini/Groq clients by itself
+    if name == "vlm_service":
+        from api.utils.model_registry import model_registry
+        return model_registry.get("vlm")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
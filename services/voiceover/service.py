@@ -1,6 +1,10 @@
 import os
+import httpx
+import hashlib
+import logging
 from typing import Optional
 from api.utils.vault import get_secret
+from services.storage.asset_store import asset_store
 
 class VoiceoverService:
     @property
@@ -31,6 +35,13 @@ class VoiceoverService:
         file_name = f"voiceover_{hash(text) % 1000000}.mp3"
         file_path = os.path.join("outputs/audio", file_name)
 
+        # Same engine + voice + text was already synthesized by some job
+        alias = f"voice:{self.engine}:{voice_id or 'default'}:{hashlib.sha256(text.encode()).hexdigest()}"
+        stored = asset_store.lookup(alias)
+        if stored:
+            asset_store.checkout(stored, "outputs/audio", file_name, persistent=True)
+            return f"audio/{file_name}"
+
         # 1. Check Fish Speech (Local Infrastructure)
         if self.engine == "fish_speech" or not self.elevenlabs_key:
             try:
@@ -48,6 +59,7 @@ class VoiceoverService:
                             if audio_resp.status_code == 200:
                                 with open(file_path, "wb") as f:
                                     f.write(audio_resp.content)
+                                asset_store.adopt(file_path, aliases=[alias])
                                 return f"audio/{file_name}"
             except Exception as e:
                 logging.error(f"[VoiceoverService] Fish Speech failed: {e}")
@@ -69,6 +81,7 @@ class VoiceoverService:
                     if response.status_code == 200:
                         with open(file_path, "wb") as f:
                             f.write(response.content)
+                        asset_store.adopt(file_path, aliases=[alias])
                         return f"audio/{file_name}"
             except Exception as e:
                 logging.error(f"[VoiceoverService] ElevenLabs failed: {e}")